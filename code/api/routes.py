@@ -1,10 +1,37 @@
-from flask import Blueprint, request, jsonify
-from services.email_classifier import EmailClassifierService
-from services.service_request_manager import ServiceRequestManager
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import os
+from datetime import datetime
+from itertools import chain
+import shutil
+import uuid
+from config.constants import TEAM_QUEUE_MAX_PAGE_SIZE, TEAM_QUEUE_PAGE_SIZE
+from config.database import get_pool_stats
+from config.ingestion_config import IngestionConfig
+from services.bulk_ingestion import get_bulk_job_runner
+from services.email_classifier import get_email_classifier
+from services.job_queue import QueueFull, get_job_queue
+from services.metrics import registry, trace_request
+from services.request_export import EXPORT_FORMATS, iter_export
+from services.serialization import json_response
+from services.service_request_manager import get_service_request_manager
+from services.warmup import readiness, start_warmup
 
+# Services are built on first use (or by the warm-up thread), not at import time
 api_blueprint = Blueprint('api', __name__)
-email_classifier = EmailClassifierService()
-service_request_manager = ServiceRequestManager()
+
+@api_blueprint.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@api_blueprint.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once the embedding model and services are loaded"""
+    state = readiness()
+    if state['status'] != 'ready':
+        start_warmup()
+        return jsonify(state), 503
+    return jsonify(state)
 
 @api_blueprint.route('/process-email', methods=['POST'])
 def process_email():
@@ -14,38 +41,260 @@ def process_email():
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
+
+        # ?async=true or "Prefer: respond-async" queues the email and returns a job id
+        if request.args.get('async', '').lower() == 'true' or 'respond-async' in request.headers.get('Prefer', ''):
+            return _enqueue_email(file)
         
         # Process the email classification
-        result = email_classifier.process_email(file)
+        with trace_request('process_email'):
+            result = get_email_classifier().process_email(file)
         
         if not result:
             return jsonify({'error': 'Failed to process email'}), 500
             
-        return jsonify(result)
+        return json_response(result)
         
     except ValueError as ve:
         return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _enqueue_email(file):
+    classifier = get_email_classifier()
+    # Parse on the request thread so invalid uploads fail now, not in a worker
+    classifier.validate_email_file(file)
+    email_content = classifier.extract_email_content(file)
+    try:
+        job = get_job_queue().enqueue(
+            email_content,
+            filename=file.filename,
+            idempotency_key=request.headers.get('Idempotency-Key') or request.form.get('idempotency_key'),
+            priority=request.form.get('priority') or request.args.get('priority')
+        )
+    except QueueFull as e:
+        response = jsonify({'error': f'Job queue is full: {str(e)}'})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+
+    job['status_url'] = f"/jobs/{job['job_id']}"
+    response = json_response(job, 202 if job['created'] else 200)
+    response.headers['Location'] = job['status_url']
+    return response
+
+@api_blueprint.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued email; includes the /process-email result once done"""
+    try:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return json_response(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _save_uploads(files, directory):
+    """Spool uploaded .eml, .zip and .mbox files to disk for a background job; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, file in enumerate(files):
+        filename = file.filename or ''
+        extension = os.path.splitext(filename.lower())[1]
+        if extension not in ('.eml', '.zip', '.mbox'):
+            raise ValueError(f'Unsupported file {filename}. Upload .eml, .zip or .mbox files')
+        # Numbered names keep upload order and drop client-supplied paths
+        path = os.path.join(directory, f'{index:05d}{extension}')
+        file.save(path)
+        paths.append(path)
+    return paths
+
+@api_blueprint.route('/process-emails/bulk', methods=['POST'])
+def process_emails_bulk():
+    """Queue uploaded mailboxes for ingestion; poll the returned status_url for progress"""
+    try:
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+
+        # Re-posting with the same job_id resumes an interrupted job
+        job_id = request.form.get('job_id') or str(uuid.uuid4())
+        if not job_id.replace('-', '').replace('_', '').isalnum():
+            return jsonify({'error': 'Invalid job_id'}), 400
+
+        runner = get_bulk_job_runner()
+        if runner.is_active(job_id):
+            return jsonify({'error': f'Bulk job {job_id} is already running'}), 409
+
+        try:
+            paths = _save_uploads(files, runner.upload_dir(job_id))
+        except Exception:
+            shutil.rmtree(runner.upload_dir(job_id), ignore_errors=True)
+            raise
+        job = runner.submit(job_id, paths)
+
+        job['status_url'] = f'/process-emails/bulk/{job_id}'
+        response = jsonify(job)
+        response.status_code = 202
+        response.headers['Location'] = job['status_url']
+        return response
+
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/process-emails/bulk/<job_id>', methods=['GET'])
+def get_bulk_job(job_id):
+    """Status of a bulk ingestion job with its running counts"""
+    try:
+        if not job_id.replace('-', '').replace('_', '').isalnum():
+            return jsonify({'error': 'Invalid job_id'}), 400
+        status = get_bulk_job_runner().status(job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(status)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/duplicate-detector/stats', methods=['GET'])
+def get_duplicate_detector_stats():
+    try:
+        return jsonify(get_email_classifier().duplicate_detector.get_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/llm/stats', methods=['GET'])
+def get_llm_stats():
+    try:
+        return jsonify(get_email_classifier().llm.get_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/llm-cache/stats', methods=['GET'])
+def get_llm_cache_stats():
+    try:
+        response_cache = get_email_classifier().response_cache
+        if response_cache is None:
+            return jsonify({'enabled': False})
+        return jsonify({'enabled': True, **response_cache.get_stats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/document-extractor/stats', methods=['GET'])
+def get_document_extractor_stats():
+    try:
+        document_extractor = get_email_classifier().document_extractor
+        if document_extractor is None:
+            return jsonify({'enabled': False})
+        return jsonify({'enabled': True, **document_extractor.get_stats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+registry.add_collector('db_pool', get_pool_stats)
+
+@api_blueprint.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text format: stage latency histograms, counters and component stats"""
+    try:
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/metrics/db-pool', methods=['GET'])
+def get_db_pool_metrics():
+    try:
+        return jsonify(get_pool_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_blueprint.route('/metrics/db-writer', methods=['GET'])
+def get_db_writer_metrics():
+    try:
+        writer = get_service_request_manager().writer
+        if writer is None:
+            return jsonify({'enabled': False})
+        return jsonify({'enabled': True, **writer.get_stats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _list_arg(name):
+    """Comma separated query parameter as a list"""
+    return [value for value in request.args.get(name, '').split(',') if value]
+
+def _date_arg(name):
+    """ISO 8601 query parameter as a datetime; raises ValueError if malformed"""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+@api_blueprint.route('/service-requests/export', methods=['GET'])
+def export_service_requests():
+    """
+    Stream matching service requests as NDJSON (default) or CSV
+    Query params: format, team, status, request_type (comma separated),
+    created_after, created_before (ISO 8601)
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        rows = get_service_request_manager().iter_service_requests(
+            teams=_list_arg('team'),
+            statuses=_list_arg('status'),
+            request_types=_list_arg('request_type'),
+            created_after=_date_arg('created_after'),
+            created_before=_date_arg('created_before')
+        )
+        chunks = iter_export(rows, export_format)
+        # Run the query now so connection and filter errors still get a JSON error response
+        first_chunk = next(chunks, '')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return Response(
+        stream_with_context(chain([first_chunk], chunks)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=service_requests.{export_format}'}
+    )
+
 @api_blueprint.route('/service-requests/<request_id>', methods=['GET'])
 def get_service_request(request_id):
     try:
-        service_request = service_request_manager.get_service_request(request_id)
+        service_request = get_service_request_manager().get_service_request(request_id)
         if not service_request:
             return jsonify({'error': 'Service request not found'}), 404
-        return jsonify(service_request.to_dict())
+        return json_response(service_request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_blueprint.route('/service-requests/team/<team>', methods=['GET'])
 def get_team_service_requests(team):
+    """
+    Page through a team's queue, oldest first
+    Query params: limit, cursor (from the X-Next-Cursor header of the previous
+    page), status (comma separated), created_after, created_before (ISO 8601)
+    """
     try:
-        service_requests = service_request_manager.get_service_requests_by_team(team)
-        return jsonify([request.to_dict() for request in service_requests])
+        limit = min(int(request.args.get('limit', TEAM_QUEUE_PAGE_SIZE)), TEAM_QUEUE_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        service_requests, next_cursor = get_service_request_manager().get_team_queue(
+            team,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            statuses=_list_arg('status'),
+            created_after=_date_arg('created_after'),
+            created_before=_date_arg('created_before')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    response = json_response(service_requests)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
 @api_blueprint.route('/service-requests/<request_id>/status', methods=['PUT'])
 def update_service_request_status(request_id):
     try:
@@ -53,7 +302,7 @@ def update_service_request_status(request_id):
         if not data or 'status' not in data:
             return jsonify({'error': 'Status is required'}), 400
             
-        service_request = service_request_manager.update_service_request_status(
+        service_request = get_service_request_manager().update_service_request_status(
             request_id, 
             data['status']
         )
@@ -61,6 +310,6 @@ def update_service_request_status(request_id):
         if not service_request:
             return jsonify({'error': 'Service request not found'}), 404
             
-        return jsonify(service_request.to_dict())
+        return json_response(service_request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
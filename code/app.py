@@ -1,5 +1,7 @@
 from flask import Flask
 from api.routes import api_blueprint
+from config.database import close_request_session
+from services.warmup import is_ready, start_warmup
 from dotenv import load_dotenv
 import os
 from config.openai_config import OpenAIConfig
@@ -13,5 +15,15 @@ app = Flask(__name__)
 
 app.register_blueprint(api_blueprint)
 
+# Close the request-scoped database session after every request
+app.teardown_appcontext(close_request_session)
+
+# Models load in the background after startup; the first request starts it
+# if no server hook (see gunicorn.conf.py) already has
+@app.before_request
+def ensure_warmup():
+    if not is_ready():
+        start_warmup()
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Reproducible synthetic lending emails, one template family per request type.
+
+Every message is built from a seeded random generator, so the same
+arguments always produce byte-identical .eml files. Messages vary the deal,
+amounts, dates, accounts and filler text, and a share of them carry a
+quoted reply chain, a signature with a disclaimer, an HTML alternative or
+a CSV attachment; a share are exact resends of an earlier message. Template
+wording only uses the keywords of its own request type, so the mock backend
+classifies them as labelled. Write a corpus to disk from code/:
+
+    python -m benchmarks.corpus -o /tmp/lending_corpus --per-type 50 --seed 7
+"""
+import argparse
+import json
+import os
+import random
+from email.message import EmailMessage
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+# (subject, body) pairs per request type
+TEMPLATES = {
+    "Adjustment": [
+        ("Balance adjustment - Deal {deal}",
+         "Please book an adjustment of {ccy} {amount} on deal {deal} from account {account} "
+         "to account {account2}, effective {date}."),
+        ("Posting correction - {deal}",
+         "We identified a posting correction for deal {deal}. Move {ccy} {amount} from account "
+         "{account} to account {account2} with effective date {date}."),
+    ],
+    "AU Transfer": [
+        ("Reallocation notice - Deal {deal}",
+         "Please note the reallocation of {ccy} {amount} under deal {deal} effective {date}. "
+         "Lender shares are updated accordingly."),
+        ("Assignment and reallocation fees - {deal}",
+         "The assignment under deal {deal} is complete; reallocation fees of {ccy} {amount} "
+         "apply as of {date}."),
+    ],
+    "Closing Notice": [
+        ("Closing notice - Deal {deal}",
+         "This is the closing notice for deal {deal}. The facility ends on {date} and the payoff "
+         "amount is {ccy} {amount}."),
+        ("Pay-off statement - {deal}",
+         "Please find the pay-off statement for deal {deal}: {ccy} {amount} settles the facility "
+         "on {date}."),
+    ],
+    "Commitment Change": [
+        ("Commitment increase - Deal {deal}",
+         "The lenders agreed to increase the commitment under deal {deal} to {ccy} {amount} "
+         "effective {date}."),
+        ("Cashless roll - {deal}",
+         "Please process a cashless roll of {ccy} {amount} under deal {deal} on {date}."),
+    ],
+    "Fee Payment": [
+        ("Fee Payment Notice - Deal {deal}",
+         "The ongoing fee of {ccy} {amount} for deal {deal} is due on {date}. "
+         "Payment reference {ref}."),
+        ("Interest due - {deal}",
+         "Principal and interest of {ccy} {amount} under deal {deal} is due {date}. "
+         "Payment reference {ref}."),
+    ],
+    "Money Movement - Inbound": [
+        ("Incoming wire - Deal {deal}",
+         "We have received {ccy} {amount} from {name} for deal {deal}; account {account} was "
+         "credited with value date {date}."),
+        ("Inbound transfer - {deal}",
+         "{name} will remit {ccy} {amount} for deal {deal} to account {account}, value date {date}."),
+    ],
+    "Money Movement - Outbound": [
+        ("Payment instruction - Deal {deal}",
+         "Please disburse {ccy} {amount} for deal {deal} from account {account} to beneficiary "
+         "{name} by wire, value date {date}."),
+        ("Outbound payment in foreign currency - {deal}",
+         "Pay out {ccy} {amount} under deal {deal} to beneficiary {name}, debit account {account}, "
+         "value date {date}."),
+    ],
+}
+
+FILLER = [
+    "This notice is sent on behalf of the administrative agent.",
+    "Please contact the agency desk with any questions.",
+    "Lender level details are available on the portal.",
+    "All amounts are stated in the currency of the facility.",
+    "Please confirm your details match our records.",
+    "The figures above reflect the latest schedule.",
+    "Operations will process this on the date shown.",
+]
+
+PARTIES = ["Cantor Fitzgerald LP", "Northwind Holdings", "Contoso Capital", "Fabrikam Partners", "Tailspin Group"]
+CURRENCIES = ["USD", "EUR", "GBP"]
+
+
+def _values(rng: random.Random) -> Dict[str, str]:
+    day = datetime(2024, 1, 1) + timedelta(days=rng.randrange(365))
+    return {
+        "deal": f"{rng.choice('ABCDEFGH')}{rng.choice('KLMNPQRS')}X-2024-{rng.randrange(1000):03d}",
+        "ccy": rng.choice(CURRENCIES),
+        "amount": f"{rng.randrange(10_000, 50_000_000):,}.{rng.randrange(100):02d}",
+        "date": day.strftime("%Y-%m-%d"),
+        "account": f"{rng.randrange(100, 999)}-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}",
+        "account2": f"{rng.randrange(100, 999)}-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}",
+        "ref": f"PAY{rng.randrange(10**6):06d}",
+        "name": rng.choice(PARTIES),
+    }
+
+
+def _body(rng: random.Random, template: str, values: Dict[str, str]) -> str:
+    paragraphs = [template.format(**values)]
+    paragraphs += rng.sample(FILLER, rng.randrange(0, 4))
+    return "Dear Loan Operations,\n\n" + "\n\n".join(paragraphs) + "\n"
+
+
+def build_message(
+    rng: random.Random, request_type: str, index: int, options: Dict[str, float]
+) -> Tuple[EmailMessage, Dict[str, str]]:
+    """The message and the values filled into its template"""
+    subject, template = rng.choice(TEMPLATES[request_type])
+    values = _values(rng)
+    body = _body(rng, template, values)
+
+    if rng.random() < options["signature_rate"]:
+        body += (
+            f"\nKind regards,\n{rng.choice(PARTIES)} Agency Services\n+1 555 01{rng.randrange(100):02d}\n\n"
+            "This message is confidential and intended only for the addressee.\n"
+        )
+    if rng.random() < options["reply_rate"]:
+        earlier = _values(rng)
+        body += (
+            f"\nFrom: Agency Desk <agency@example-bank.com>\nSent: {earlier['date']}\n"
+            f"To: Loan Operations\nSubject: {subject.format(**earlier)}\n\n"
+            + "\n".join("> " + line for line in _body(rng, template, earlier).splitlines())
+            + "\n"
+        )
+
+    message = EmailMessage()
+    message["Subject"] = subject.format(**values)
+    message["From"] = "agency@example-bank.com"
+    message["To"] = "loan.operations@example.com"
+    message["Date"] = format_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index))
+    message["Message-ID"] = f"<bench-{index}@example-bank.com>"
+    message.set_content(body)
+    if rng.random() < options["html_rate"]:
+        paragraphs = "".join(f"<p>{p}</p>" for p in body.split("\n\n"))
+        message.add_alternative(f"<html><body>{paragraphs}</body></html>", subtype="html")
+    if rng.random() < options["attachment_rate"]:
+        rows = "\n".join(
+            f"{values['deal']},{rng.randrange(1000, 999999)}.00,{values['date']}" for _ in range(rng.randrange(5, 50))
+        )
+        message.add_attachment(f"deal,amount,date\n{rows}\n", subtype="csv", filename="schedule.csv")
+    return message, values
+
+
+def build_corpus(
+    per_type: int = 50,
+    seed: int = 7,
+    request_types: List[str] = None,
+    duplicate_rate: float = 0.05,
+    reply_rate: float = 0.3,
+    signature_rate: float = 0.6,
+    html_rate: float = 0.3,
+    attachment_rate: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Messages as dicts with name, raw bytes, request_type, values (what was
+    filled into the template: deal, ccy, amount, date, account, account2,
+    ref, name) and duplicate_of (the name of the message it resends, if
+    any), in a shuffled but fixed order
+    """
+    rng = random.Random(seed)
+    options = {
+        "reply_rate": reply_rate,
+        "signature_rate": signature_rate,
+        "html_rate": html_rate,
+        "attachment_rate": attachment_rate,
+    }
+    corpus = []
+    for request_type in request_types or list(TEMPLATES):
+        slug = request_type.lower().replace(" - ", "_").replace(" ", "_")
+        for i in range(per_type):
+            message, values = build_message(rng, request_type, len(corpus), options)
+            corpus.append({
+                "name": f"{slug}/{i:04d}.eml",
+                "raw": message.as_bytes(),
+                "request_type": request_type,
+                "values": values,
+                "duplicate_of": None
+            })
+    rng.shuffle(corpus)
+
+    originals = list(corpus)
+    for i in range(int(len(originals) * duplicate_rate)):
+        original = rng.choice(originals)
+        # Resent later in the stream
+        corpus.insert(rng.randrange(corpus.index(original) + 1, len(corpus) + 1), {
+            **original,
+            "name": f"resend/{i:04d}.eml",
+            "duplicate_of": original["name"]
+        })
+    return corpus
+
+
+def write_corpus(corpus: List[Dict[str, Any]], directory: str) -> None:
+    """Write the .eml files plus a manifest.jsonl of labels in stream order"""
+    with open(os.path.join(directory, "manifest.jsonl"), "w") as manifest:
+        for message in corpus:
+            path = os.path.join(directory, message["name"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(message["raw"])
+            manifest.write(json.dumps({k: v for k, v in message.items() if k != "raw"}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic lending-email corpus")
+    parser.add_argument("-o", "--output", required=True, help="Directory to write .eml files to")
+    parser.add_argument("--per-type", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.per_type, args.seed, duplicate_rate=args.duplicate_rate)
+    write_corpus(corpus, args.output)
+    print(f"Wrote {len(corpus)} messages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
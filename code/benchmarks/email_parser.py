@@ -0,0 +1,96 @@
+"""
+Time and peak memory of .eml extraction on large synthetic messages.
+
+Builds messages with a short text/plain body plus base64 PDF/XLSX-like
+attachments of increasing size and compares the previous extractor
+(email.message_from_bytes + walk + decode) with the streaming EmailParser,
+which reads from a file object the way an upload is read. Peak memory is
+measured with tracemalloc and excludes the input itself. Run from code/:
+
+    python -m benchmarks.email_parser --attachment-mb 1 5 20 --repeat 3
+"""
+import argparse
+import email
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from email.message import EmailMessage
+from services.email_parser import EmailParser
+
+
+def build_message(attachment_mb: float, attachments: int) -> bytes:
+    message = EmailMessage()
+    message['Subject'] = 'Fee Payment Notice - Deal ABC-2024-001'
+    message['From'] = 'agent@example-bank.com'
+    message.set_content(
+        "Please be advised that the ongoing fee of USD 12,500.00 for deal ABC-2024-001 "
+        "is due on 2024-03-15. Remit to account 123-456-789.\n" * 20
+    )
+    size = int(attachment_mb * 1024 * 1024)
+    for i in range(attachments):
+        subtype = 'pdf' if i % 2 == 0 else 'vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        message.add_attachment(os.urandom(size), maintype='application', subtype=subtype, filename=f'doc{i}')
+    return message.as_bytes()
+
+
+def legacy_extract(stream) -> str:
+    msg = email.message_from_bytes(stream.read())
+    subject = msg.get('subject', '')
+    body = ""
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == "text/plain":
+                body += part.get_payload(decode=True).decode()
+    else:
+        body = msg.get_payload(decode=True).decode()
+    return f"Subject: {subject}\n\nBody: {body}"
+
+
+def streaming_extract(stream) -> str:
+    return EmailParser().parse(stream).content
+
+
+def measure(extract, path: str, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        with open(path, 'rb') as f:
+            start = time.perf_counter()
+            extract(f)
+            times.append(time.perf_counter() - start)
+
+    with open(path, 'rb') as f:
+        tracemalloc.start()
+        extract(f)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"ms": round(min(times) * 1000, 2), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark .eml extraction on large messages")
+    parser.add_argument("--attachment-mb", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--attachments", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for attachment_mb in args.attachment_mb:
+        raw = build_message(attachment_mb, args.attachments)
+        with tempfile.NamedTemporaryFile(suffix='.eml', delete=False) as f:
+            f.write(raw)
+            path = f.name
+        try:
+            assert legacy_extract(io.BytesIO(raw)) == streaming_extract(io.BytesIO(raw))
+            print(json.dumps({
+                "message_mb": round(len(raw) / (1024 * 1024), 2),
+                "legacy": measure(legacy_extract, path, args.repeat),
+                "streaming": measure(streaming_extract, path, args.repeat)
+            }))
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Throughput vs latency of the embedding micro-batcher.
+
+Drives EmbeddingBatcher from N concurrent client threads for each
+(max batch size, max wait) setting and reports encodes/second and p50/p99
+per-request latency. Uses MiniLM by default; pass --synthetic to replace it
+with a fixed-overhead + per-item cost model when the model is unavailable.
+Run from the code/ directory:
+
+    python -m benchmarks.embedding_batcher --concurrency 1 8 32 --batch-sizes 1 8 32 --waits 0 2 5
+"""
+import argparse
+import json
+import threading
+import time
+import numpy as np
+from services.embedding_batcher import EmbeddingBatcher
+
+SAMPLE_EMAILS = [
+    "Subject: Fee Payment Notice\n\nBody: Please be advised that the ongoing fee of USD 12,500.00 for deal {n} is due on 2024-03-15.",
+    "Subject: Inbound Funding\n\nBody: We have remitted EUR 1,000,000.00 to account 4455{n} with value date 2024-04-01.",
+    "Subject: Commitment Decrease\n\nBody: The commitment under facility {n} decreases to USD 25,000,000 effective 2024-05-01.",
+    "Subject: Outbound Payment\n\nBody: Please disburse GBP 300,000 for deal {n} to the beneficiary by wire transfer.",
+]
+
+
+def load_encoder(synthetic: bool, overhead_ms: float, per_item_ms: float):
+    if synthetic:
+        def encode(texts):
+            time.sleep((overhead_ms + per_item_ms * len(texts)) / 1000)
+            return np.zeros((len(texts), 384), dtype=np.float32)
+        return encode
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', cache_folder='./models_cache')
+    return model.encode
+
+
+def run_case(encode, concurrency: int, batch_size: int, wait_ms: float, requests: int) -> dict:
+    batcher = EmbeddingBatcher(encode, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    latencies = []
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def client(worker: int):
+        local = []
+        for i in range(per_thread):
+            text = SAMPLE_EMAILS[i % len(SAMPLE_EMAILS)].format(n=f"{worker}-{i}")
+            start = time.perf_counter()
+            batcher.encode(text)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+
+    return {
+        "concurrency": concurrency,
+        "max_batch_size": batch_size,
+        "max_wait_ms": wait_ms,
+        "encodes_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_batch_size": round(batcher.items / max(1, batcher.batches), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding micro-batcher")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 2, 5])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--synthetic-overhead-ms", type=float, default=8.0)
+    parser.add_argument("--synthetic-per-item-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    encode = load_encoder(args.synthetic, args.synthetic_overhead_ms, args.synthetic_per_item_ms)
+    # Warm up so model initialisation is not counted
+    encode([SAMPLE_EMAILS[0].format(n=0)])
+
+    for concurrency in args.concurrency:
+        for batch_size in args.batch_sizes:
+            for wait_ms in args.waits:
+                print(json.dumps(run_case(encode, concurrency, batch_size, wait_ms, args.requests)))
+
+
+if __name__ == "__main__":
+    main()
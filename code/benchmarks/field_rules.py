@@ -0,0 +1,116 @@
+"""
+Coverage of the rule-based field extractor on the synthetic corpus.
+
+Parses and trims every message of benchmarks.corpus the way the pipeline
+does, runs the rule stage for its labelled request type and reports, per
+request type: the share of required fields the rules resolved (the fields
+they can fill or check in the model's answer), the accuracy of the resolved
+values against the values the corpus filled into its templates, and the
+rule time per email. No model is called. Run from code/:
+
+    python -m benchmarks.field_rules --per-type 100
+"""
+import argparse
+import json
+import time
+from collections import defaultdict
+import numpy as np
+from benchmarks.corpus import build_corpus
+from services.email_classifier import EmailClassifierService
+from services.field_rules import FieldRuleExtractor
+from services.llm_backends import MockBackend
+
+
+def expected_fields(request_type, values):
+    """Field values the corpus templates state explicitly; other fields are not scored"""
+    amount = float(values["amount"].replace(",", ""))
+    expected = {"deal_id": values["deal"], "currency": values["ccy"], "payment_reference": values["ref"]}
+    expected.update({
+        "Adjustment": {
+            "transfer_amount": amount, "from_account": values["account"],
+            "to_account": values["account2"], "effective_date": values["date"]
+        },
+        # The template states a payoff amount, not a new commitment amount
+        "Closing Notice": {"effective_date": values["date"]},
+        "Fee Payment": {"amount": amount, "due_date": values["date"]},
+        "Money Movement - Inbound": {
+            "funding_amount": amount, "credit_account": values["account"], "value_date": values["date"]
+        },
+        "Money Movement - Outbound": {
+            "disbursement_amount": amount, "debit_account": values["account"], "value_date": values["date"]
+        },
+    }.get(request_type, {}))
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule-based field extraction coverage")
+    parser.add_argument("--per-type", type=int, default=100, help="Messages per request type")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("-o", "--output", help="Write the JSON report here as well")
+    args = parser.parse_args()
+
+    classifier = EmailClassifierService(backend=MockBackend())
+    rules = classifier.field_rules or FieldRuleExtractor(classifier.extraction_fields)
+
+    totals = defaultdict(lambda: defaultdict(float))
+    per_field = defaultdict(lambda: defaultdict(int))
+    timings = defaultdict(list)
+    for message in build_corpus(per_type=args.per_type, seed=args.seed, duplicate_rate=0):
+        request_type = message["request_type"]
+        required_fields = classifier.extraction_fields.get(request_type, {}).get("default", [])
+        email_content = classifier.email_trimmer.trim(classifier.parse_email_bytes(message["raw"]))
+
+        start = time.perf_counter()
+        resolved = rules.extract(email_content, request_type)
+        timings[request_type].append(time.perf_counter() - start)
+
+        expected = expected_fields(request_type, message["values"])
+        stats = totals[request_type]
+        stats["messages"] += 1
+        stats["required_fields"] += len(required_fields)
+        stats["resolved_fields"] += len(resolved)
+        stats["scored"] += sum(field in expected for field in resolved)
+        stats["correct"] += sum(field in expected and value == expected[field] for field, value in resolved.items())
+        for field in required_fields:
+            per_field[request_type][field] += field in resolved
+
+    def summary(stats, durations):
+        messages = stats["messages"]
+        return {
+            "messages": int(messages),
+            "field_coverage": round(stats["resolved_fields"] / stats["required_fields"], 4)
+            if stats["required_fields"] else None,
+            "accuracy": round(stats["correct"] / stats["scored"], 4) if stats["scored"] else None,
+            "rule_us_p50": round(float(np.percentile(durations, 50)) * 1e6, 1),
+            "rule_us_p99": round(float(np.percentile(durations, 99)) * 1e6, 1),
+        }
+
+    overall = defaultdict(float)
+    for stats in totals.values():
+        for key, value in stats.items():
+            overall[key] += value
+    report = {
+        "settings": vars(args),
+        "overall": summary(overall, [t for durations in timings.values() for t in durations]),
+        "by_request_type": {
+            request_type: {
+                **summary(totals[request_type], timings[request_type]),
+                "fields": {
+                    field: round(hits / totals[request_type]["messages"], 4)
+                    for field, hits in per_field[request_type].items()
+                }
+            }
+            for request_type in sorted(totals)
+        }
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+End-to-end pipeline benchmark over a synthetic lending-email corpus.
+
+Runs every message of benchmarks.corpus through EmailClassifierService the
+way /process-email does (parse, duplicate check, classification and
+extraction, persistence) with the offline mock model and a throwaway SQLite
+database standing in for Postgres (or any DATABASE_URL, e.g. a local
+Postgres). Each stage is timed by wrapping the service's own methods, so
+nothing in the pipeline changes for the benchmark.
+
+Prints JSON with per-stage latency percentiles, throughput, peak RSS and
+result counts; save it and pass it back with --baseline to see the change
+per stage between two versions. Run from code/:
+
+    python -m benchmarks.pipeline --per-type 50 -o after.json --baseline before.json
+    python -m benchmarks.pipeline --embedder hashed   # without downloading MiniLM
+
+To measure the pre-classifier, keep one run's database and embeddings,
+train on them and replay a different corpus with the model:
+
+    python -m benchmarks.pipeline --seed 1 --database-url sqlite:///train.db --embedding-corpus train.vec
+    DATABASE_URL=sqlite:///train.db python -m scripts.train_preclassifier --corpus train.vec --output pre.npz
+    python -m benchmarks.pipeline --seed 2 --preclassifier pre.npz
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.corpus import build_corpus
+
+STAGES = ["parse", "duplicate_check", "embedding", "trim", "prompt_build", "model_call", "json_parse", "persist", "total"]
+
+
+class HashingEncoder:
+    """Bag-of-words hashing in place of MiniLM: same interface, no model download"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16) % self.dimension] += 1.0
+        return vectors
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, owner, name: str, stage: str) -> None:
+        """Replace owner.name with a version that records its duration under stage"""
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def summary(self) -> dict:
+        result = {}
+        for stage in STAGES:
+            samples = self.samples.get(stage)
+            if not samples:
+                continue
+            ms = np.array(samples) * 1000
+            result[stage] = {
+                "count": len(samples),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p90_ms": round(float(np.percentile(ms, 90)), 4),
+                "p99_ms": round(float(np.percentile(ms, 99)), 4),
+                "max_ms": round(float(ms.max()), 4),
+                "total_ms": round(float(ms.sum()), 2)
+            }
+        return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Relative change of p50/p99 per stage and of throughput; negative latency change is faster"""
+    def change(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    stages = {}
+    for stage, stats in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if old:
+            stages[stage] = {
+                "p50_change_pct": change(stats["p50_ms"], old["p50_ms"]),
+                "p99_change_pct": change(stats["p99_ms"], old["p99_ms"])
+            }
+    return {
+        "baseline_revision": baseline.get("revision"),
+        "throughput_change_pct": change(current["throughput_per_second"], baseline.get("throughput_per_second", 0)),
+        "stages": stages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end email pipeline benchmark")
+    parser.add_argument("--per-type", type=int, default=50, help="Messages per request type")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads feeding the pipeline")
+    parser.add_argument("--embedder", choices=["minilm", "hashed"], default="minilm")
+    parser.add_argument("--model-latency-ms", type=float, default=0, help="Simulated model latency per call")
+    parser.add_argument(
+        "--duplicate-threshold", type=float, default=0.97,
+        help="Duplicate similarity threshold; templated mail is more alike than real mail, "
+             "so the configured 0.8 would flag most of the corpus"
+    )
+    parser.add_argument("--single-call", action="store_true", help="Classify and extract in one model call")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file")
+    parser.add_argument("--embedding-corpus", help="Persist embeddings here, e.g. to train the pre-classifier")
+    parser.add_argument("--preclassifier", help="Trained pre-classifier model to use (off by default)")
+    parser.add_argument("-o", "--output", help="Write the JSON report here as well")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    # The services read these when first imported
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LLM_BACKEND"] = "mock"
+    # Every message should reach the model rather than the response cache
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["DUPLICATE_CORPUS_PATH"] = args.embedding_corpus or ""
+    os.environ["PRECLASSIFIER_ENABLED"] = "true" if args.preclassifier else "false"
+    os.environ["PRECLASSIFIER_MODEL_PATH"] = args.preclassifier or ""
+    os.environ["DUPLICATE_SIMILARITY_THRESHOLD"] = str(args.duplicate_threshold)
+
+    from config.database import Base, engine
+    import models.db_models  # noqa: F401  registers the tables
+    from services.duplicate_detector import DuplicateDetectorService
+    from services.email_classifier import EmailClassifierService
+    from services.llm_backends import MockBackend
+    from services.service_request_manager import ServiceRequestManager
+
+    Base.metadata.create_all(bind=engine)
+
+    detector = DuplicateDetectorService()
+    if args.embedder == "hashed":
+        # Shadows the lazily loaded model property on this instance's class only
+        detector.__class__ = type("HashedDuplicateDetector", (DuplicateDetectorService,), {"model": HashingEncoder()})
+    manager = ServiceRequestManager(duplicate_detector=detector)
+    classifier = EmailClassifierService(
+        duplicate_detector=detector,
+        service_request_manager=manager,
+        single_call=args.single_call,
+        backend=MockBackend(latency_ms=args.model_latency_ms, seed=args.seed)
+    )
+
+    timer = StageTimer()
+    timer.wrap(classifier, "parse_email_bytes", "parse")
+    timer.wrap(detector, "check_duplicate", "duplicate_check")
+    timer.wrap(detector, "_encode", "embedding")
+    timer.wrap(classifier.email_trimmer, "trim", "trim")
+    for name in ("create_classification_prompt", "create_deal_extraction_prompt", "create_combined_prompt"):
+        timer.wrap(classifier, name, "prompt_build")
+    timer.wrap(classifier.llm, "generate", "model_call")
+    timer.wrap(classifier, "_parse_json_response", "json_parse")
+    timer.wrap(manager, "create_service_request", "persist")
+
+    if classifier.classification_criteria["Request Type"].keys() - {
+        message["request_type"] for message in build_corpus(per_type=1, seed=args.seed)
+    }:
+        raise SystemExit("benchmarks.corpus has no template for some request types")
+    corpus = build_corpus(per_type=args.per_type, seed=args.seed, duplicate_rate=args.duplicate_rate)
+
+    # Load the embedding model and compile everything before the clock starts
+    detector.model.encode(["warm-up"])
+
+    def run(message):
+        start = time.perf_counter()
+        try:
+            result = classifier.process_email_content(classifier.parse_email_bytes(message["raw"]))
+        except Exception as e:
+            return message, {"error": str(e)}
+        finally:
+            timer.record("total", time.perf_counter() - start)
+        return message, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        outcomes = list(executor.map(run, corpus))
+    manager.flush()
+    elapsed = time.perf_counter() - start
+
+    counts = {"created": 0, "duplicates": 0, "failed": 0, "classified_as_labelled": 0,
+              "resends_detected": 0, "resends": 0, "failed_by_request_type": defaultdict(int)}
+    for message, result in outcomes:
+        if message["duplicate_of"]:
+            counts["resends"] += 1
+            counts["resends_detected"] += bool(result.get("is_duplicate"))
+        if result.get("is_duplicate"):
+            counts["duplicates"] += 1
+        elif "error" in result:
+            counts["failed"] += 1
+            counts["failed_by_request_type"][message["request_type"]] += 1
+        else:
+            counts["created"] += 1
+            counts["classified_as_labelled"] += (
+                result["classification"].get("request_type") == message["request_type"]
+            )
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "database": engine.url.get_backend_name(),
+        "messages": len(corpus),
+        "wall_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(corpus) / elapsed, 2),
+        # kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": counts,
+        "preclassifier": classifier.pre_classifier.get_stats() if classifier.pre_classifier else None,
+        "stages": timer.summary()
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
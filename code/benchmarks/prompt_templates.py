@@ -0,0 +1,85 @@
+"""
+Prompt construction time and prompt size on long reply threads.
+
+Compares building the classification and extraction prompts from scratch
+(the per-request json.dumps of the criteria and field descriptions) with
+rendering the precompiled templates, and reports the estimated tokens of
+the email text before and after trimming quoted replies and signatures.
+Uses the mock backend; no model is called. Run from code/:
+
+    python -m benchmarks.prompt_templates --replies 10 --calls 20000
+"""
+import argparse
+import json
+import time
+from services.email_classifier import EmailClassifierService
+from services.llm_backends import MockBackend
+from services.prompt_templates import CHARS_PER_TOKEN
+
+REPLY = """
+From: Agency Desk <agency@example-bank.com>
+Sent: Monday, March {day}, 2024 9:{day:02d} AM
+To: Loan Operations
+Subject: RE: Fee Payment Notice - Deal ABC-2024-001
+
+Following up on the fee below; please confirm receipt of USD 12,500.00.
+
+Kind regards,
+Agency Desk
+Example Bank | 1 Main Street | +1 555 0100
+This message is confidential and intended only for the addressee.
+"""
+
+
+def build_thread(replies: int) -> str:
+    body = (
+        "Subject: RE: Fee Payment Notice - Deal ABC-2024-001\n\n"
+        "Body: Please be advised that the ongoing fee of USD 12,500.00 for deal ABC-2024-001 "
+        "is due on 2024-03-15. Remit to account 123-456-789.\n\nBest regards,\nLoan Operations\n"
+    )
+    return body + "".join(REPLY.format(day=day + 1) for day in range(replies))
+
+
+def microseconds_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt templates and email trimming")
+    parser.add_argument("--replies", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    classifier = EmailClassifierService(backend=MockBackend())
+    email_content = build_thread(args.replies)
+    trimmed = classifier.email_trimmer.trim(email_content)
+
+    results = {
+        "build_us": {
+            "classification": round(microseconds_per_call(
+                lambda: classifier._build_classification_prompt(email_content), args.calls), 2),
+            "extraction": round(microseconds_per_call(
+                lambda: classifier._build_deal_extraction_prompt(email_content, "Fee Payment"), args.calls), 2)
+        },
+        "render_us": {
+            "classification": round(microseconds_per_call(
+                lambda: classifier.create_classification_prompt(email_content), args.calls), 2),
+            "extraction": round(microseconds_per_call(
+                lambda: classifier.create_deal_extraction_prompt(email_content, "Fee Payment"), args.calls), 2)
+        },
+        "email_tokens": len(email_content) // CHARS_PER_TOKEN,
+        "trimmed_email_tokens": len(trimmed) // CHARS_PER_TOKEN,
+        "classification_prompt_tokens": len(classifier.create_classification_prompt(email_content)) // CHARS_PER_TOKEN,
+        "trimmed_classification_prompt_tokens": len(classifier.create_classification_prompt(trimmed)) // CHARS_PER_TOKEN,
+        "classification_unchanged": (
+            classifier.model.classify(email_content)["request_type"] == classifier.model.classify(trimmed)["request_type"]
+        )
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Allocation and time per service request: old conversion chain vs row mapping.
+
+The legacy path replays what a create used to do: ServiceRequest -> to_dict
+-> ServiceRequestDB.from_dict -> (refresh) -> to_dict -> ServiceRequest.from_dict
+-> to_dict -> JSON. The current create path is ServiceRequest -> to_row ->
+created_at from RETURNING -> dumps, and loads use ServiceRequest.from_row.
+No database is involved; rows are faked.
+Reports the peak transient bytes per request (tracemalloc), the retained bytes
+per loaded ServiceRequest and microseconds per request. Run from code/:
+
+    python -m benchmarks.service_request_alloc --requests 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from models.db_models import ServiceRequestDB
+from models.service_request import ServiceRequest
+from services.serialization import dumps, orjson
+
+FIELDS = dict(
+    request_type="Fee Payment",
+    sub_request_type="Ongoing Fee",
+    deal_id="DEAL-2024-001",
+    extracted_fields={"amount": 12500.0, "currency": "USD", "due_date": "2024-03-15"},
+    confidence_score=0.92
+)
+
+# Internal columns (embedding_row, source_digest, classified_by) default to None
+Row = namedtuple("Row", ServiceRequest.__slots__, defaults=(None, None, None))
+
+
+class LegacyServiceRequest:
+    """The dict-backed ServiceRequest as it was before __slots__"""
+
+    def __init__(self, request_type, sub_request_type, deal_id, extracted_fields, confidence_score,
+                 team_assigned=None, status="NEW", created_at=None, updated_at=None):
+        self.id = str(uuid.uuid4())
+        self.request_type = request_type
+        self.sub_request_type = sub_request_type
+        self.deal_id = deal_id
+        self.extracted_fields = extracted_fields
+        self.confidence_score = confidence_score
+        self.team_assigned = team_assigned
+        self.status = status
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = updated_at or datetime.utcnow()
+
+    to_dict = ServiceRequest.to_dict
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            request_type=data["request_type"],
+            sub_request_type=data.get("sub_request_type"),
+            deal_id=data["deal_id"],
+            extracted_fields=data["extracted_fields"],
+            confidence_score=data["confidence_score"],
+            team_assigned=data.get("team_assigned"),
+            status=data.get("status", "NEW"),
+            created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None,
+            updated_at=datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None
+        )
+
+
+def legacy_request() -> bytes:
+    service_request = LegacyServiceRequest(**FIELDS)
+    service_request.team_assigned = "FEE_TEAM"
+    db_request = ServiceRequestDB.from_dict(service_request.to_dict())
+    # What refresh() would load back
+    db_request.id = str(uuid.uuid4())
+    db_request.created_at = datetime.now(timezone.utc)
+    loaded = LegacyServiceRequest.from_dict(db_request.to_dict())
+    return json.dumps(loaded.to_dict()).encode('utf-8')
+
+
+def current_request() -> bytes:
+    service_request = ServiceRequest(**FIELDS)
+    service_request.team_assigned = "FEE_TEAM"
+    service_request.to_row()
+    # What INSERT ... RETURNING hands back
+    service_request.created_at = datetime.now(timezone.utc)
+    return dumps(service_request)
+
+
+def legacy_load(i: int):
+    data = Row(str(i), updated_at=None, created_at=datetime.now(timezone.utc), team_assigned="FEE_TEAM",
+               status="NEW", **FIELDS)._asdict()
+    data["created_at"] = data["created_at"].isoformat()
+    return LegacyServiceRequest.from_dict(data)
+
+
+def current_load(i: int):
+    return ServiceRequest.from_row(Row(str(i), updated_at=None, created_at=datetime.now(timezone.utc),
+                                       team_assigned="FEE_TEAM", status="NEW", **FIELDS))
+
+
+def peak_bytes_per_call(fn, calls: int) -> float:
+    peaks = []
+    tracemalloc.start()
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def retained_bytes_per_object(load, count: int) -> float:
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    kept = [load(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (current - base) / count
+
+
+def microseconds_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ServiceRequest conversions")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Warm caches (mapper configuration, imports)
+    legacy_request()
+    current_request()
+
+    results = {"serializer": "orjson" if orjson is not None else "json"}
+    for name, request_fn, load_fn in (("legacy", legacy_request, legacy_load),
+                                      ("current", current_request, current_load)):
+        results[name] = {
+            "us_per_request": round(microseconds_per_call(request_fn, args.requests), 2),
+            "peak_bytes_per_request": round(peak_bytes_per_call(request_fn, min(args.requests, 5000))),
+            "retained_bytes_per_loaded_request": round(retained_bytes_per_object(load_fn, args.requests))
+        }
+    results["peak_bytes_saved_per_request"] = (
+        results["legacy"]["peak_bytes_per_request"] - results["current"]["peak_bytes_per_request"]
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start timings of the Flask app in fresh interpreters.
+
+Each run starts a new Python process that imports app.py, answers a first
+/healthz through the test client, then polls /readyz until the background
+warm-up reports ready (embedding model loaded, services built, first encode
+done). Reports milliseconds to each milestone and the child's peak RSS.
+Needs the database settings the app imports with; no query is made. Run
+from code/:
+
+    python -m benchmarks.startup --runs 3
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child(ready_timeout: float) -> None:
+    start = time.perf_counter()
+    from app import app
+    imported = time.perf_counter()
+
+    client = app.test_client()
+    client.get('/healthz')
+    healthy = time.perf_counter()
+
+    status = None
+    while time.perf_counter() - start < ready_timeout:
+        response = client.get('/readyz')
+        status = response.get_json()
+        if response.status_code == 200:
+            break
+        time.sleep(0.01)
+    ready = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": round((imported - start) * 1000, 1),
+        "first_healthz_ms": round((healthy - start) * 1000, 1),
+        "ready_ms": round((ready - start) * 1000, 1) if status and status["status"] == "ready" else None,
+        "warmup_seconds": status["seconds"] if status else {},
+        # kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app startup and time to ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.ready_timeout)
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", "--ready-timeout", str(args.ready_timeout)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    summary = {"runs": runs}
+    for key in ("import_ms", "first_healthz_ms", "ready_ms", "peak_rss_mb"):
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[f"median_{key}"] = statistics.median(values)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark duplicate-detection index backends against exact search.
+
+Reports p50/p99 query latency and recall@1 for synthetic clustered
+embeddings. Run from the code/ directory:
+
+    python -m benchmarks.vector_index --sizes 10000 100000 1000000 --probes 1 4 8 16
+"""
+import argparse
+import json
+import time
+import numpy as np
+from services.embedding_store import EmbeddingStore
+from services.vector_index import ExactIndex, IVFIndex
+
+
+def synthetic_embeddings(size: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors, loosely shaped like sentence embeddings of templated emails"""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    return vectors
+
+
+def synthetic_queries(vectors: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed copies of stored rows, i.e. near-duplicate emails"""
+    picks = rng.integers(0, vectors.shape[0], count)
+    noise = 0.3 * rng.standard_normal((count, vectors.shape[1])).astype(np.float32)
+    return vectors[picks] + noise
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray = None) -> dict:
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        ids, _ = index.search(query, k=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(int(ids[0]) if ids.shape[0] else -1)
+
+    found = np.asarray(found)
+    result = {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4)
+    }
+    if truth is not None:
+        result["recall_at_1"] = round(float(np.mean(found == truth)), 4)
+    return result, found
+
+
+def run(sizes, probes, dim: int, queries: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    results = []
+
+    for size in sizes:
+        store = EmbeddingStore(dim=dim, initial_capacity=size)
+        vectors = synthetic_embeddings(size, dim, clusters=max(16, size // 500), rng=rng)
+        store.extend(vectors)
+        query_vectors = synthetic_queries(vectors, queries, rng)
+        del vectors
+
+        exact_stats, truth = measure(ExactIndex(store), query_vectors)
+        results.append({"size": size, "backend": "exact", "recall_at_1": 1.0, **exact_stats})
+
+        index = IVFIndex(store, min_index_size=0)
+        start = time.perf_counter()
+        index.train()
+        train_seconds = round(time.perf_counter() - start, 3)
+
+        for n_probe in probes:
+            index.n_probe = n_probe
+            stats, _ = measure(index, query_vectors, truth)
+            results.append({
+                "size": size,
+                "backend": "ivf",
+                "n_lists": index.centroids.shape[0],
+                "n_probe": n_probe,
+                "train_seconds": train_seconds,
+                **stats
+            })
+
+        for row in results[-(len(probes) + 1):]:
+            print(json.dumps(row))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duplicate-detection index backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run(args.sizes, args.probes, args.dim, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
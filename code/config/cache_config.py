@@ -0,0 +1,12 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class CacheConfig:
+    # Cache of parsed classification/extraction results
+    ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+    TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_SECONDS', '86400'))
+    # SQLite file for the on-disk tier; empty keeps the cache in memory only
+    DISK_PATH = os.getenv('LLM_CACHE_DISK_PATH', '')
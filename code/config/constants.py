@@ -1,4 +1,31 @@
 # You can add configuration constants here
 API_VERSION = 'v1'
 MODEL_NAME = 'gpt-4'
-MODEL_TEMPERATURE = 0 
\ No newline at end of file
+MODEL_TEMPERATURE = 0
+
+# Team queue page sizes for GET /service-requests/team/<team>
+TEAM_QUEUE_PAGE_SIZE = 100
+TEAM_QUEUE_MAX_PAGE_SIZE = 1000
+
+# Keyword hints per request type, checked in order; the first request type
+# with a matching keyword wins. Used by the mock LLM backend and to pick a
+# job queue lane before the model has classified the email
+REQUEST_TYPE_KEYWORDS = [
+    ("Money Movement - Outbound", ["disburse", "outbound", "pay out", "beneficiary", "drawdown"]),
+    ("Money Movement - Inbound", ["remit", "inbound", "received", "funding", "credited"]),
+    ("Commitment Change", ["commitment", "cashless roll"]),
+    ("AU Transfer", ["reallocation", "assignment", "au transfer"]),
+    ("Closing Notice", ["closing", "payoff", "pay-off", "termination"]),
+    ("Fee Payment", ["fee", "interest", "principal", "repayment"]),
+    ("Adjustment", ["adjustment", "correction"]),
+]
+SUB_REQUEST_TYPE_KEYWORDS = {
+    "AU Transfer": [("Reallocation Fees", ["reallocation fee"]), ("Amendment Fees", ["amendment fee"]),
+                    ("Reallocation Principal", ["reallocation"])],
+    "Commitment Change": [("Cashless Roll", ["cashless roll"]), ("Decrease", ["decrease", "reduc"]),
+                          ("Increase", ["increase"])],
+    "Fee Payment": [("Letter of Credit Fee", ["letter of credit"]), ("Principal + Interest + Fee", ["principal, interest and fee"]),
+                    ("Principal + Interest", ["principal and interest"]), ("Ongoing Fee", ["ongoing fee", "commitment fee"]),
+                    ("Interest", ["interest"]), ("Principal", ["principal"])],
+    "Money Movement - Outbound": [("Foreign Currency", ["foreign currency", "fx"]), ("Timebound", ["by ", "no later than"])],
+}
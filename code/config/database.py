@@ -1,7 +1,13 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
+from flask import g, has_app_context
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
@@ -15,14 +21,71 @@ DB_PORT = os.getenv('DB_PORT', '5432')
 DB_NAME = os.getenv('DB_NAME', 'banking_triage')
 DB_SCHEMA = os.getenv('DB_SCHEMA', 'banking_triage')
 
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
 # URL encode the password to handle special characters
 encoded_password = quote_plus(DB_PASSWORD)
 
-# Construct database URL
-DATABASE_URL = f"postgresql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Construct database URL; DATABASE_URL overrides it, e.g. sqlite:///bench.db
+# as a local stand-in for benchmarks
+DATABASE_URL = os.getenv('DATABASE_URL') or (
+    f"postgresql+psycopg2://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+IS_SQLITE = DATABASE_URL.startswith('sqlite')
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "timeouts": 0}
+        self._wait_lock = threading.Lock()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._wait_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_stats["count"] += 1
+                self.wait_stats["total_seconds"] += waited
+                self.wait_stats["max_seconds"] = max(self.wait_stats["max_seconds"], waited)
+
+
+# Create SQLAlchemy engine; the schema is set once per connection through
+# libpq startup options rather than with an extra statement on every connect.
+# SQLite has no schemas and its connections are shared across threads.
+if IS_SQLITE:
+    connect_args = {'check_same_thread': False}
+else:
+    connect_args = {'options': f'-csearch_path={DB_SCHEMA}'}
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args
+)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -30,12 +93,33 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class
 Base = declarative_base()
 
-# Set the schema for all connections
+_pool_counters = {"connections_opened": 0, "checkouts": 0}
+
 @event.listens_for(engine, 'connect')
-def set_schema(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute(f'SET search_path TO {DB_SCHEMA}')
-    cursor.close()
+def count_connect(dbapi_connection, connection_record):
+    _pool_counters["connections_opened"] += 1
+
+@event.listens_for(engine, 'checkout')
+def count_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counters["checkouts"] += 1
+
+def get_pool_stats():
+    """Connection pool metrics for monitoring"""
+    pool = engine.pool
+    wait_stats = dict(pool.wait_stats)
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "connections_opened": _pool_counters["connections_opened"],
+        "checkouts": _pool_counters["checkouts"],
+        "wait_count": wait_stats["count"],
+        "wait_timeouts": wait_stats["timeouts"],
+        "wait_seconds_total": round(wait_stats["total_seconds"], 6),
+        "wait_seconds_max": round(wait_stats["max_seconds"], 6)
+    }
 
 # Dependency to get DB session
 def get_db():
@@ -43,4 +127,31 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def db_session():
+    """
+    Session for the current Flask request, shared by every call made while
+    handling it and closed on app-context teardown; outside a request
+    (scripts, worker threads) a short-lived session is opened and closed
+    """
+    if has_app_context():
+        if 'db_session' not in g:
+            g.db_session = SessionLocal()
+        yield g.db_session
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def close_request_session(exception=None):
+    """Flask teardown hook for the request-scoped session"""
+    db = g.pop('db_session', None)
+    if db is not None:
+        if exception is not None:
+            db.rollback()
+        db.close()
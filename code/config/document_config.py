@@ -0,0 +1,18 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class DocumentConfig:
+    # Extract text from HTML bodies and PDF/DOCX/text attachments
+    ENABLED = os.getenv('DOCUMENT_EXTRACTION_ENABLED', 'true').lower() == 'true'
+    # Worker processes for PDF/DOCX parsing
+    WORKERS = int(os.getenv('DOCUMENT_WORKERS', '2'))
+    # Time budget per document
+    TIMEOUT_SECONDS = float(os.getenv('DOCUMENT_TIMEOUT_SECONDS', '10'))
+    # Larger attachments are skipped
+    MAX_BYTES = int(os.getenv('DOCUMENT_MAX_BYTES', str(10 * 1024 * 1024)))
+    # Text kept per document
+    MAX_TEXT_CHARS = int(os.getenv('DOCUMENT_MAX_TEXT_CHARS', '20000'))
+    # Extracted texts cached by content hash
+    CACHE_ENTRIES = int(os.getenv('DOCUMENT_CACHE_ENTRIES', '256'))
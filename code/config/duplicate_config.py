@@ -0,0 +1,43 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class DuplicateDetectorConfig:
+    # Emails scoring above this are duplicates; embedding cosines and SimHash distances
+    # are both mapped to (cos + 1) / 2 before the comparison
+    SIMILARITY_THRESHOLD = float(os.getenv('DUPLICATE_SIMILARITY_THRESHOLD', '0.8'))
+
+    # On-disk embedding corpus shared across restarts and workers; empty keeps it in memory
+    CORPUS_PATH = os.getenv('DUPLICATE_CORPUS_PATH', '')
+    CORPUS_FSYNC = os.getenv('DUPLICATE_CORPUS_FSYNC', 'false').lower() == 'true'
+
+    # Content-hash fast path in front of the embedding model
+    HASH_ENABLED = os.getenv('DUPLICATE_HASH_ENABLED', 'true').lower() == 'true'
+    SIMHASH_ENABLED = os.getenv('DUPLICATE_SIMHASH_ENABLED', 'true').lower() == 'true'
+    # Max differing SimHash bits (of 64) for a near-exact match; capped at 3
+    SIMHASH_MAX_DISTANCE = int(os.getenv('DUPLICATE_SIMHASH_MAX_DISTANCE', '3'))
+    # Most recent corpus rows hashed at startup
+    HASH_WARM_ROWS = int(os.getenv('DUPLICATE_HASH_WARM_ROWS', '50000'))
+
+    # Embedding micro-batcher: max texts per model call (1 disables batching)
+    # and how long the first request in a batch may wait for others
+    BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+    BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '5'))
+
+    # Index backend: "exact" (brute-force scan) or "ivf" (approximate inverted-file index)
+    INDEX_BACKEND = os.getenv('DUPLICATE_INDEX_BACKEND', 'exact')
+    # Number of IVF lists; 0 picks sqrt(store size) at training time
+    INDEX_LISTS = int(os.getenv('DUPLICATE_INDEX_LISTS', '0'))
+    # Lists scanned per query; higher means better recall and slower queries
+    INDEX_PROBES = int(os.getenv('DUPLICATE_INDEX_PROBES', '8'))
+    # Stores smaller than this are always scanned exactly
+    INDEX_MIN_SIZE = int(os.getenv('DUPLICATE_INDEX_MIN_SIZE', '10000'))
+
+    @classmethod
+    def index_options(cls):
+        return {
+            "n_lists": cls.INDEX_LISTS,
+            "n_probe": cls.INDEX_PROBES,
+            "min_index_size": cls.INDEX_MIN_SIZE
+        }
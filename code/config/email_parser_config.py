@@ -0,0 +1,12 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class EmailParserConfig:
+    # Stop reading a message after this many bytes (attachments included)
+    MAX_MESSAGE_BYTES = int(os.getenv('EMAIL_MAX_MESSAGE_BYTES', str(50 * 1024 * 1024)))
+    # Body text kept per message; the rest is dropped
+    MAX_BODY_CHARS = int(os.getenv('EMAIL_MAX_BODY_CHARS', '100000'))
+    # Header block size limit per MIME part
+    MAX_HEADER_BYTES = int(os.getenv('EMAIL_MAX_HEADER_BYTES', str(64 * 1024)))
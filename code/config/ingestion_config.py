@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class IngestionConfig:
+    # LLM calls in flight at once during bulk ingestion
+    CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '4'))
+    # Messages per duplicate-detection batch and per DB transaction
+    BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '32'))
+    # Where resumable job journals are kept
+    CHECKPOINT_DIR = os.getenv('BULK_CHECKPOINT_DIR', './ingestion_checkpoints')
+    # Uploaded bulk jobs running at once per worker process; later ones wait queued
+    MAX_JOBS = int(os.getenv('BULK_MAX_JOBS', '1'))
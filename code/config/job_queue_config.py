@@ -0,0 +1,25 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class JobQueueConfig:
+    # SQLite file holding queued emails and results; shared by every worker process on the host
+    PATH = os.getenv('JOB_QUEUE_PATH', './data/jobs.db')
+    # Worker threads per process draining the queue
+    WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+    # Queued jobs accepted before POST /process-email?async=true answers 429
+    MAX_PENDING = int(os.getenv('JOB_QUEUE_MAX_PENDING', '1000'))
+    # Attempts per job; failures other than PermanentJobError are retried with backoff
+    MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    # A running job not finished within this many seconds is assumed lost and requeued,
+    # or marked dead if it has used all JOB_MAX_ATTEMPTS
+    LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '300'))
+    # How long finished jobs (and their idempotency keys) are kept
+    RESULT_TTL_SECONDS = float(os.getenv('JOB_RESULT_TTL_SECONDS', '86400'))
+    # Request types whose emails go to the high-priority lane (comma separated)
+    HIGH_PRIORITY_TYPES = [
+        value.strip() for value in os.getenv(
+            'JOB_HIGH_PRIORITY_TYPES', 'Money Movement - Outbound,Money Movement - Inbound'
+        ).split(',') if value.strip()
+    ]
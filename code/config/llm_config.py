@@ -0,0 +1,66 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class LLMConfig:
+    # Model backend: "gemini", "openai" or "mock" (offline, for load testing)
+    BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+
+    # Classify and extract in a single model call
+    SINGLE_CALL = os.getenv('LLM_SINGLE_CALL', 'false').lower() == 'true'
+
+    # Concurrency, timeout and retry policy for model calls
+    MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+    TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+    MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+    BACKOFF_BASE_SECONDS = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', '0.5'))
+    BACKOFF_MAX_SECONDS = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', '10'))
+    # Model requests-per-minute budget; 0 disables rate limiting
+    REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '0'))
+    # Threads running whole email pipelines for asynchronous callers
+    PIPELINE_WORKERS = int(os.getenv('LLM_PIPELINE_WORKERS', '8'))
+
+    # Estimated token budget for the email text in a prompt; 0 = no limit
+    PROMPT_MAX_EMAIL_TOKENS = int(os.getenv('LLM_PROMPT_MAX_EMAIL_TOKENS', '3000'))
+    # Drop quoted reply chains and signatures from the email before prompting
+    PROMPT_STRIP_REPLIES = os.getenv('LLM_PROMPT_STRIP_REPLIES', 'true').lower() == 'true'
+    PROMPT_STRIP_SIGNATURES = os.getenv('LLM_PROMPT_STRIP_SIGNATURES', 'true').lower() == 'true'
+
+    # Read deal ids, amounts, currencies, accounts, dates and references with
+    # rules too; they fill fields the extraction call left empty
+    RULE_EXTRACTION = os.getenv('LLM_RULE_EXTRACTION', 'true').lower() == 'true'
+
+    # Mock backend: simulated latency per call and fraction of calls that fail
+    MOCK_LATENCY_MS = float(os.getenv('MOCK_LLM_LATENCY_MS', '0'))
+    MOCK_LATENCY_JITTER_MS = float(os.getenv('MOCK_LLM_LATENCY_JITTER_MS', '0'))
+    MOCK_ERROR_RATE = float(os.getenv('MOCK_LLM_ERROR_RATE', '0'))
+    MOCK_SEED = os.getenv('MOCK_LLM_SEED')
+
+    @classmethod
+    def runner_options(cls):
+        return {
+            "max_concurrency": cls.MAX_CONCURRENCY,
+            "timeout": cls.TIMEOUT_SECONDS,
+            "max_retries": cls.MAX_RETRIES,
+            "backoff_base": cls.BACKOFF_BASE_SECONDS,
+            "backoff_max": cls.BACKOFF_MAX_SECONDS,
+            "requests_per_minute": cls.REQUESTS_PER_MINUTE
+        }
+
+    @classmethod
+    def trimmer_options(cls):
+        return {
+            "max_tokens": cls.PROMPT_MAX_EMAIL_TOKENS,
+            "strip_replies": cls.PROMPT_STRIP_REPLIES,
+            "strip_signatures": cls.PROMPT_STRIP_SIGNATURES
+        }
+
+    @classmethod
+    def mock_options(cls):
+        return {
+            "latency_ms": cls.MOCK_LATENCY_MS,
+            "latency_jitter_ms": cls.MOCK_LATENCY_JITTER_MS,
+            "error_rate": cls.MOCK_ERROR_RATE,
+            "seed": int(cls.MOCK_SEED) if cls.MOCK_SEED else None
+        }
@@ -0,0 +1,16 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class MetricsConfig:
+    # Record per-stage timings and counters for /metrics
+    ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    # Requests slower than this are logged with their stage breakdown
+    SLOW_REQUEST_MS = float(os.getenv('METRICS_SLOW_REQUEST_MS', '2000'))
+    # Fraction of requests stack-sampled; their profile is logged if they turn out slow
+    PROFILE_SAMPLE_RATE = float(os.getenv('METRICS_PROFILE_SAMPLE_RATE', '0'))
+    # Time between stack samples
+    PROFILE_INTERVAL_MS = float(os.getenv('METRICS_PROFILE_INTERVAL_MS', '5'))
+    # Most frequent stacks reported per slow request
+    PROFILE_TOP_STACKS = int(os.getenv('METRICS_PROFILE_TOP_STACKS', '5'))
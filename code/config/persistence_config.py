@@ -0,0 +1,16 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class PersistenceConfig:
+    # Group service request inserts into bulk INSERT ... RETURNING statements
+    WRITE_BEHIND_ENABLED = os.getenv('SR_WRITE_BEHIND', 'true').lower() == 'true'
+    # Rows per INSERT statement / transaction
+    BATCH_SIZE = int(os.getenv('SR_WRITE_BATCH_SIZE', '100'))
+    # Max time spent collecting one batch; an empty queue flushes at once
+    FLUSH_MS = float(os.getenv('SR_WRITE_FLUSH_MS', '20'))
+    # "sync": API calls return after the commit; "async": return once queued
+    DURABILITY = os.getenv('SR_WRITE_DURABILITY', 'sync').lower()
+    # Bulk ingestion overlaps each batch's commit with the next batch's analysis
+    BULK_DURABILITY = os.getenv('SR_BULK_WRITE_DURABILITY', 'async').lower()
@@ -0,0 +1,12 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class PreClassifierConfig:
+    # Answer classification locally when a trained model is confident enough
+    ENABLED = os.getenv('PRECLASSIFIER_ENABLED', 'true').lower() == 'true'
+    # Written by `python -m scripts.train_preclassifier`; reloaded when it changes
+    MODEL_PATH = os.getenv('PRECLASSIFIER_MODEL_PATH', './data/preclassifier.npz')
+    # Minimum confidence for skipping the classification model call
+    CONFIDENCE_THRESHOLD = float(os.getenv('PRECLASSIFIER_CONFIDENCE_THRESHOLD', '0.9'))
@@ -0,0 +1,12 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+class WarmupConfig:
+    # Warm-up attempts per process; after that the worker stays unready until restarted
+    MAX_ATTEMPTS = int(os.getenv('WARMUP_MAX_ATTEMPTS', '5'))
+    # Wait before retrying a failed warm-up; doubles after each failure
+    RETRY_SECONDS = float(os.getenv('WARMUP_RETRY_SECONDS', '5'))
+    # Longest wait between retries
+    MAX_RETRY_SECONDS = float(os.getenv('WARMUP_MAX_RETRY_SECONDS', '300'))
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings. Run from code/:
+
+    gunicorn -c gunicorn.conf.py
+
+With GUNICORN_PRELOAD=true the master imports the app and loads the
+embedding model once before forking, so workers share the weights
+copy-on-write and become ready in well under a second. Each worker then
+finishes warming up (services, first encode) in the background while
+/healthz already answers.
+"""
+import gc
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+wsgi_app = "app:app"
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def on_starting(server):
+    if not preload_app:
+        return
+    from services.duplicate_detector import load_embedding_model
+
+    # Load only; running the model here would start torch's thread pool,
+    # which does not survive fork
+    load_embedding_model()
+    # Keep the preloaded objects out of the workers' garbage collections,
+    # which would otherwise touch (and copy) every shared page
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from config.database import engine
+    from services.warmup import start_warmup
+
+    # Connections opened by the master must not be shared with workers
+    engine.dispose(close=False)
+    start_warmup()
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, String, Float, JSON, DateTime
+from sqlalchemy import Column, String, Float, Integer, JSON, DateTime, Index
 from sqlalchemy.sql import func
 from config.database import Base
 import uuid
 
 class ServiceRequestDB(Base):
     __tablename__ = "service_requests"
+    __table_args__ = (
+        # Team queues are read oldest-first and paged by (created_at, id)
+        Index("ix_service_requests_team_created", "team_assigned", "created_at", "id"),
+        Index("ix_service_requests_team_status_created", "team_assigned", "status", "created_at", "id"),
+        Index("ix_service_requests_deal_id", "deal_id"),
+        Index("ix_service_requests_created", "created_at", "id"),
+        # A message ingested twice (e.g. a bulk job resumed after a crash) is stored once
+        Index("ux_service_requests_source_digest", "source_digest", unique=True),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     request_type = Column(String, nullable=False)
@@ -14,6 +23,12 @@ class ServiceRequestDB(Base):
     confidence_score = Column(Float, nullable=False)
     team_assigned = Column(String, nullable=True)
     status = Column(String, nullable=False, default="NEW")
+    # Row of the email's embedding in the persistent duplicate corpus, used to train the pre-classifier
+    embedding_row = Column(Integer, nullable=True)
+    # SHA-256 of the raw message for bulk-ingested requests
+    source_digest = Column(String(64), nullable=True)
+    # Where the request type came from: "model" or "preclassifier"
+    classified_by = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -31,6 +46,28 @@ class ServiceRequestDB(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
+    # Stored for internal use only; never part of API responses or exports
+    INTERNAL_COLUMNS = ("embedding_row", "source_digest", "classified_by")
+
+    @classmethod
+    def columns(cls):
+        """Columns selected by projected queries: to_dict's, in order, then the internal ones"""
+        return [
+            cls.id, cls.request_type, cls.sub_request_type, cls.deal_id, cls.extracted_fields,
+            cls.confidence_score, cls.team_assigned, cls.status, cls.created_at, cls.updated_at,
+            cls.embedding_row, cls.source_digest, cls.classified_by
+        ]
+
+    @staticmethod
+    def row_to_dict(row):
+        """to_dict for a row selected with columns(), without loading an ORM object"""
+        data = dict(row._mapping)
+        for key in ServiceRequestDB.INTERNAL_COLUMNS:
+            data.pop(key, None)
+        for key in ("created_at", "updated_at"):
+            data[key] = data[key].isoformat() if data[key] else None
+        return data
+
     @classmethod
     def from_dict(cls, data):
         return cls(
@@ -40,5 +77,8 @@ class ServiceRequestDB(Base):
             extracted_fields=data["extracted_fields"],
             confidence_score=data["confidence_score"],
             team_assigned=data.get("team_assigned"),
-            status=data.get("status", "NEW")
+            status=data.get("status", "NEW"),
+            embedding_row=data.get("embedding_row"),
+            source_digest=data.get("source_digest"),
+            classified_by=data.get("classified_by")
         ) 
\ No newline at end of file
@@ -3,6 +3,17 @@ from typing import Optional, Dict, Any
 import uuid
 
 class ServiceRequest:
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = (
+        "id", "request_type", "sub_request_type", "deal_id", "extracted_fields",
+        "confidence_score", "team_assigned", "status", "created_at", "updated_at", "embedding_row",
+        "source_digest", "classified_by"
+    )
+
+    # Columns written on insert; created_at/updated_at come from the database.
+    # embedding_row, source_digest and classified_by are internal: stored but left out of to_dict
+    INSERT_FIELDS = __slots__[:8] + ("embedding_row", "source_digest", "classified_by")
+
     def __init__(
         self,
         request_type: str,
@@ -13,9 +24,13 @@ class ServiceRequest:
         team_assigned: Optional[str] = None,
         status: str = "NEW",
         created_at: datetime = None,
-        updated_at: datetime = None
+        updated_at: datetime = None,
+        id: Optional[str] = None,
+        embedding_row: Optional[int] = None,
+        source_digest: Optional[str] = None,
+        classified_by: Optional[str] = None
     ):
-        self.id = str(uuid.uuid4())
+        self.id = id or str(uuid.uuid4())
         self.request_type = request_type
         self.sub_request_type = sub_request_type
         self.deal_id = deal_id
@@ -25,6 +40,9 @@ class ServiceRequest:
         self.status = status
         self.created_at = created_at or datetime.utcnow()
         self.updated_at = updated_at or datetime.utcnow()
+        self.embedding_row = embedding_row
+        self.source_digest = source_digest
+        self.classified_by = classified_by
 
     def assign_team(self, team: str) -> None:
         """Assign a team to handle the service request"""
@@ -51,19 +69,34 @@ class ServiceRequest:
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for inserting this request"""
+        return {field: getattr(self, field) for field in self.INSERT_FIELDS}
+
+    @classmethod
+    def from_row(cls, row) -> 'ServiceRequest':
+        """
+        Build from a ServiceRequestDB instance or a row selected with
+        ServiceRequestDB.columns(), keeping its id and datetimes as-is
+        """
+        service_request = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(service_request, field, getattr(row, field))
+        return service_request
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ServiceRequest':
         """Create a ServiceRequest instance from a dictionary"""
         # Handle datetime conversion safely
         created_at = None
         updated_at = None
-        
+
         if "created_at" in data and data["created_at"]:
             try:
                 created_at = datetime.fromisoformat(data["created_at"])
             except (ValueError, TypeError):
                 created_at = None
-                
+
         if "updated_at" in data and data["updated_at"]:
             try:
                 updated_at = datetime.fromisoformat(data["updated_at"])
@@ -79,5 +112,9 @@ class ServiceRequest:
             team_assigned=data.get("team_assigned"),
             status=data.get("status", "NEW"),
             created_at=created_at,
-            updated_at=updated_at
-        ) 
\ No newline at end of file
+            updated_at=updated_at,
+            id=data.get("id"),
+            embedding_row=data.get("embedding_row"),
+            source_digest=data.get("source_digest"),
+            classified_by=data.get("classified_by")
+        )
@@ -0,0 +1,42 @@
+import argparse
+import sys
+from datetime import datetime
+from services.request_export import EXPORT_FORMATS, iter_export
+from services.service_request_manager import ServiceRequestManager
+
+def export_service_requests(output, export_format, teams, statuses, request_types, created_after, created_before):
+    """Stream matching service requests to a file object"""
+    manager = ServiceRequestManager()
+    rows = manager.iter_service_requests(
+        teams=teams,
+        statuses=statuses,
+        request_types=request_types,
+        created_after=created_after,
+        created_before=created_before
+    )
+    for chunk in iter_export(rows, export_format):
+        output.write(chunk)
+
+def _list(value):
+    return [item for item in value.split(',') if item]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export service requests as NDJSON or CSV")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--team", type=_list, default=[], help="Comma separated team names")
+    parser.add_argument("--status", type=_list, default=[], help="Comma separated statuses")
+    parser.add_argument("--request-type", type=_list, default=[], help="Comma separated request types")
+    parser.add_argument("--created-after", type=datetime.fromisoformat, help="ISO 8601, inclusive")
+    parser.add_argument("--created-before", type=datetime.fromisoformat, help="ISO 8601, exclusive")
+    parser.add_argument("--output", "-o", help="Output file (defaults to stdout)")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        export_service_requests(
+            output, args.format, args.team, args.status, args.request_type,
+            args.created_after, args.created_before
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+from config.ingestion_config import IngestionConfig
+from services.bulk_ingestion import BulkIngestionJob, iter_source
+from services.email_classifier import EmailClassifierService
+
+def ingest_mailbox(path, checkpoint_path, concurrency, batch_size):
+    """Process every message in a directory, .zip, .mbox or .eml file"""
+    classifier = EmailClassifierService()
+
+    def report(summary):
+        print(
+            f"processed={summary['processed']} created={summary['created']} "
+            f"duplicates={summary['duplicates']} failed={summary['failed']} "
+            f"skipped={summary['skipped']} rate={summary['messages_per_second']}/s",
+            flush=True
+        )
+
+    job = BulkIngestionJob(
+        classifier,
+        checkpoint_path=checkpoint_path,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        progress=report
+    )
+    return job.run(iter_source(path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-ingest a mailbox through the classification pipeline")
+    parser.add_argument("path", help="Directory of .eml files, .zip archive, .mbox file or single .eml")
+    parser.add_argument("--checkpoint", help="Journal file used to resume an interrupted run "
+                                             "(defaults to one per source under BULK_CHECKPOINT_DIR)")
+    parser.add_argument("--concurrency", type=int, default=IngestionConfig.CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=IngestionConfig.BATCH_SIZE)
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or os.path.join(
+        IngestionConfig.CHECKPOINT_DIR,
+        os.path.basename(os.path.normpath(args.path)) + '.jsonl'
+    )
+    summary = ingest_mailbox(args.path, checkpoint, args.concurrency, args.batch_size)
+    print(json.dumps(summary, indent=2))
@@ -1,17 +1,33 @@
-from config.database import engine, DB_SCHEMA
+from config.database import engine, DB_SCHEMA, IS_SQLITE
 from models.db_models import Base
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 
 def init_db():
     """Initialize the database by creating schema and tables"""
     try:
         # Create schema if it doesn't exist
-        with engine.connect() as connection:
-            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS {DB_SCHEMA}'))
-            connection.commit()
+        if not IS_SQLITE:
+            with engine.connect() as connection:
+                connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS {DB_SCHEMA}'))
+                connection.commit()
         
         # Create all tables in the schema
         Base.metadata.create_all(bind=engine)
+
+        # create_all skips tables that already exist, so add any missing
+        # (nullable) columns and indexes to them
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name, schema=table.schema)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    with engine.begin() as connection:
+                        connection.execute(text(
+                            f'ALTER TABLE {table.fullname} ADD COLUMN {column.name} {column_type}'
+                        ))
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
         print(f"Database schema '{DB_SCHEMA}' and tables created successfully!")
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
@@ -0,0 +1,137 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from config.duplicate_config import DuplicateDetectorConfig
+from config.preclassifier_config import PreClassifierConfig
+from services.embedding_corpus import PersistentEmbeddingStore
+from services.pre_classifier import NearestCentroidClassifier
+from services.service_request_manager import ServiceRequestManager
+
+# Confidence thresholds reported in the coverage/accuracy sweep
+THRESHOLDS = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+def load_training_set(corpus_path, min_label_confidence):
+    """Stored request labels joined to their embeddings in the duplicate corpus"""
+    store = PersistentEmbeddingStore(corpus_path)
+    manager = ServiceRequestManager()
+    rows, labels = [], []
+    for row, request_type, sub_request_type in manager.iter_labeled_embeddings(min_label_confidence):
+        # Skip rows of a different corpus file and request types outside the criteria
+        if row < len(store) and request_type in manager.team_mapping:
+            rows.append(row)
+            labels.append((request_type, sub_request_type))
+    return np.asarray(store.vectors[rows], dtype=np.float32), labels
+
+def _percentile_us(timings, q):
+    return round(float(np.percentile(timings, q)) * 1e6, 1)
+
+def evaluate(model, vectors, labels, threshold):
+    """Accuracy, coverage and prediction latency of a model on held-out examples"""
+    timings = []
+    for vector in vectors:
+        start = time.perf_counter()
+        model.predict(vector)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    best, confidences, _ = model.predict_many(vectors)
+    batch_seconds = time.perf_counter() - start
+
+    predicted = [model.labels[i] for i in best]
+    correct = np.array([p == label for p, label in zip(predicted, labels)])
+    type_correct = np.array([p[0] == label[0] for p, label in zip(predicted, labels)])
+
+    everything = np.ones(len(labels), dtype=bool)
+
+    def scores(subset, threshold):
+        """Share of `subset` answered at `threshold` and the accuracy of those answers"""
+        answered = subset & (confidences >= threshold)
+        covered = int(answered.sum())
+        return {
+            "coverage": round(covered / int(subset.sum()), 4),
+            "accuracy": round(float(correct[answered].mean()), 4) if covered else None,
+            "request_type_accuracy": round(float(type_correct[answered].mean()), 4) if covered else None
+        }
+
+    by_request_type = {}
+    for request_type in sorted({label[0] for label in labels}):
+        subset = np.array([label[0] == request_type for label in labels])
+        by_request_type[request_type] = {"examples": int(subset.sum()), **scores(subset, threshold)}
+
+    return {
+        "examples": len(labels),
+        "top1_accuracy": round(float(correct.mean()), 4),
+        "top1_request_type_accuracy": round(float(type_correct.mean()), 4),
+        "at_threshold": {"threshold": threshold, **scores(everything, threshold)},
+        "sweep": [{"threshold": t, **scores(everything, t)} for t in THRESHOLDS],
+        "by_request_type": by_request_type,
+        "latency_us": {
+            "p50": _percentile_us(timings, 50),
+            "p99": _percentile_us(timings, 99),
+            "batched_per_email": round(batch_seconds / len(labels) * 1e6, 2)
+        }
+    }
+
+def train_preclassifier(corpus_path, output, min_label_confidence, min_examples, temperature,
+                        threshold, holdout, seed, dry_run):
+    """Evaluate on a held-out split, then fit on every example and save"""
+    vectors, labels = load_training_set(corpus_path, min_label_confidence)
+    if not labels:
+        raise ValueError("No labeled service requests with stored embeddings; "
+                         "is DUPLICATE_CORPUS_PATH set for the service?")
+
+    report = {"examples": len(labels), "min_label_confidence": min_label_confidence, "temperature": temperature}
+    order = np.random.default_rng(seed).permutation(len(labels))
+    n_holdout = int(len(labels) * holdout)
+    if n_holdout:
+        test, train = order[:n_holdout], order[n_holdout:]
+        start = time.perf_counter()
+        model = NearestCentroidClassifier.fit(
+            vectors[train], [labels[i] for i in train], temperature=temperature, min_examples=min_examples
+        )
+        report["holdout_fit_seconds"] = round(time.perf_counter() - start, 3)
+        report["holdout"] = evaluate(model, vectors[test], [labels[i] for i in test], threshold)
+
+    model = NearestCentroidClassifier.fit(vectors, labels, temperature=temperature, min_examples=min_examples)
+    report["labels"] = [
+        {"request_type": label[0], "sub_request_type": label[1], "examples": n}
+        for label, n in zip(model.labels, model.counts)
+    ]
+    if not dry_run:
+        model.save(output)
+        report["saved_to"] = output
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train the nearest-centroid pre-classifier from stored service requests and report its accuracy"
+    )
+    parser.add_argument("--corpus", default=DuplicateDetectorConfig.CORPUS_PATH,
+                        help="Persistent embedding corpus (defaults to DUPLICATE_CORPUS_PATH)")
+    parser.add_argument("--output", default=PreClassifierConfig.MODEL_PATH,
+                        help="Model file (defaults to PRECLASSIFIER_MODEL_PATH)")
+    parser.add_argument("--min-label-confidence", type=float, default=0.8,
+                        help="Ignore stored requests classified with lower confidence")
+    parser.add_argument("--min-examples", type=int, default=20,
+                        help="Labels with fewer examples are left to the model")
+    parser.add_argument("--temperature", type=float, default=0.05,
+                        help="Softmax temperature turning centroid similarities into confidences")
+    parser.add_argument("--threshold", type=float, default=PreClassifierConfig.CONFIDENCE_THRESHOLD,
+                        help="Confidence threshold evaluated in the report")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for the report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Also write the JSON report to this file")
+    parser.add_argument("--dry-run", action="store_true", help="Report only; do not replace the model file")
+    args = parser.parse_args()
+
+    if not args.corpus:
+        sys.exit("No embedding corpus: set DUPLICATE_CORPUS_PATH or pass --corpus")
+    report = train_preclassifier(
+        args.corpus, args.output, args.min_label_confidence, args.min_examples, args.temperature,
+        args.threshold, args.holdout, args.seed, args.dry_run
+    )
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
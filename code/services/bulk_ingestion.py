@@ -0,0 +1,389 @@
+import hashlib
+import json
+import mailbox
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config.ingestion_config import IngestionConfig
+from config.persistence_config import PersistenceConfig
+from services.duplicate_detector import EmailEmbedding
+from services.metrics import trace_request
+
+Message = Tuple[str, bytes]
+
+
+def iter_directory(path: str) -> Iterator[Message]:
+    """Yield (name, raw bytes) for every .eml file under a directory, in a stable order"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.eml'):
+                file_path = os.path.join(root, name)
+                with open(file_path, 'rb') as f:
+                    yield os.path.relpath(file_path, path), f.read()
+
+
+def iter_zip(file) -> Iterator[Message]:
+    """Yield the .eml members of a zip archive (path or seekable file object)"""
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith('.eml'):
+                yield info.filename, archive.read(info)
+
+
+def iter_mbox(path: str) -> Iterator[Message]:
+    """Yield the messages of an mbox file without re-serializing them"""
+    box = mailbox.mbox(path, create=False)
+    try:
+        for key in box.iterkeys():
+            yield f"{os.path.basename(path)}#{key}", box.get_bytes(key)
+    finally:
+        box.close()
+
+
+def iter_source(path: str) -> Iterator[Message]:
+    """Pick the reader for a directory, .zip, .mbox or single .eml path"""
+    if os.path.isdir(path):
+        return iter_directory(path)
+    lower = path.lower()
+    if lower.endswith('.zip'):
+        return iter_zip(path)
+    if lower.endswith('.eml'):
+        with open(path, 'rb') as f:
+            return iter([(os.path.basename(path), f.read())])
+    return iter_mbox(path)
+
+
+class IngestionCheckpoint:
+    """
+    Append-only JSON-lines journal of per-message progress, keyed by a digest
+    of the raw message so a rerun over the same mailbox skips finished work.
+    A message is journalled as "checked" once duplicate detection has stored
+    it, and as "done" once its service request is committed (or it was a
+    duplicate). Resuming a checked message reuses its recorded verdict rather
+    than matching it against its own stored embedding.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._states: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line from a crash
+                        continue
+                    self._states[entry['digest']] = entry
+
+    def state(self, digest: str) -> Optional[Dict[str, Any]]:
+        return self._states.get(digest)
+
+    def record(self, entries: List[Dict[str, Any]]) -> None:
+        for entry in entries:
+            self._states[entry['digest']] = entry
+        if not self.path or not entries:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BulkIngestionJob:
+    """
+    Streams messages through the classification pipeline in batches:
+    parse, batched duplicate detection (one embedding call per batch of hash
+    misses), LLM analysis with bounded concurrency, then one DB transaction
+    per flush. Progress is journalled so an interrupted job can resume.
+    With "async" durability a batch's inserts are committed while the next
+    batch is analysed; messages are journalled as done only after their
+    commit succeeds. Each insert carries the message digest, which is unique
+    in the table, so a message committed just before a crash is not stored
+    again when the job resumes.
+    """
+
+    MAX_ERRORS = 100
+
+    def __init__(
+        self,
+        classifier,
+        checkpoint_path: Optional[str] = None,
+        concurrency: int = 4,
+        batch_size: int = 32,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        durability: Optional[str] = None
+    ):
+        self.classifier = classifier
+        self.checkpoint = IngestionCheckpoint(checkpoint_path)
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.progress = progress
+        self.durability = durability or PersistenceConfig.BULK_DURABILITY
+        self.summary = {
+            "processed": 0,
+            "created": 0,
+            "duplicates": 0,
+            "failed": 0,
+            "skipped": 0,
+            "elapsed_seconds": 0.0,
+            "messages_per_second": 0.0,
+            "errors": []
+        }
+        self._started = None
+        # Inserts submitted but not yet confirmed: (name, digest, future)
+        self._pending_writes = []
+
+    def run(self, messages: Iterable[Message]) -> Dict[str, Any]:
+        self._started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk-ingest") as executor:
+            batch = []
+            for message in messages:
+                batch.append(message)
+                if len(batch) >= self.batch_size:
+                    self._process_batch(batch, executor)
+                    batch = []
+            if batch:
+                self._process_batch(batch, executor)
+        self._settle_writes()
+        self._update_timing()
+        return self.summary
+
+    def _fail(self, name: str, error: Exception) -> None:
+        self.summary["failed"] += 1
+        if len(self.summary["errors"]) < self.MAX_ERRORS:
+            self.summary["errors"].append({"message": name, "error": str(error)})
+
+    def _update_timing(self) -> None:
+        elapsed = time.monotonic() - self._started
+        self.summary["elapsed_seconds"] = round(elapsed, 3)
+        handled = self.summary["processed"] + self.summary["skipped"]
+        self.summary["messages_per_second"] = round(handled / elapsed, 2) if elapsed > 0 else 0.0
+
+    def _settle_writes(self) -> None:
+        """Wait for outstanding inserts and journal the ones that committed"""
+        done = []
+        for name, digest, future in self._pending_writes:
+            try:
+                service_request = future.result()
+            except Exception as e:
+                self._fail(name, e)
+                continue
+            if service_request is None:
+                # Committed by an earlier run that stopped before journalling it
+                self.summary["duplicates"] += 1
+                done.append({"digest": digest, "state": "done", "outcome": "duplicate"})
+            else:
+                self.summary["created"] += 1
+                done.append({"digest": digest, "state": "done", "outcome": "created"})
+        self._pending_writes = []
+        self.checkpoint.record(done)
+
+    def _process_batch(self, batch: List[Message], executor: ThreadPoolExecutor) -> None:
+        detector = self.classifier.duplicate_detector
+
+        # Parse, skipping messages finished by an earlier run
+        items = []
+        for name, raw in batch:
+            digest = hashlib.sha256(raw).hexdigest()
+            state = self.checkpoint.state(digest)
+            if state and state['state'] == 'done':
+                self.summary["skipped"] += 1
+                continue
+            try:
+                email_content = self.classifier.parse_email_bytes(raw)
+            except Exception as e:
+                self._fail(name, e)
+                continue
+
+            embedding = EmailEmbedding(email_content)
+            if state and state['state'] == 'checked':
+                embedding.is_duplicate = state['is_duplicate']
+                embedding.confidence_score = state['confidence_score']
+            items.append((name, digest, embedding))
+
+        # Duplicate detection with one batched embedding call
+        unchecked = [embedding for _, _, embedding in items if not embedding.checked]
+        detector.check_duplicates(unchecked)
+        self.checkpoint.record([
+            {
+                "digest": digest,
+                "state": "checked",
+                "is_duplicate": embedding.is_duplicate,
+                "confidence_score": embedding.confidence_score
+            }
+            for _, digest, embedding in items if embedding in unchecked
+        ])
+
+        done = []
+        originals = []
+        for name, digest, embedding in items:
+            self.summary["processed"] += 1
+            if embedding.is_duplicate:
+                self.summary["duplicates"] += 1
+                done.append({"digest": digest, "state": "done", "outcome": "duplicate"})
+            else:
+                originals.append((name, digest, embedding))
+
+        # LLM analysis, at most `concurrency` calls in flight
+        futures = [
+            (name, digest, embedding, executor.submit(self.classifier.analyze_email, embedding.email_content, embedding))
+            for name, digest, embedding in originals
+        ]
+        analysed = []
+        for name, digest, embedding, future in futures:
+            try:
+                classification_result, deal_details = future.result()
+            except Exception as e:
+                self._fail(name, e)
+                continue
+            fields = self.classifier.service_request_fields(embedding.email_content, classification_result, deal_details)
+            fields['embedding_row'] = embedding.row
+            fields['source_digest'] = digest
+            analysed.append((name, digest, fields))
+
+        # The previous batch's inserts have had this batch's analysis time to commit
+        self._settle_writes()
+
+        # Queue the batch's inserts; the write-behind queue groups them into bulk statements
+        if analysed:
+            requests = [dict(fields) for _, _, fields in analysed]
+            for fields in requests:
+                fields.pop('email_content', None)
+            try:
+                futures = self.classifier.service_request_manager.submit_service_requests(requests)
+            except Exception as e:
+                for name, _, _ in analysed:
+                    self._fail(name, e)
+            else:
+                self._pending_writes = [
+                    (name, digest, future) for (name, digest, _), future in zip(analysed, futures)
+                ]
+                if self.durability == 'sync':
+                    self._settle_writes()
+
+        self.checkpoint.record(done)
+        self._update_timing()
+        if self.progress:
+            self.progress(dict(self.summary))
+
+
+class BulkJobRunner:
+    """
+    Runs uploaded bulk ingestion jobs on background threads, at most
+    `max_jobs` at a time; later jobs wait as "queued".
+
+    Uploads are spooled to disk before the request returns. Each job's
+    status and running summary are kept in a JSON file next to its
+    checkpoint journal, so any worker process can answer a status request.
+    """
+
+    def __init__(
+        self,
+        classifier_factory: Callable[[], Any],
+        checkpoint_dir: str,
+        concurrency: int = 4,
+        batch_size: int = 32,
+        max_jobs: int = 1
+    ):
+        self.classifier_factory = classifier_factory
+        self.checkpoint_dir = checkpoint_dir
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_jobs = max(1, max_jobs)
+        self._active = set()
+        self._lock = threading.Lock()
+        # Created on first use so no threads exist before a server forks
+        self._executor = None
+
+    def upload_dir(self, job_id: str) -> str:
+        """Directory a job's uploaded files are spooled to before it starts"""
+        return os.path.join(self.checkpoint_dir, f'{job_id}.uploads')
+
+    def is_active(self, job_id: str) -> bool:
+        """Whether this process is running or has queued the job"""
+        with self._lock:
+            return job_id in self._active
+
+    def submit(self, job_id: str, paths: List[str]) -> Dict[str, Any]:
+        """Queue a job over spooled files; raises RuntimeError if it is already active here"""
+        with self._lock:
+            if job_id in self._active:
+                raise RuntimeError(f'Bulk job {job_id} is already running')
+            self._active.add(job_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="bulk-job")
+        status = {"job_id": job_id, "status": "queued", "submitted_at": time.time()}
+        self._save_status(status)
+        self._executor.submit(self._run, job_id, paths, dict(status))
+        return status
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._status_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.checkpoint_dir, f'{job_id}.status.json')
+
+    def _save_status(self, status: Dict[str, Any]) -> None:
+        # Written with a rename so readers never see a partial file
+        path = self._status_path(status["job_id"])
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f)
+        os.replace(tmp_path, path)
+
+    def _run(self, job_id: str, paths: List[str], status: Dict[str, Any]) -> None:
+        status.update(status="running", started_at=time.time())
+        self._save_status(status)
+        try:
+            job = BulkIngestionJob(
+                self.classifier_factory(),
+                checkpoint_path=os.path.join(self.checkpoint_dir, f'{job_id}.jsonl'),
+                concurrency=self.concurrency,
+                batch_size=self.batch_size,
+                progress=lambda summary: self._save_status({**status, **summary})
+            )
+            with trace_request('process_emails_bulk'):
+                summary = job.run(chain.from_iterable(iter_source(path) for path in paths))
+            status.update(summary, status="done")
+        except Exception as e:
+            print(f"Bulk job {job_id} failed: {str(e)}")
+            status.update(status="failed", error=str(e))
+        finally:
+            status["finished_at"] = time.time()
+            self._save_status(status)
+            shutil.rmtree(self.upload_dir(job_id), ignore_errors=True)
+            with self._lock:
+                self._active.discard(job_id)
+
+
+_shared_runner: Optional[BulkJobRunner] = None
+_shared_runner_lock = threading.Lock()
+
+def get_bulk_job_runner() -> BulkJobRunner:
+    """Process-wide runner for bulk ingestion jobs submitted over HTTP"""
+    global _shared_runner
+    if _shared_runner is None:
+        with _shared_runner_lock:
+            if _shared_runner is None:
+                from services.email_classifier import get_email_classifier
+                _shared_runner = BulkJobRunner(
+                    get_email_classifier,
+                    IngestionConfig.CHECKPOINT_DIR,
+                    concurrency=IngestionConfig.CONCURRENCY,
+                    batch_size=IngestionConfig.BATCH_SIZE,
+                    max_jobs=IngestionConfig.MAX_JOBS
+                )
+    return _shared_runner
@@ -0,0 +1,135 @@
+import hashlib
+import math
+import re
+import zlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+SUBJECT_PREFIX = re.compile(r'^\s*((re|fw|fwd|aw|tr)\s*(\[\d+\])?\s*:\s*)+', re.IGNORECASE)
+FORWARD_MARKER = re.compile(r'^\s*-{2,}\s*(original|forwarded)\s+message\s*-{2,}\s*$', re.IGNORECASE)
+FORWARD_HEADER = re.compile(r'^\s*(from|sent|to|cc|date|subject)\s*:', re.IGNORECASE)
+QUOTE_PREFIX = re.compile(r'^\s*(>\s*)+')
+WHITESPACE = re.compile(r'\s+')
+WORD = re.compile(r'\w+')
+SHINGLE_MULTIPLIER = np.uint64(0x100000001b3)
+
+
+def canonicalize(email_content: str) -> str:
+    """
+    Reduce an extracted email ("Subject: ...\\n\\nBody: ...") to a canonical form
+    that is identical for resends and forwards differing only in whitespace,
+    case, reply/forward prefixes, quoting or forwarded header blocks
+    """
+    subject, _, body = email_content.partition('\n\nBody: ')
+    if subject.startswith('Subject: '):
+        subject = subject[len('Subject: '):]
+    subject = SUBJECT_PREFIX.sub('', subject)
+
+    lines = []
+    for line in body.splitlines():
+        line = QUOTE_PREFIX.sub('', line)
+        if FORWARD_MARKER.match(line) or FORWARD_HEADER.match(line):
+            continue
+        lines.append(line)
+
+    canonical = f"{subject}\n{' '.join(lines)}"
+    return WHITESPACE.sub(' ', canonical).strip().lower()
+
+
+def content_hash(canonical: str) -> str:
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def simhash(canonical: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits"""
+    words = WORD.findall(canonical)
+    if not words:
+        return 0
+    size = min(shingle_size, len(words))
+
+    # Hash words once in C, combine them into shingle hashes with vectorized
+    # uint64 arithmetic and scramble with the splitmix64 finalizer
+    word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words),
+                              dtype=np.uint64, count=len(words))
+    count = len(words) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * SHINGLE_MULTIPLIER + word_hashes[offset:offset + count]
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= np.uint64(0xbf58476d1ce4e5b9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94d049bb133111eb)
+    hashes ^= hashes >> np.uint64(31)
+
+    bits = np.unpackbits(hashes.astype('>u8').view(np.uint8).reshape(count, 8), axis=1)
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - count
+    return int(np.packbits(weights > 0).view('>u8')[0])
+
+
+def simhash_similarity(distance: int, bits: int = 64) -> float:
+    """
+    SimHash distance as a similarity on the embedding detector's scale
+    A bit differs with probability angle/pi, so distance/bits estimates the
+    angle between the shingle vectors; its cosine is mapped from [-1, 1] to
+    [0, 1] like the embedding cosine
+    """
+    return round((math.cos(math.pi * distance / bits) + 1) / 2, 4)
+
+
+class ContentHashIndex:
+    """
+    Hash index of canonicalized emails answering exact and near-exact lookups
+    without the embedding model.
+    Near-exact lookups split the 64-bit SimHash into bands; with
+    `max_distance < bands` any match within that Hamming distance shares at
+    least one band, so only those buckets are compared.
+    """
+
+    BANDS = 4
+    BAND_BITS = 16
+
+    def __init__(self, use_simhash: bool = True, max_distance: int = 3):
+        self.use_simhash = use_simhash
+        self.max_distance = min(max_distance, self.BANDS - 1)
+        self._exact: Dict[str, int] = {}
+        self._bands: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(self.BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def fingerprint(self, email_content: str) -> Tuple[str, Optional[int]]:
+        canonical = canonicalize(email_content)
+        return content_hash(canonical), simhash(canonical) if self.use_simhash else None
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.BAND_BITS) - 1
+        for band in range(self.BANDS):
+            yield band, (fingerprint >> (band * self.BAND_BITS)) & mask
+
+    def add(self, digest: str, fingerprint: Optional[int], row: int) -> None:
+        self._exact.setdefault(digest, row)
+        if fingerprint is not None:
+            for band, key in self._band_keys(fingerprint):
+                self._bands[band].setdefault(key, []).append((fingerprint, row))
+
+    def lookup(self, digest: str, fingerprint: Optional[int]) -> Tuple[Optional[int], float]:
+        """
+        Return (matching row, similarity) where similarity is 1.0 for an exact
+        match and simhash_similarity(distance) for a near-exact one, or
+        (None, 0.0) on a miss
+        """
+        row = self._exact.get(digest)
+        if row is not None:
+            return row, 1.0
+        if fingerprint is None:
+            return None, 0.0
+
+        best_row, best_distance = None, self.max_distance + 1
+        for band, key in self._band_keys(fingerprint):
+            for candidate, candidate_row in self._bands[band].get(key, ()):
+                distance = bin(candidate ^ fingerprint).count('1')
+                if distance < best_distance:
+                    best_row, best_distance = candidate_row, distance
+        if best_row is None:
+            return None, 0.0
+        return best_row, simhash_similarity(best_distance)
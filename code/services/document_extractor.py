@@ -0,0 +1,297 @@
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import re
+import signal
+import threading
+import zipfile
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from xml.etree import ElementTree
+from services.email_parser import ParsedEmail, decode_text
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Attachments sent as application/octet-stream are recognised by extension
+EXTENSION_KINDS = {".pdf": "pdf", ".docx": "docx", ".htm": "html", ".html": "html", ".txt": "text", ".csv": "text"}
+CONTENT_TYPE_KINDS = {
+    "text/html": "html",
+    "application/pdf": "pdf",
+    DOCX_TYPE: "docx",
+    "text/plain": "text",
+    "text/csv": "text",
+}
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# pypdf is optional; without it PDF attachments are skipped
+PDF_SUPPORT = importlib.util.find_spec("pypdf") is not None
+
+
+def document_kind(content_type: str, filename: Optional[str] = None) -> Optional[str]:
+    """Extractor kind for a MIME part, or None if its text cannot be extracted"""
+    kind = CONTENT_TYPE_KINDS.get(content_type)
+    if kind is None and filename:
+        dot = filename.rfind('.')
+        if dot >= 0:
+            kind = EXTENSION_KINDS.get(filename[dot:].lower())
+    return kind
+
+
+class _HTMLText(HTMLParser):
+    BLOCK_TAGS = {
+        "address", "article", "blockquote", "br", "div", "dl", "dt", "dd", "footer", "h1", "h2", "h3",
+        "h4", "h5", "h6", "header", "hr", "li", "ol", "p", "pre", "section", "table", "tr", "ul"
+    }
+    SKIP_TAGS = {"head", "script", "style", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in ("td", "th"):
+            self.parts.append("\t")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _tidy(text: str) -> str:
+    lines = (re.sub(r'[ \t\r\f\v\xa0]+', ' ', line).strip() for line in text.split('\n'))
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def html_to_text(html: str) -> str:
+    parser = _HTMLText()
+    parser.feed(html)
+    parser.close()
+    return _tidy(''.join(parser.parts))
+
+
+def docx_to_text(data: bytes, max_chars: int) -> str:
+    """Paragraph text of word/document.xml, streamed so large documents stop early"""
+    parts, size = [], 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with archive.open("word/document.xml") as document:
+            for _, element in ElementTree.iterparse(document, events=("end",)):
+                if element.tag == WORD_NS + "t" and element.text:
+                    parts.append(element.text)
+                    size += len(element.text)
+                elif element.tag == WORD_NS + "tab":
+                    parts.append("\t")
+                elif element.tag == WORD_NS + "p":
+                    parts.append("\n")
+                    element.clear()
+                if size >= max_chars:
+                    break
+    return _tidy(''.join(parts))
+
+
+def pdf_to_text(data: bytes, max_chars: int) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ValueError("PDF text extraction needs the optional pypdf package: pip install pypdf")
+
+    parts, size = [], 0
+    for page in PdfReader(io.BytesIO(data)).pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text)
+        if size >= max_chars:
+            break
+    return _tidy('\n'.join(parts))
+
+
+class DocumentTimeout(Exception):
+    """A document took longer than its extraction budget"""
+
+
+def _on_alarm(signum, frame):
+    raise DocumentTimeout()
+
+
+def _extract_in_worker(kind: str, data: bytes, max_chars: int, timeout: float) -> str:
+    """Pool entry point; an interval timer interrupts documents that run too long"""
+    # No interval timers on Windows; the parent's pool restart still applies there
+    timer = hasattr(signal, "setitimer")
+    if timer:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if kind == "pdf":
+            return pdf_to_text(data, max_chars)
+        return docx_to_text(data, max_chars)
+    finally:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class DocumentExtractor:
+    """
+    Turns HTML bodies and PDF/DOCX/text attachments into plain text.
+
+    HTML and plain text are converted inline. PDF and DOCX parsing runs in a
+    small process pool so a slow or hostile document cannot hold a request
+    thread or the GIL. Each document has a size limit and a time budget,
+    enforced inside the worker and, as a backstop, by replacing the pool.
+    Results are cached by content hash, so the same attachment sent to many
+    recipients is parsed once.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 10.0,
+        max_document_bytes: int = 10 * 1024 * 1024,
+        max_text_chars: int = 20000,
+        cache_entries: int = 256
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_document_bytes = max_document_bytes
+        self.max_text_chars = max_text_chars
+        self.cache_entries = max(1, cache_entries)
+        self.stats = {
+            "documents": 0,
+            "cache_hits": 0,
+            "too_large": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "pool_restarts": 0
+        }
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        # Created on first use so no worker processes exist before a server forks
+        self._pool = None
+
+    def keep_document(self, content_type: str, filename: Optional[str] = None) -> bool:
+        """EmailParser hook: keep parts whose text we can extract"""
+        kind = document_kind(content_type, filename)
+        return kind is not None and (kind != "pdf" or PDF_SUPPORT)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs threads (and torch) is unsafe
+                self._pool = multiprocessing.get_context("spawn").Pool(self.max_workers)
+            return self._pool
+
+    def _restart_pool(self, pool) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self.stats["pool_restarts"] += 1
+        pool.terminate()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def extract(self, document: Dict[str, Any]) -> Optional[str]:
+        """Text of one document from ParsedEmail.documents, or None if it could not be extracted"""
+        kind = document_kind(document["content_type"], document.get("filename"))
+        data = document["data"]
+        if kind is None:
+            return None
+        if len(data) > self.max_document_bytes:
+            self._count("too_large")
+            return None
+
+        key = hashlib.sha256(kind.encode('ascii') + b':' + data).hexdigest()
+        with self._lock:
+            self.stats["documents"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self._cache[key]
+
+        try:
+            if kind == "html":
+                text = html_to_text(decode_text(data, document.get("charset")))
+            elif kind == "text":
+                text = _tidy(decode_text(data, document.get("charset")))
+            else:
+                text = self._extract_in_pool(kind, data)
+        except DocumentTimeout:
+            self._count("timeouts")
+            return None
+        except Exception as e:
+            print(f"Could not extract text from {document.get('filename') or kind}: {str(e)}")
+            self._count("failures")
+            return None
+
+        text = text[:self.max_text_chars]
+        with self._lock:
+            self._cache[key] = text
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return text
+
+    def _extract_in_pool(self, kind: str, data: bytes) -> str:
+        # Wait for a free worker rather than queueing behind a slow document
+        if not self._slots.acquire(timeout=self.timeout):
+            raise DocumentTimeout()
+        try:
+            pool = self._get_pool()
+            result = pool.apply_async(_extract_in_worker, (kind, data, self.max_text_chars, self.timeout))
+            try:
+                # Grace period for the worker's own timer to fire
+                return result.get(timeout=self.timeout + 2)
+            except multiprocessing.TimeoutError:
+                # The worker is stuck in C code; replace the whole pool
+                self._restart_pool(pool)
+                raise DocumentTimeout()
+        finally:
+            self._slots.release()
+
+    def email_content(self, parsed: ParsedEmail) -> str:
+        """
+        Subject/body text for the pipeline, with HTML used when there is no
+        plain-text body and attachment text appended after it
+        """
+        body = parsed.body
+        sections = []
+        for document in parsed.documents:
+            text = self.extract(document)
+            if not text:
+                continue
+            if not document["attachment"] and document["content_type"] == "text/html":
+                # HTML alternative of a plain-text body adds nothing
+                if not body.strip():
+                    body = text
+                continue
+            sections.append(f"Attachment {document.get('filename') or document['content_type']}:\n{text}")
+
+        if sections:
+            body = "\n\n".join(([body.rstrip()] if body.strip() else []) + sections)
+        return f"Subject: {parsed.subject}\n\nBody: {body}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cache_entries"] = len(self._cache)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
@@ -1,20 +1,177 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import os
+import threading
+from config.duplicate_config import DuplicateDetectorConfig
+from services.embedding_store import EmbeddingStore
+from services.embedding_corpus import PersistentEmbeddingStore
+from services.vector_index import create_index
+from services.content_hash import ContentHashIndex
+from services.embedding_batcher import EmbeddingBatcher
+from services.metrics import registry, stage
+
+class EmailEmbedding:
+    """
+    Per-request handle on an email's embedding.
+    The email is encoded once and the duplicate verdict is cached, so every
+    component handling the same request can share the handle.
+    """
+
+    def __init__(self, email_content: str, vector: Optional[np.ndarray] = None):
+        self.email_content = email_content
+        self.vector = vector
+        self.is_duplicate: Optional[bool] = None
+        self.confidence_score: Optional[float] = None
+        # Content-hash fingerprint, computed at most once
+        self.digest: Optional[str] = None
+        self.fingerprint: Optional[int] = None
+        # Row in the persistent corpus once stored there
+        self.row: Optional[int] = None
+
+    @property
+    def checked(self) -> bool:
+        return self.is_duplicate is not None
+
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+def load_embedding_model():
+    """
+    Process-wide SentenceTransformer, loaded on first use
+    Call it in a pre-forking server's master so workers share the weights
+    copy-on-write instead of each loading their own
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                # sentence_transformers pulls in torch; import it only when needed
+                from sentence_transformers import SentenceTransformer
+
+                # Create cache directory if it doesn't exist
+                cache_dir = './models_cache'
+                os.makedirs(cache_dir, exist_ok=True)
+                _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, cache_folder=cache_dir)
+    return _embedding_model
+
+def embedding_model_loaded() -> bool:
+    return _embedding_model is not None
 
 class DuplicateDetectorService:
-    def __init__(self):
-        # Create cache directory if it doesn't exist
-        cache_dir = './models_cache'
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # Initialize the model
-        self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', cache_folder=cache_dir)
+    SIMILARITY_THRESHOLD = DuplicateDetectorConfig.SIMILARITY_THRESHOLD
+
+    def __init__(self, index_backend: str = None, corpus_path: str = None):
+        # The model is loaded on first encode (or by the warm-up hook)
+
+        # Concurrent requests share model calls through the micro-batcher
+        self.batcher = None
+        if DuplicateDetectorConfig.BATCH_SIZE > 1:
+            self.batcher = EmbeddingBatcher(
+                lambda texts: self.model.encode(texts),
+                max_batch_size=DuplicateDetectorConfig.BATCH_SIZE,
+                max_wait_ms=DuplicateDetectorConfig.BATCH_WAIT_MS
+            )
         
-        # Store for embeddings and texts
-        self.stored_embeddings: List[np.ndarray] = []
-        self.stored_texts: List[str] = []
+        # Matrix-backed store of normalized embeddings and their texts,
+        # memory-mapped from disk when a corpus path is configured
+        corpus_path = corpus_path or DuplicateDetectorConfig.CORPUS_PATH
+        if corpus_path:
+            self.store = PersistentEmbeddingStore(corpus_path, fsync=DuplicateDetectorConfig.CORPUS_FSYNC)
+        else:
+            self.store = EmbeddingStore()
+
+        self.index = create_index(
+            self.store,
+            index_backend or DuplicateDetectorConfig.INDEX_BACKEND,
+            **DuplicateDetectorConfig.index_options()
+        )
+        self._indexed_rows = 0
+
+        # Exact/near-exact hash index consulted before the embedding model.
+        # Only the most recent rows of an existing corpus are hashed at startup.
+        self.hash_index = None
+        if DuplicateDetectorConfig.HASH_ENABLED:
+            self.hash_index = ContentHashIndex(
+                use_simhash=DuplicateDetectorConfig.SIMHASH_ENABLED,
+                max_distance=DuplicateDetectorConfig.SIMHASH_MAX_DISTANCE
+            )
+        self._hashed_rows = max(0, len(self.store) - DuplicateDetectorConfig.HASH_WARM_ROWS)
+
+        self.stats = {
+            "hash_exact_hits": 0,
+            "hash_near_hits": 0,
+            "hash_misses": 0,
+            "model_encodes": 0
+        }
+
+        self._lock = threading.RLock()
+        # Counters get their own lock so encodes never wait behind an index scan
+        self._stats_lock = threading.Lock()
+        self._sync_index()
+
+    @property
+    def model(self):
+        return load_embedding_model()
+
+    @property
+    def stored_embeddings(self) -> np.ndarray:
+        return self.store.vectors
+
+    @property
+    def stored_texts(self):
+        return self.store.texts
+
+    def _sync_index(self) -> None:
+        """Register rows added since the last sync, including rows written by other workers"""
+        self.store.refresh()
+        size = len(self.store)
+        self.index.add_many(range(self._indexed_rows, size))
+        self._indexed_rows = size
+
+        if self.hash_index is not None and self._hashed_rows < size:
+            for row, text in zip(range(self._hashed_rows, size), self.store.iter_texts(self._hashed_rows)):
+                digest, fingerprint = self.hash_index.fingerprint(text)
+                self.hash_index.add(digest, fingerprint, row)
+        self._hashed_rows = size
+
+    def get_stats(self) -> dict:
+        """Hash fast-path counters, i.e. how many model encodes were avoided"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        hits = stats["hash_exact_hits"] + stats["hash_near_hits"]
+        lookups = hits + stats["hash_misses"]
+        stats["hash_hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["stored_embeddings"] = len(self.store)
+        if self.batcher is not None:
+            stats["model_batches"] = self.batcher.batches
+        return stats
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _encode(self, email_content: str) -> np.ndarray:
+        self._count("model_encodes")
+        with stage("embedding_encode"):
+            if self.batcher is not None:
+                return self.batcher.encode(email_content)
+            return self.model.encode([email_content])[0]
+
+    def encode_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Encode several texts, in as few model calls as the batch size allows"""
+        self._count("model_encodes", len(texts))
+        with stage("embedding_encode"):
+            if self.batcher is not None:
+                return self.batcher.encode_many(texts)
+            return list(self.model.encode(texts))
+
+    @staticmethod
+    def normalize_score(cosine_sim: float) -> float:
+        """Normalize cosine similarity from [-1, 1] to [0, 1] and round to 4 decimal places"""
+        normalized_sim = min(max((cosine_sim + 1) / 2, 0.0), 1.0)
+        return round(normalized_sim, 4)
         
     def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
@@ -23,27 +180,111 @@ class DuplicateDetectorService:
         """
         cosine_sim = float(np.dot(embedding1, embedding2) / 
                           (np.linalg.norm(embedding1) * np.linalg.norm(embedding2)))
-        # Normalize from [-1, 1] to [0, 1] and round to 4 decimal places
-        normalized_sim = min(max((cosine_sim + 1) / 2, 0.0), 1.0)
-        return round(normalized_sim, 4)
+        return self.normalize_score(cosine_sim)
     
-    def check_duplicate(self, email_content: str) -> Tuple[bool, float]:
+    def embed(self, email_content: str) -> EmailEmbedding:
+        """Encode the email once and return a handle to pass along the request"""
+        return EmailEmbedding(email_content, self._encode(email_content))
+
+    def check_duplicate(self, email_content: str, embedding: Optional[EmailEmbedding] = None) -> Tuple[bool, float]:
         """
         Check if email content is duplicate
+        An already checked embedding handle returns its cached verdict without
+        touching the model or the store
+        Exact and near-exact resends are answered from the hash index; the
+        embedding model only runs on a hash miss
         Returns: (is_duplicate: bool, confidence_score: float)
         """
-        # Get embedding for new email
-        new_embedding = self.model.encode([email_content])[0]
-        
-        max_similarity = 0.0
-        
-        # Compare with existing embeddings
-        for stored_embedding in self.stored_embeddings:
-            similarity = self.compute_similarity(new_embedding, stored_embedding)
-            max_similarity = max(max_similarity, similarity)
+        if embedding is None:
+            embedding = EmailEmbedding(email_content)
+        if embedding.checked:
+            return embedding.is_duplicate, embedding.confidence_score
+        with stage("duplicate_hash"):
+            settled = self._check_hash(embedding)
+        if not settled:
+            # Get embedding for new email
+            if embedding.vector is None:
+                embedding.vector = self._encode(email_content)
+            with stage("duplicate_scan"):
+                self._check_embedding(embedding)
+        return embedding.is_duplicate, embedding.confidence_score
+
+    def check_duplicates(self, embeddings: List[EmailEmbedding]) -> List[Tuple[bool, float]]:
+        """
+        Batch form of check_duplicate for bulk ingestion: hash misses are
+        encoded together, then checked in order so copies within the batch
+        are caught too
+        """
+        pending = [e for e in embeddings if not e.checked and not self._check_hash(e)]
+        to_encode = [e for e in pending if e.vector is None]
+        if to_encode:
+            vectors = self.encode_many([e.email_content for e in to_encode])
+            for embedding, vector in zip(to_encode, vectors):
+                embedding.vector = vector
+        for embedding in pending:
+            # Earlier emails of this batch may have been stored meanwhile
+            if not self._check_hash(embedding, count_miss=False):
+                self._check_embedding(embedding)
+        return [(e.is_duplicate, e.confidence_score) for e in embeddings]
+
+    def _check_hash(self, embedding: EmailEmbedding, count_miss: bool = True) -> bool:
+        """Hash fast path; returns True if it settled the verdict"""
+        if self.hash_index is None:
+            return False
+        if embedding.digest is None:
+            embedding.digest, embedding.fingerprint = self.hash_index.fingerprint(embedding.email_content)
+
+        with self._lock:
+            self._sync_index()
+            row, similarity = self.hash_index.lookup(embedding.digest, embedding.fingerprint)
+        # Near-exact scores share the embedding scale, so the same threshold applies
+        if row is None or similarity <= self.SIMILARITY_THRESHOLD:
+            if count_miss:
+                self._count("hash_misses")
+            return False
+        self._count("hash_exact_hits" if similarity == 1.0 else "hash_near_hits")
+
+        embedding.is_duplicate = True
+        embedding.confidence_score = similarity
+        return True
+
+    def _check_embedding(self, embedding: EmailEmbedding) -> None:
+        """Nearest-neighbour check of an encoded email, which is then stored"""
+        new_embedding = embedding.vector
         
-        # Store the new embedding and text
-        self.stored_embeddings.append(new_embedding)
-        self.stored_texts.append(email_content)
+        # Search and insert atomically so concurrent copies of one email
+        # cannot both be treated as originals
+        with self._lock:
+            # Find the nearest stored embedding through the index
+            self._sync_index()
+            max_similarity = 0.0
+            _, cosines = self.index.search(new_embedding, k=1)
+            if cosines.shape[0] > 0:
+                max_similarity = max(max_similarity, self.normalize_score(float(cosines[0])))
+            
+            # Store the new embedding and text
+            row = self.store.add(new_embedding, embedding.email_content)
+            # In-memory rows do not outlive the process, so only on-disk rows are worth recording
+            if isinstance(self.store, PersistentEmbeddingStore):
+                embedding.row = row
+            if self.hash_index is not None and row == self._hashed_rows:
+                self.hash_index.add(embedding.digest, embedding.fingerprint, row)
+                self._hashed_rows += 1
+            self._sync_index()
         
-        return max_similarity > 0.8, max_similarity 
\ No newline at end of file
+        embedding.is_duplicate = max_similarity > self.SIMILARITY_THRESHOLD
+        embedding.confidence_score = max_similarity
+
+
+_shared_detector: Optional[DuplicateDetectorService] = None
+_shared_detector_lock = threading.Lock()
+
+def get_duplicate_detector() -> DuplicateDetectorService:
+    """Process-wide duplicate detector, so the embedding model is loaded only once"""
+    global _shared_detector
+    if _shared_detector is None:
+        with _shared_detector_lock:
+            if _shared_detector is None:
+                _shared_detector = DuplicateDetectorService()
+                registry.add_collector("duplicate_detector", _shared_detector.get_stats)
+    return _shared_detector 
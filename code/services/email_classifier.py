@@ -1,23 +1,70 @@
-import google.generativeai as genai
-from config.gemini_config import GeminiConfig
-import email
+import asyncio
+import atexit
 import json
 import re
-from services.duplicate_detector import DuplicateDetectorService
-from services.service_request_manager import ServiceRequestManager
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from services.duplicate_detector import DuplicateDetectorService, EmailEmbedding, get_duplicate_detector
+from services.pre_classifier import PreClassifier, get_pre_classifier
+from services.service_request_manager import ServiceRequestManager, get_service_request_manager
+from services.llm_runner import LLMRunner
+from services.llm_backends import LLMBackend, create_backend
+from services.response_cache import ResponseCache
+from services.email_parser import EmailParser
+from services.document_extractor import DocumentExtractor
+from services.prompt_templates import EmailTrimmer, PromptTemplate
+from services.field_rules import FieldRuleExtractor
+from services.metrics import count, registry, stage
+from config.cache_config import CacheConfig
+from config.email_parser_config import EmailParserConfig
+from config.document_config import DocumentConfig
+from config.llm_config import LLMConfig
+from config.preclassifier_config import PreClassifierConfig
 
 class EmailClassifierService:
-    def __init__(self):
-        # Initialize Gemini
-        genai.configure(api_key=GeminiConfig.API_KEY)
-        self.model = genai.GenerativeModel(
-            model_name=GeminiConfig.MODEL_NAME,
-            generation_config={
-                "temperature": GeminiConfig.TEMPERATURE,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 2048,
-            }
+    def __init__(
+        self,
+        duplicate_detector: Optional[DuplicateDetectorService] = None,
+        service_request_manager: Optional[ServiceRequestManager] = None,
+        single_call: Optional[bool] = None,
+        backend: Optional[LLMBackend] = None,
+        pre_classifier: Optional[PreClassifier] = None
+    ):
+        # Initialize the model backend (Gemini unless LLM_BACKEND says otherwise)
+        self.model = backend or create_backend()
+        # Bounded, rate-limited, retrying access to the model
+        self.llm = LLMRunner(self.model, **LLMConfig.runner_options())
+        # Parsed classification/extraction results keyed by normalized content
+        self.response_cache = None
+        if CacheConfig.ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=CacheConfig.MAX_ENTRIES,
+                ttl_seconds=CacheConfig.TTL_SECONDS,
+                disk_path=CacheConfig.DISK_PATH or None
+            )
+        self._pipeline_executor = ThreadPoolExecutor(
+            max_workers=LLMConfig.PIPELINE_WORKERS,
+            thread_name_prefix="email-pipeline"
+        )
+        # Text from HTML bodies and attachments, parsed off the request threads
+        self.document_extractor = None
+        if DocumentConfig.ENABLED:
+            self.document_extractor = DocumentExtractor(
+                max_workers=DocumentConfig.WORKERS,
+                timeout=DocumentConfig.TIMEOUT_SECONDS,
+                max_document_bytes=DocumentConfig.MAX_BYTES,
+                max_text_chars=DocumentConfig.MAX_TEXT_CHARS,
+                cache_entries=DocumentConfig.CACHE_ENTRIES
+            )
+            atexit.register(self.document_extractor.close)
+        # Streaming .eml extraction with size caps
+        self.email_parser = EmailParser(
+            max_message_bytes=EmailParserConfig.MAX_MESSAGE_BYTES,
+            max_body_chars=EmailParserConfig.MAX_BODY_CHARS,
+            max_header_bytes=EmailParserConfig.MAX_HEADER_BYTES,
+            keep_document=self.document_extractor.keep_document if self.document_extractor else None,
+            max_document_bytes=DocumentConfig.MAX_BYTES
         )
         
         self.classification_criteria = {
@@ -101,8 +148,54 @@ class EmailClassifierService:
             }
         }
 
-        self.duplicate_detector = DuplicateDetectorService()
-        self.service_request_manager = ServiceRequestManager()
+        # Descriptions of every extractable field
+        self.field_descriptions = {
+            "deal_id": "Deal identifier or reference number",
+            "transfer_amount": "Amount to be transferred (numeric value)",
+            "from_account": "Source account details",
+            "to_account": "Destination account details",
+            "effective_date": "Date when transfer takes effect (YYYY-MM-DD)",
+            "new_commitment_amount": "Updated commitment amount (numeric value)",
+            "change_reason": "Reason for commitment change",
+            "fee_type": "Type of fee being paid",
+            "amount": "Payment amount (numeric value)",
+            "due_date": "Date when payment is due (YYYY-MM-DD)",
+            "payment_reference": "Reference number for the payment",
+            "funding_amount": "Amount being funded (numeric value)",
+            "currency": "Currency code (e.g., USD, EUR)",
+            "credit_account": "Account to be credited",
+            "value_date": "Date of value (YYYY-MM-DD)",
+            "remitter_name": "Name of the remitting party",
+            "disbursement_amount": "Amount to be disbursed (numeric value)",
+            "debit_account": "Account to be debited",
+            "beneficiary_name": "Name of the beneficiary",
+            "payment_method": "Method of payment"
+        }
+
+        # Prompts are compiled once; requests only interpolate the email
+        self.classification_template = PromptTemplate('classification', self._build_classification_prompt)
+        self.combined_template = PromptTemplate('combined', self._build_combined_prompt)
+        self.extraction_templates = {
+            request_type: self._compile_extraction_template(request_type)
+            for request_type in self.classification_criteria["Request Type"]
+        }
+        # Long threads are cut down before they reach the model
+        self.email_trimmer = EmailTrimmer(**LLMConfig.trimmer_options())
+        # Formatted fields are also read locally, to fill gaps in the model's answer
+        self.field_rules = FieldRuleExtractor(self.extraction_fields) if LLMConfig.RULE_EXTRACTION else None
+
+        # Classify and extract in one model call, falling back to two calls
+        # when the combined response does not validate
+        self.single_call = LLMConfig.SINGLE_CALL if single_call is None else single_call
+
+        # Share one detector (and one embedding model) across all services
+        self.duplicate_detector = duplicate_detector or get_duplicate_detector()
+        self.service_request_manager = service_request_manager or get_service_request_manager()
+
+        # Local classifier trained on stored requests; confident answers skip the classification call
+        self.pre_classifier = pre_classifier
+        if self.pre_classifier is None and PreClassifierConfig.ENABLED:
+            self.pre_classifier = get_pre_classifier()
 
     def process_email(self, file):
         """Process email file with duplicate detection and service request creation"""
@@ -113,54 +206,236 @@ class EmailClassifierService:
             # Extract email content
             email_content = self.extract_email_content(file)
             
-            # Check for duplicates
-            is_duplicate, confidence_score = self.duplicate_detector.check_duplicate(email_content)
-            
-            if is_duplicate:
-                return {
-                    'is_duplicate': True,
-                    'confidence_score': confidence_score,
-                    'error': 'Duplicate email detected'
-                }
-            
-            # Continue with regular processing for non-duplicates
-            classification_prompt = self.create_classification_prompt(email_content)
-            classification_response = self.model.generate_content(classification_prompt)
-            classification_result = self._parse_json_response(classification_response.text)
-            
-            # Get request type from classification
-            request_type = classification_result.get('request_type')
-            
-            # Get deal details based on request type
-            extraction_prompt = self.create_deal_extraction_prompt(email_content, request_type)
-            extraction_response = self.model.generate_content(extraction_prompt)
-            deal_details = self._parse_json_response(extraction_response.text)
-            
-            # Create service request
-            service_request = self.service_request_manager.create_service_request(
-                request_type=request_type,
-                sub_request_type=classification_result.get('sub_request_type'),
-                deal_id=deal_details.get('deal_id'),
-                extracted_fields=deal_details,
-                confidence_score=classification_result.get('confidence_score', 0.0),
-                email_content=email_content
-            )
-            
-            # Prepare response
-            result = {
-                'is_duplicate': False,
-                'classification': classification_result,
-                'extracted_fields': deal_details,
-                'service_request': service_request.to_dict() if service_request else None
-            }
-            
-            return result
+            return self.process_email_content(email_content)
                     
         except Exception as e:
             import traceback
             print(traceback.format_exc())
             raise ValueError(f'Error processing email: {e}')
 
+    def submit_email(self, file) -> Future:
+        """
+        Validate and read the upload on the caller's thread, then run the rest
+        of the pipeline on the pipeline pool; the Future yields the same result
+        as process_email
+        """
+        try:
+            self.validate_email_file(file)
+            email_content = self.extract_email_content(file)
+        except Exception as e:
+            raise ValueError(f'Error processing email: {e}')
+
+        return self._pipeline_executor.submit(self.process_email_content, email_content)
+
+    async def aprocess_email(self, file):
+        """asyncio variant of process_email"""
+        return await asyncio.wrap_future(self.submit_email(file))
+
+    def process_email_content(self, email_content, embedding=None):
+        """Run duplicate detection, classification, extraction and service request creation"""
+        # Check for duplicates; the handle is encoded at most once, and
+        # only if the hash fast path misses
+        embedding = embedding or EmailEmbedding(email_content)
+        is_duplicate, confidence_score = self.duplicate_detector.check_duplicate(email_content, embedding)
+        
+        if is_duplicate:
+            count("emails_processed_total", help="Emails through the pipeline by outcome", result="duplicate")
+            return self.duplicate_result(confidence_score)
+        
+        # Continue with regular processing for non-duplicates
+        classification_result, deal_details = self.analyze_email(email_content, embedding)
+        
+        # Create service request
+        service_request = self.service_request_manager.create_service_request(
+            **self.service_request_fields(email_content, classification_result, deal_details),
+            embedding=embedding
+        )
+        count("emails_processed_total", help="Emails through the pipeline by outcome", result="created")
+        
+        return self.build_result(classification_result, deal_details, service_request)
+
+    def analyze_email(self, email_content, embedding=None):
+        """
+        Classify the email and extract its deal details
+        With an encoded embedding handle the pre-classifier is tried first,
+        and a confident answer leaves only the extraction call
+        """
+        classification_result = self.preclassify(embedding)
+
+        # The model sees the trimmed email; duplicate detection and the stored
+        # service request keep the full text
+        with stage("trim"):
+            email_content = self.email_trimmer.trim(email_content)
+        if classification_result is None and self.single_call:
+            combined = self.analyze_email_single_call(email_content)
+            if combined is not None:
+                return combined
+
+        if classification_result is None:
+            classification_result = self._cached(
+                'classification', self.classification_template, email_content, self.classify_email
+            )
+        
+        # Get request type from classification
+        request_type = classification_result.get('request_type')
+        
+        # Get deal details based on request type
+        deal_details = self.extract_fields(email_content, request_type)
+        
+        return classification_result, deal_details
+
+    def preclassify(self, embedding):
+        """Local classification from the email's embedding, or None to ask the model"""
+        if self.pre_classifier is None or embedding is None or embedding.vector is None:
+            return None
+        with stage("preclassify"):
+            return self.pre_classifier.classify(embedding.vector)
+
+    def classify_email(self, email_content):
+        with stage("prompt_build", call="classification"):
+            classification_prompt = self.create_classification_prompt(email_content)
+        with stage("model_call", call="classification"):
+            classification_response = self.llm.generate(classification_prompt)
+        with stage("json_parse", call="classification"):
+            return self._parse_json_response(classification_response.text)
+
+    def extract_fields(self, email_content, request_type):
+        """
+        Deal details for the request type from the extraction call; rule
+        values only fill fields the model left empty and check the rest
+        """
+        deal_details = self._cached(
+            'extraction', self.extraction_template(request_type), email_content, self.extract_deal_details, request_type
+        )
+        required_fields = self.extraction_fields.get(request_type, {}).get("default", [])
+        if self.field_rules is None or not required_fields:
+            return deal_details
+
+        with stage("rule_extract"):
+            resolved = self.field_rules.extract(email_content, request_type)
+        # Leave the cached answer untouched
+        deal_details = dict(deal_details or {})
+        for field in required_fields:
+            if deal_details.get(field) not in (None, ""):
+                source = "model"
+                if field in resolved:
+                    count("extraction_rule_checks_total", help="Model fields checked against the rules by result",
+                          result="match" if FieldRuleExtractor.agrees(deal_details[field], resolved[field]) else "mismatch")
+            elif field in resolved:
+                source = "rules"
+                deal_details[field] = resolved[field]
+            else:
+                source = "none"
+            count("extraction_fields_total", help="Extracted fields by source", source=source)
+        return deal_details
+
+    def extract_deal_details(self, email_content, request_type):
+        with stage("prompt_build", call="extraction"):
+            extraction_prompt = self.create_deal_extraction_prompt(email_content, request_type)
+        with stage("model_call", call="extraction"):
+            extraction_response = self.llm.generate(extraction_prompt)
+        with stage("json_parse", call="extraction"):
+            return self._parse_json_response(extraction_response.text)
+
+    def _cached(self, stage_name, template, email_content, compute, *qualifiers):
+        """Return a parsed model result from the response cache, computing it on a miss"""
+        if self.response_cache is None:
+            return compute(email_content, *qualifiers)
+
+        key = ResponseCache.make_key(
+            stage_name, f'{self.model.name}:{self.model.model_name}', self.model.temperature, template.version,
+            email_content, *qualifiers
+        )
+        result = self.response_cache.get(key)
+        count("llm_cache_lookups_total", help="Response cache lookups by stage and result",
+              stage=stage_name, result="miss" if result is None else "hit")
+        if result is None:
+            result = compute(email_content, *qualifiers)
+            if result is not None:
+                self.response_cache.set(key, result)
+        return result
+
+    def analyze_email_single_call(self, email_content):
+        """
+        Classify and extract in one model call
+        Returns (classification_result, deal_details), or None if the response
+        does not validate and the two-call path should be used instead
+        """
+        result = self._cached('combined', self.combined_template, email_content, self._analyze_combined)
+        return tuple(result) if result is not None else None
+
+    def _analyze_combined(self, email_content):
+        try:
+            with stage("prompt_build", call="combined"):
+                prompt = self.create_combined_prompt(email_content)
+            with stage("model_call", call="combined"):
+                response = self.llm.generate(prompt)
+            with stage("json_parse", call="combined"):
+                combined = self._parse_json_response(response.text)
+        except ValueError as e:
+            print(f"Single-call analysis failed, falling back to two calls: {e}")
+            return None
+        return self._split_combined_response(combined)
+
+    def _split_combined_response(self, combined):
+        """Validate a combined response and split it into classification and deal details"""
+        if not isinstance(combined, dict):
+            return None
+
+        request_type = combined.get('request_type')
+        if request_type not in self.classification_criteria["Request Type"]:
+            return None
+        if not isinstance(combined.get('confidence_score'), (int, float)):
+            return None
+        extracted_fields = combined.get('extracted_fields')
+        if not isinstance(extracted_fields, dict):
+            return None
+
+        required_fields = self.extraction_fields.get(request_type, {}).get("default", [])
+        if any(field not in extracted_fields for field in required_fields):
+            return None
+
+        classification_result = {
+            key: combined.get(key)
+            for key in ('request_type', 'sub_request_type', 'confidence_score', 'reason')
+        }
+        if required_fields:
+            deal_details = {field: extracted_fields[field] for field in required_fields}
+        else:
+            deal_details = extracted_fields
+        return classification_result, deal_details
+
+    @staticmethod
+    def duplicate_result(confidence_score):
+        return {
+            'is_duplicate': True,
+            'confidence_score': confidence_score,
+            'error': 'Duplicate email detected'
+        }
+
+    @staticmethod
+    def service_request_fields(email_content, classification_result, deal_details):
+        """Keyword arguments for ServiceRequestManager.create_service_request"""
+        return {
+            'request_type': classification_result.get('request_type'),
+            'sub_request_type': classification_result.get('sub_request_type'),
+            'deal_id': deal_details.get('deal_id'),
+            'extracted_fields': deal_details,
+            'confidence_score': classification_result.get('confidence_score', 0.0),
+            # Kept so the pre-classifier never trains on its own answers
+            'classified_by': classification_result.get('classified_by', 'model'),
+            'email_content': email_content
+        }
+
+    @staticmethod
+    def build_result(classification_result, deal_details, service_request):
+        return {
+            'is_duplicate': False,
+            'classification': classification_result,
+            'extracted_fields': deal_details,
+            'service_request': service_request.to_dict() if service_request else None
+        }
+
     def _parse_json_response(self, response_text):
         """Parse and validate JSON response"""
         try:
@@ -168,10 +443,12 @@ class EmailClassifierService:
             return json.loads(response_text)
         except json.JSONDecodeError:
             # Clean up the response and try again
+            count("llm_json_repairs_total", help="Model responses that needed clean-up before parsing")
             cleaned_response = self._clean_response_text(response_text)
             try:
                 return json.loads(cleaned_response)
             except json.JSONDecodeError:
+                count("llm_json_parse_failures_total", help="Model responses that could not be parsed")
                 print("Debug - Raw Response:", response_text)  # For debugging
                 raise ValueError('Failed to parse response. Raw response: ' + response_text[:200])
 
@@ -199,24 +476,47 @@ class EmailClassifierService:
         return True
 
     def extract_email_content(self, eml_file):
-        """Extract content from .eml file"""
-        msg = email.message_from_bytes(eml_file.read())
-        
-        # Extract subject and body
-        subject = msg.get('subject', '')
-        body = ""
-        
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    body += part.get_payload(decode=True).decode()
-        else:
-            body = msg.get_payload(decode=True).decode()
-        
-        return f"Subject: {subject}\n\nBody: {body}"
+        """Extract content from .eml file, streaming it rather than reading it whole"""
+        with stage("parse"):
+            parsed = self.email_parser.parse(getattr(eml_file, 'stream', eml_file))
+        return self._email_content(parsed)
+
+    def parse_email_bytes(self, raw_email):
+        """Extract subject, body and attachment text from raw .eml bytes"""
+        with stage("parse"):
+            parsed = self.email_parser.parse_bytes(raw_email)
+        return self._email_content(parsed)
+
+    def _email_content(self, parsed):
+        if self.document_extractor is None:
+            return parsed.content
+        with stage("document_extraction"):
+            return self.document_extractor.email_content(parsed)
+
+    def _compile_extraction_template(self, request_type):
+        return PromptTemplate(
+            f'extraction/{request_type}',
+            lambda email_content: self._build_deal_extraction_prompt(email_content, request_type)
+        )
+
+    def extraction_template(self, request_type):
+        """Compiled extraction prompt; request types outside the criteria are compiled per call"""
+        template = self.extraction_templates.get(request_type)
+        return template if template is not None else self._compile_extraction_template(request_type)
 
     def create_classification_prompt(self, email_content):
         """Create prompt for email classification"""
+        return self.classification_template.render(email_content)
+
+    def create_combined_prompt(self, email_content):
+        """Create prompt that classifies the email and extracts its deal details in one response"""
+        return self.combined_template.render(email_content)
+
+    def create_deal_extraction_prompt(self, email_content, request_type):
+        """Create prompt for extracting deal details based on request type"""
+        return self.extraction_template(request_type).render(email_content)
+
+    def _build_classification_prompt(self, email_content):
         prompt = f"""You are an expert email classifier for a Commercial Bank Lending Service. 
         Analyze the following email and classify it based on the request type and sub-request type.
         
@@ -244,33 +544,52 @@ class EmailClassifierService:
         """
         return prompt
 
-    def create_deal_extraction_prompt(self, email_content, request_type):
-        """Create prompt for extracting deal details based on request type"""
+    def _build_combined_prompt(self, email_content):
+        fields_by_type = {
+            request_type: fields.get("default", [])
+            for request_type, fields in self.extraction_fields.items()
+        }
+        all_fields = sorted({field for fields in fields_by_type.values() for field in fields})
+
+        prompt = f"""You are an expert email classifier and financial data extractor for a Commercial Bank Lending Service.
+        Classify the following email by request type and sub-request type, then extract the
+        transaction details required for that request type.
+
+        Classification Criteria:
+        {json.dumps(self.classification_criteria, indent=2)}
+
+        Fields to extract for each request type:
+        {json.dumps(fields_by_type, indent=2)}
+
+        Field Descriptions:
+        {json.dumps({field: self.field_descriptions[field] for field in all_fields}, indent=2)}
+
+        Email Content:
+        {email_content}
+
+        Instructions:
+        1. Choose the most appropriate request type and sub-request type from the provided criteria
+        2. Provide a confidence score between 0 and 1 and a detailed reason for your classification
+        3. In "extracted_fields", include EXACTLY the fields listed for the chosen request type
+        4. Format numeric values as numbers (not strings) and dates as YYYY-MM-DD
+        5. Use null for any required field not found in the email
+        6. Return ONLY a valid JSON object with no additional text or formatting
+        7. The JSON response MUST follow this EXACT format:
+        {{
+            "request_type": "<classified request type>",
+            "sub_request_type": "<classified sub-request type if applicable, otherwise null>",
+            "confidence_score": <float between 0 and 1>,
+            "reason": "<detailed explanation for the classification>",
+            "extracted_fields": {{"<field name>": <value or null>}}
+        }}
+
+        Remember: Return ONLY the JSON object, no other text or explanation.
+        """
+        return prompt
+
+    def _build_deal_extraction_prompt(self, email_content, request_type):
         # Get required fields for the request type
         required_fields = self.extraction_fields.get(request_type, {}).get("default", [])
-        
-        fields_description = {
-            "deal_id": "Deal identifier or reference number",
-            "transfer_amount": "Amount to be transferred (numeric value)",
-            "from_account": "Source account details",
-            "to_account": "Destination account details",
-            "effective_date": "Date when transfer takes effect (YYYY-MM-DD)",
-            "new_commitment_amount": "Updated commitment amount (numeric value)",
-            "change_reason": "Reason for commitment change",
-            "fee_type": "Type of fee being paid",
-            "amount": "Payment amount (numeric value)",
-            "due_date": "Date when payment is due (YYYY-MM-DD)",
-            "payment_reference": "Reference number for the payment",
-            "funding_amount": "Amount being funded (numeric value)",
-            "currency": "Currency code (e.g., USD, EUR)",
-            "credit_account": "Account to be credited",
-            "value_date": "Date of value (YYYY-MM-DD)",
-            "remitter_name": "Name of the remitting party",
-            "disbursement_amount": "Amount to be disbursed (numeric value)",
-            "debit_account": "Account to be debited",
-            "beneficiary_name": "Name of the beneficiary",
-            "payment_method": "Method of payment"
-        }
 
         prompt = f"""You are an expert financial data extractor for a Commercial Bank Lending Service.
         Extract specific transaction details from the email content based on the request type: {request_type}
@@ -282,7 +601,7 @@ class EmailClassifierService:
         {json.dumps(required_fields, indent=2)}
 
         Field Descriptions:
-        {json.dumps({field: fields_description[field] for field in required_fields}, indent=2)}
+        {json.dumps({field: self.field_descriptions[field] for field in required_fields}, indent=2)}
 
         Instructions:
         1. Carefully analyze the email content
@@ -307,4 +626,22 @@ class EmailClassifierService:
 
         Remember: Return ONLY the JSON object, no other text or explanation.
         """
-        return prompt 
\ No newline at end of file
+        return prompt 
+
+
+_shared_classifier: Optional[EmailClassifierService] = None
+_shared_classifier_lock = threading.Lock()
+
+def get_email_classifier() -> EmailClassifierService:
+    """Process-wide classifier, built on first use rather than at import time"""
+    global _shared_classifier
+    if _shared_classifier is None:
+        with _shared_classifier_lock:
+            if _shared_classifier is None:
+                _shared_classifier = EmailClassifierService()
+                registry.add_collector("llm", _shared_classifier.llm.get_stats)
+                if _shared_classifier.response_cache is not None:
+                    registry.add_collector("llm_cache", _shared_classifier.response_cache.get_stats)
+                if _shared_classifier.document_extractor is not None:
+                    registry.add_collector("document_extractor", _shared_classifier.document_extractor.get_stats)
+    return _shared_classifier
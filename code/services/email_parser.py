@@ -0,0 +1,333 @@
+import binascii
+import codecs
+import io
+import quopri
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesFeedParser
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+# Longest piece read from the stream at once; longer lines arrive in pieces
+READ_SIZE = 64 * 1024
+
+# (boundary, is closing delimiter)
+Delimiter = Tuple[bytes, bool]
+
+
+class ParsedEmail:
+    """
+    Subject, kept body text, metadata of the parts that were skipped and the
+    decoded payloads of parts kept for document extraction
+    """
+
+    def __init__(
+        self,
+        subject: str,
+        body: str,
+        skipped_parts: List[Dict[str, Any]],
+        truncated: bool,
+        documents: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.subject = subject
+        self.body = body
+        self.skipped_parts = skipped_parts
+        self.truncated = truncated
+        self.documents = documents or []
+
+    @property
+    def content(self) -> str:
+        """The text handed to duplicate detection and the model"""
+        return f"Subject: {self.subject}\n\nBody: {self.body}"
+
+
+def decode_text(raw: bytes, charset: Optional[str] = None) -> str:
+    """Decode with the declared charset, else UTF-8 with a cp1252 fallback"""
+    if charset:
+        try:
+            codecs.lookup(charset)
+            return raw.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        # Undeclared legacy charset
+        return raw.decode('cp1252', errors='replace')
+
+
+class _LineReader:
+    """Reads a binary stream line by line, stopping after `max_bytes`"""
+
+    def __init__(self, stream: BinaryIO, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self._at_line_start = True
+        self._pushed = None
+
+    def readline(self) -> Optional[Tuple[bytes, bool]]:
+        """Next (piece, starts a line) or None at the end of the input"""
+        if self._pushed is not None:
+            item, self._pushed = self._pushed, None
+            return item
+        remaining = self.max_bytes - self.bytes_read
+        if remaining <= 0:
+            self.truncated = self.truncated or bool(self.stream.read(1))
+            return None
+        piece = self.stream.readline(min(READ_SIZE, remaining))
+        if not piece:
+            return None
+        self.bytes_read += len(piece)
+        at_line_start = self._at_line_start
+        self._at_line_start = piece.endswith(b'\n')
+        return piece, at_line_start
+
+    def unread(self, item: Tuple[bytes, bool]) -> None:
+        self._pushed = item
+
+
+class _ParseState:
+    def __init__(self, max_body_chars: int):
+        self.texts: List[str] = []
+        self.remaining = max_body_chars
+        self.skipped_parts: List[Dict[str, Any]] = []
+        self.documents: List[Dict[str, Any]] = []
+        self.truncated = False
+
+    @property
+    def full(self) -> bool:
+        return self.remaining <= 0
+
+    def add_text(self, text: str) -> None:
+        if len(text) > self.remaining:
+            text = text[:self.remaining]
+            self.truncated = True
+        self.texts.append(text)
+        self.remaining -= len(text)
+
+
+class EmailParser:
+    """
+    Streaming, size-bounded extraction of the subject and plain-text body.
+
+    Header blocks are parsed with BytesFeedParser; part bodies are scanned
+    line by line against the MIME boundaries, so only text parts are ever
+    held in memory. Attachment payloads other than plain text are counted
+    and skipped without being decoded, reading stops once the body budget
+    is used up, and text is decoded with the part's declared charset.
+
+    Parts accepted by `keep_document(content_type, filename)` (HTML bodies,
+    PDF/DOCX attachments, ...) are kept as decoded bytes in
+    `ParsedEmail.documents` when they fit in `max_document_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_message_bytes: int = 50 * 1024 * 1024,
+        max_body_chars: int = 100000,
+        max_header_bytes: int = 64 * 1024,
+        keep_document: Optional[Callable[[str, Optional[str]], bool]] = None,
+        max_document_bytes: int = 10 * 1024 * 1024
+    ):
+        self.max_message_bytes = max_message_bytes
+        self.max_body_chars = max_body_chars
+        self.max_header_bytes = max_header_bytes
+        self.keep_document = keep_document
+        self.max_document_bytes = max_document_bytes
+
+    def parse(self, stream: BinaryIO) -> ParsedEmail:
+        reader = _LineReader(stream, self.max_message_bytes)
+        state = _ParseState(self.max_body_chars)
+
+        headers = self._read_headers(reader, [])
+        self._read_entity(headers, reader, [], state, root=True)
+
+        return ParsedEmail(
+            subject=self._decode_header(headers.get('subject', '')),
+            body="\n".join(state.texts),
+            skipped_parts=state.skipped_parts,
+            truncated=state.truncated or reader.truncated,
+            documents=state.documents
+        )
+
+    def parse_bytes(self, raw_email: bytes) -> ParsedEmail:
+        return self.parse(io.BytesIO(raw_email))
+
+    def _read_headers(self, reader: _LineReader, boundaries: List[bytes]) -> Message:
+        parser = BytesFeedParser()
+        size = 0
+        while True:
+            item = reader.readline()
+            if item is None:
+                break
+            piece, at_line_start = item
+            if at_line_start and piece in (b'\n', b'\r\n'):
+                break
+            if at_line_start and self._match(piece, boundaries):
+                # Part with no blank line after its headers
+                reader.unread(item)
+                break
+            if size < self.max_header_bytes:
+                parser.feed(piece)
+                size += len(piece)
+        parser.feed(b'\n')
+        return parser.close()
+
+    def _read_entity(
+        self,
+        msg: Message,
+        reader: _LineReader,
+        boundaries: List[bytes],
+        state: _ParseState,
+        root: bool = False
+    ) -> Optional[Delimiter]:
+        """Consume one entity's body; returns the delimiter that ended it, None at end of input"""
+        if msg.get_content_maintype() == 'multipart':
+            boundary = msg.get_boundary()
+            if boundary:
+                return self._read_multipart(boundary.encode('ascii', 'replace'), reader, boundaries, state)
+
+        keep = self._wants(msg, state, root)
+        document = not keep and self._wants_document(msg, state)
+        if document:
+            # base64 inflates by 4/3, plus line breaks
+            raw_limit = self.max_document_bytes * 4 // 3 + self.max_document_bytes // 38 + 1024
+        else:
+            raw_limit = state.remaining * 4 + 1024
+        chunks, size = [], 0
+        delimiter = None
+        while True:
+            item = reader.readline()
+            if item is None:
+                break
+            piece, at_line_start = item
+            if at_line_start:
+                delimiter = self._match(piece, boundaries)
+                if delimiter:
+                    break
+            if (keep or document) and size < raw_limit:
+                chunks.append(piece)
+            size += len(piece)
+
+        raw = b''.join(chunks)
+        # The line break before a delimiter belongs to the delimiter
+        if delimiter and raw.endswith(b'\n'):
+            raw = raw[:-2] if raw.endswith(b'\r\n') else raw[:-1]
+
+        if keep:
+            state.add_text(decode_text(self._decode_transfer(msg, raw), msg.get_content_charset()))
+            if size >= raw_limit:
+                state.truncated = True
+        elif document and size < raw_limit:
+            state.documents.append({
+                "filename": msg.get_filename(),
+                "content_type": msg.get_content_type(),
+                "charset": msg.get_content_charset(),
+                "attachment": self._is_attachment(msg),
+                "data": self._decode_transfer(msg, raw)
+            })
+        else:
+            state.skipped_parts.append({
+                "filename": msg.get_filename(),
+                "content_type": msg.get_content_type(),
+                "size": size
+            })
+        return delimiter
+
+    def _read_multipart(
+        self,
+        boundary: bytes,
+        reader: _LineReader,
+        parents: List[bytes],
+        state: _ParseState
+    ) -> Optional[Delimiter]:
+        boundaries = parents + [boundary]
+        # Preamble
+        delimiter = self._skip(reader, boundaries)
+        while delimiter is not None:
+            found, closing = delimiter
+            if found != boundary:
+                # An enclosing multipart ended without closing this one
+                return delimiter
+            if closing or state.full:
+                break
+            part = self._read_headers(reader, boundaries)
+            delimiter = self._read_entity(part, reader, boundaries, state)
+
+        if state.full or not parents:
+            # Nothing left to keep, or only the epilogue remains
+            return None
+        return self._skip(reader, parents)
+
+    def _skip(self, reader: _LineReader, boundaries: List[bytes]) -> Optional[Delimiter]:
+        while True:
+            item = reader.readline()
+            if item is None:
+                return None
+            piece, at_line_start = item
+            if at_line_start:
+                delimiter = self._match(piece, boundaries)
+                if delimiter:
+                    return delimiter
+
+    @staticmethod
+    def _match(piece: bytes, boundaries: List[bytes]) -> Optional[Delimiter]:
+        if not boundaries or not piece.startswith(b'--'):
+            return None
+        line = piece.rstrip()
+        # Innermost boundary first
+        for boundary in reversed(boundaries):
+            if line == b'--' + boundary:
+                return boundary, False
+            if line == b'--' + boundary + b'--':
+                return boundary, True
+        return None
+
+    @staticmethod
+    def _is_attachment(msg: Message) -> bool:
+        return (msg.get('content-disposition') or '').strip().lower().startswith('attachment')
+
+    def _wants(self, msg: Message, state: _ParseState, root: bool) -> bool:
+        if state.full or msg.get_content_maintype() != 'text':
+            return False
+        if self._is_attachment(msg):
+            # Attached plain text goes to document extraction when it is on, else into the body
+            return msg.get_content_subtype() == 'plain' and not self._wants_document(msg, state)
+        if msg.get_content_subtype() == 'plain':
+            return True
+        # A single-part message keeps any text body unless it goes to document extraction
+        return root and not self._wants_document(msg, state)
+
+    def _wants_document(self, msg: Message, state: _ParseState) -> bool:
+        return (
+            self.keep_document is not None
+            and not state.full
+            and self.keep_document(msg.get_content_type(), msg.get_filename())
+        )
+
+    @staticmethod
+    def _decode_transfer(msg: Message, raw: bytes) -> bytes:
+        encoding = (msg.get('content-transfer-encoding') or '').strip().lower()
+        if encoding == 'base64':
+            try:
+                raw = binascii.a2b_base64(raw)
+            except binascii.Error:
+                # Bad padding: decode what we can line by line
+                decoded = []
+                for line in raw.splitlines():
+                    try:
+                        decoded.append(binascii.a2b_base64(line))
+                    except binascii.Error:
+                        pass
+                raw = b''.join(decoded)
+        elif encoding == 'quoted-printable':
+            raw = quopri.decodestring(raw)
+        return raw
+
+    @staticmethod
+    def _decode_header(value: str) -> str:
+        try:
+            return str(make_header(decode_header(value)))
+        except (LookupError, UnicodeDecodeError, ValueError):
+            return value
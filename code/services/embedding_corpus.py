@@ -0,0 +1,191 @@
+import os
+import struct
+import numpy as np
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from services.embedding_store import EmbeddingStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# 64-byte header: magic, format version, embedding dimension
+HEADER = struct.Struct('<8sII48x')
+MAGIC = b'EMBSTORE'
+VERSION = 1
+
+# One fixed-size sidecar record per row: where the row's text lives in the .txt file
+INDEX_DTYPE = np.dtype([('text_offset', '<i8'), ('text_length', '<i4'), ('flags', '<i4')])
+
+
+class PersistentEmbeddingStore(EmbeddingStore):
+    """
+    Append-only on-disk embedding corpus.
+
+    Files, all sharing the `path` prefix:
+      <path>       header followed by float32 rows of L2-normalized embeddings
+      <path>.idx   one INDEX_DTYPE record per row (text offset/length); a row
+                   only counts as committed once its record is written
+      <path>.txt   UTF-8 email texts, concatenated
+      <path>.lock  advisory lock serializing writers across processes
+
+    Rows are read through a read-only np.memmap, so opening the corpus costs
+    no re-encoding and several workers share the same page-cache pages.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        super().__init__()
+        self.path = path
+        self.index_path = path + '.idx'
+        self.texts_path = path + '.txt'
+        self.lock_path = path + '.lock'
+        self.fsync = fsync
+
+        self._vectors: Optional[np.ndarray] = None
+        self._records: Optional[np.ndarray] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _committed_rows(self) -> int:
+        try:
+            return os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def _read_header(self) -> Optional[int]:
+        """Return the dimension stored in the header, or None if the corpus is new"""
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(raw) < HEADER.size:
+            return None
+
+        magic, version, dim = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an embedding corpus file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported embedding corpus version {version} in {self.path}")
+        return dim
+
+    def refresh(self) -> None:
+        """Map any rows committed since the last refresh, by this or another process"""
+        rows = self._committed_rows()
+        if rows == self._size and (rows == 0 or self._vectors is not None):
+            return
+
+        if self.dim is None:
+            self.dim = self._read_header()
+        if rows == 0 or self.dim is None:
+            return
+
+        self._vectors = np.memmap(self.path, dtype=np.float32, mode='r',
+                                  offset=HEADER.size, shape=(rows, self.dim))
+        self._records = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode='r', shape=(rows,))
+        self._size = rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors
+
+    @property
+    def texts(self) -> List[str]:
+        return list(self.iter_texts())
+
+    def text(self, row: int) -> str:
+        record = self._records[row]
+        with open(self.texts_path, 'rb') as f:
+            f.seek(int(record['text_offset']))
+            return f.read(int(record['text_length'])).decode('utf-8')
+
+    def iter_texts(self, start: int = 0) -> Iterator[str]:
+        """Yield stored texts from `start` in row order using a single file handle"""
+        if self._size <= start:
+            return
+        records = self._records[start:self._size]
+        with open(self.texts_path, 'rb') as f:
+            for offset, length in zip(records['text_offset'].tolist(), records['text_length'].tolist()):
+                f.seek(offset)
+                yield f.read(length).decode('utf-8')
+
+    def _repair(self, rows: int) -> None:
+        """Drop partially written tails left behind by a crashed writer"""
+        index_size = rows * INDEX_DTYPE.itemsize
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path) > index_size:
+            os.truncate(self.index_path, index_size)
+
+        vectors_size = HEADER.size + rows * self.dim * 4
+        if os.path.getsize(self.path) > vectors_size:
+            os.truncate(self.path, vectors_size)
+
+        texts_size = 0
+        if rows:
+            with open(self.index_path, 'rb') as f:
+                f.seek((rows - 1) * INDEX_DTYPE.itemsize)
+                last = np.frombuffer(f.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)[0]
+            texts_size = int(last['text_offset']) + int(last['text_length'])
+        if os.path.exists(self.texts_path) and os.path.getsize(self.texts_path) > texts_size:
+            os.truncate(self.texts_path, texts_size)
+
+    def _append(self, file_path: str, data: bytes) -> None:
+        with open(file_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def add(self, embedding: np.ndarray, text: str = "") -> int:
+        return self.extend(np.asarray(embedding, dtype=np.float32).reshape(1, -1), [text])[0]
+
+    def extend(self, embeddings: np.ndarray, texts: Optional[List[str]] = None) -> range:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] == 0:
+            return range(self._size, self._size)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+        texts = texts if texts is not None else [""] * matrix.shape[0]
+
+        with self._write_lock():
+            rows = self._committed_rows()
+            dim = self._read_header()
+            if dim is None:
+                dim = matrix.shape[1]
+                with open(self.path, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, VERSION, dim))
+            if matrix.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {dim}")
+            self.dim = dim
+            self._repair(rows)
+
+            encoded = [text.encode('utf-8') for text in texts]
+            offset = os.path.getsize(self.texts_path) if os.path.exists(self.texts_path) else 0
+            records = np.zeros(len(encoded), dtype=INDEX_DTYPE)
+            for i, data in enumerate(encoded):
+                records[i] = (offset, len(data), 0)
+                offset += len(data)
+
+            # Texts and vectors first; the index record commits the rows
+            self._append(self.texts_path, b''.join(encoded))
+            self._append(self.path, matrix.tobytes())
+            self._append(self.index_path, records.tobytes())
+
+        self.refresh()
+        return range(rows, rows + matrix.shape[0])
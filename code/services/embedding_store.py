@@ -0,0 +1,115 @@
+import numpy as np
+from typing import Iterator, List, Optional
+
+
+class EmbeddingStore:
+    """
+    Growable float32 matrix of L2-normalized embeddings.
+    Rows are preallocated and capacity doubles when full, so appends are
+    amortized O(1) and a similarity scan is a single matrix-vector product.
+    """
+
+    def __init__(self, dim: Optional[int] = None, initial_capacity: int = 1024):
+        self.dim = dim
+        self.initial_capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._texts: List[str] = []
+
+        if dim is not None:
+            self._allocate(dim)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _allocate(self, dim: int) -> None:
+        """Allocate the backing matrix once the embedding dimension is known"""
+        self.dim = dim
+        self._matrix = np.zeros((self.initial_capacity, dim), dtype=np.float32)
+
+    def _grow(self) -> None:
+        """Double the capacity of the backing matrix"""
+        grown = np.zeros((self._matrix.shape[0] * 2, self.dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    @staticmethod
+    def normalize(embedding: np.ndarray) -> np.ndarray:
+        """Return the embedding as a float32 unit vector (zero vectors stay zero)"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        return vector
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the stored normalized embeddings, one per row"""
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    @property
+    def texts(self) -> List[str]:
+        return self._texts
+
+    def add(self, embedding: np.ndarray, text: str = "") -> int:
+        """Append an embedding and return its row id"""
+        vector = self.normalize(embedding)
+
+        if self._matrix is None:
+            self._allocate(vector.shape[0])
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Embedding dimension {vector.shape[0]} does not match store dimension {self.dim}")
+
+        if self._size == self._matrix.shape[0]:
+            self._grow()
+
+        row = self._size
+        self._matrix[row] = vector
+        self._texts.append(text)
+        self._size += 1
+        return row
+
+    def extend(self, embeddings: np.ndarray, texts: Optional[List[str]] = None) -> range:
+        """Append a batch of embeddings and return their row ids"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] == 0:
+            return range(self._size, self._size)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        if self._matrix is None:
+            self._allocate(matrix.shape[1])
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {self.dim}")
+
+        required = self._size + matrix.shape[0]
+        while required > self._matrix.shape[0]:
+            self._grow()
+
+        start = self._size
+        self._matrix[start:required] = matrix
+        self._texts.extend(texts if texts is not None else [""] * matrix.shape[0])
+        self._size = required
+        return range(start, required)
+
+    def text(self, row: int) -> str:
+        return self._texts[row]
+
+    def iter_texts(self, start: int = 0) -> Iterator[str]:
+        return iter(self._texts[start:])
+
+    def refresh(self) -> None:
+        """Pick up rows added outside this process; nothing to do in memory"""
+
+    def cosine_similarities(self, embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the embedding against every stored row"""
+        return self.vectors @ self.normalize(embedding)
+
+    def max_cosine_similarity(self, embedding: np.ndarray) -> Optional[float]:
+        """Highest cosine similarity against the store, or None if it is empty"""
+        if self._size == 0:
+            return None
+        return float(np.max(self.cosine_similarities(embedding)))
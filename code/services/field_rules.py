@@ -0,0 +1,164 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Field families and value patterns shared with the mock LLM backend
+CURRENCY_CODES = ("USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD")
+
+AMOUNT_FIELDS = {"amount", "transfer_amount", "funding_amount", "disbursement_amount", "new_commitment_amount"}
+DATE_FIELDS = {"effective_date", "due_date", "value_date"}
+# Accounts money leaves from / arrives at
+SOURCE_ACCOUNT_FIELDS = {"from_account", "debit_account"}
+DESTINATION_ACCOUNT_FIELDS = {"to_account", "credit_account"}
+
+# One alternative per kind of value, each with its own named groups, so a
+# request type's alternatives combine into one pattern scanned once. Label
+# words match in any case; identifiers must be upper case or digits. A bare
+# "facility" is too common a word to label a deal id, and dates never are one.
+RULE_PATTERNS = {
+    "deal": (
+        r"(?i:\b(?:deal(?:\s+(?:id|ref(?:erence)?|no\.?|number))?|facility\s+(?:id|ref(?:erence)?|no\.?|number)))"
+        r"\s*[:#]?\s*(?!\d{4}-\d{2}-\d{2}\b)"
+        r"(?P<deal>[A-Z0-9]+(?:[-/][A-Z0-9]+)+|[A-Z]*\d[A-Z0-9]{2,})\b"
+    ),
+    "amount": (
+        r"(?:\b(?P<currency>" + "|".join(CURRENCY_CODES) + r")\s?|\$\s?)"
+        r"(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(?![.,]?\d)"
+    ),
+    "date": r"\b(?P<date>\d{4}-\d{2}-\d{2})\b",
+    "account": (
+        r"(?i:\b(?:(?P<account_role>from|to|debit|credit(?:ed)?)\s+)?account(?:\s+(?:no\.?|number))?)"
+        r"\s*[:#]?\s*(?P<account>[A-Z0-9]*\d[A-Z0-9-]{3,})"
+    ),
+    "reference": (
+        r"(?i:\b(?:payment\s+)?ref(?:erence)?(?:\s+(?:no\.?|number))?)\s*[:#]?\s*"
+        r"(?P<reference>[A-Z0-9][A-Z0-9-]{3,})\b"
+    ),
+}
+
+# Amounts and dates carry no label of their own, so each field lists the
+# words that must precede its value in the same sentence
+FIELD_LABELS = {
+    "amount": r"amount|fees?|interest|principal|payment",
+    "transfer_amount": r"adjustment|move|transfer(?:red)?|amount",
+    "funding_amount": r"received|remit(?:ted)?|funding|amount",
+    "disbursement_amount": r"disburse(?:ment)?|pay\s+out|amount",
+    "new_commitment_amount": r"(?:new\s+)?commitment",
+    "effective_date": r"effective(?:\s+date)?|as\s+of|ends\s+on|settles",
+    "due_date": r"due(?:\s+date)?",
+    "value_date": r"value\s+date",
+}
+FIELD_LABEL_PATTERNS = {field: re.compile(r"\b(?:" + label + r")\b", re.IGNORECASE) for field, label in FIELD_LABELS.items()}
+# How far before a value its label may start, and where a sentence ends
+LABEL_WINDOW = 48
+SENTENCE_BREAK = re.compile(r"[.;!?]\s|\n\s*\n")
+
+
+def _single(fields: List[str], family: set) -> Optional[str]:
+    """The request type's only field of a family, or None if it has none or several"""
+    matches = [field for field in fields if field in family]
+    return matches[0] if len(matches) == 1 else None
+
+
+class FieldRuleExtractor:
+    """
+    Deterministic extraction of the formatted fields (deal id, amounts,
+    currency, accounts, ISO dates, payment reference), used to fill the
+    fields the extraction model call left empty and to check the rest.
+
+    Each request type gets one compiled pattern made of the rules its
+    fields need, and the email is scanned once with it. Every value must sit
+    next to its field's label: deal ids, accounts and references carry it
+    in their pattern, amounts and dates need a FIELD_LABELS word earlier in
+    the same sentence. A field is only resolved when the email yields
+    exactly one distinct labelled value for it.
+    """
+
+    def __init__(self, extraction_fields: Dict[str, Dict[str, List[str]]]):
+        self.targets: Dict[str, Dict[str, Optional[str]]] = {}
+        self.patterns: Dict[str, re.Pattern] = {}
+        for request_type, spec in extraction_fields.items():
+            fields = spec.get("default", [])
+            accounts = [f for f in fields if f in SOURCE_ACCOUNT_FIELDS | DESTINATION_ACCOUNT_FIELDS]
+            targets = {
+                "deal": "deal_id" if "deal_id" in fields else None,
+                "amount": _single(fields, AMOUNT_FIELDS),
+                "currency": "currency" if "currency" in fields else None,
+                "date": _single(fields, DATE_FIELDS),
+                "source_account": _single(fields, SOURCE_ACCOUNT_FIELDS),
+                "destination_account": _single(fields, DESTINATION_ACCOUNT_FIELDS),
+                # An account without a from/to word is only unambiguous if the type has one account field
+                "account": accounts[0] if len(accounts) == 1 else None,
+                "reference": "payment_reference" if "payment_reference" in fields else None,
+            }
+            kinds = [
+                kind for kind, needed in (
+                    ("deal", targets["deal"]),
+                    ("amount", targets["amount"] or targets["currency"]),
+                    ("date", targets["date"]),
+                    ("account", accounts),
+                    ("reference", targets["reference"]),
+                ) if needed
+            ]
+            if kinds:
+                self.targets[request_type] = targets
+                self.patterns[request_type] = re.compile("|".join(RULE_PATTERNS[kind] for kind in kinds))
+
+    def extract(self, email_content: str, request_type: str) -> Dict[str, Any]:
+        """Fields resolved by the rules; fields not in the result need the model"""
+        pattern = self.patterns.get(request_type)
+        if pattern is None:
+            return {}
+        targets = self.targets[request_type]
+
+        candidates: Dict[str, set] = {}
+        for match in pattern.finditer(email_content):
+            for field, value in self._values(match.groupdict(), targets):
+                if field is None or value is None:
+                    continue
+                if field in FIELD_LABEL_PATTERNS and not self._labelled(email_content, match.start(), field):
+                    continue
+                candidates.setdefault(field, set()).add(value)
+        return {field: values.pop() for field, values in candidates.items() if len(values) == 1}
+
+    @staticmethod
+    def agrees(model_value: Any, rule_value: Any) -> bool:
+        """Whether a model-extracted value matches the rule value, ignoring formatting"""
+        if isinstance(rule_value, float):
+            try:
+                return float(str(model_value).replace(",", "")) == rule_value
+            except ValueError:
+                return False
+        return str(model_value).strip().upper() == str(rule_value).upper()
+
+    @staticmethod
+    def _labelled(email_content: str, start: int, field: str) -> bool:
+        """Whether the field's label precedes the value at `start` in the same sentence"""
+        window = email_content[max(0, start - LABEL_WINDOW):start]
+        sentence = SENTENCE_BREAK.split(window)[-1]
+        return FIELD_LABEL_PATTERNS[field].search(sentence) is not None
+
+    @staticmethod
+    def _values(groups: Dict[str, Optional[str]], targets: Dict[str, Optional[str]]) -> Iterator[Tuple[Optional[str], Any]]:
+        if groups.get("deal"):
+            yield targets["deal"], groups["deal"]
+        elif groups.get("amount"):
+            yield targets["amount"], float(groups["amount"].replace(",", ""))
+            # A bare $ amount is taken as USD
+            yield targets["currency"], groups["currency"] or "USD"
+        elif groups.get("date"):
+            try:
+                datetime.strptime(groups["date"], "%Y-%m-%d")
+            except ValueError:
+                return
+            yield targets["date"], groups["date"]
+        elif groups.get("account"):
+            role = (groups["account_role"] or "").lower()
+            if role in ("from", "debit"):
+                yield targets["source_account"], groups["account"]
+            elif role:
+                yield targets["destination_account"], groups["account"]
+            else:
+                yield targets["account"], groups["account"]
+        elif groups.get("reference"):
+            yield targets["reference"], groups["reference"]
@@ -0,0 +1,320 @@
+import atexit
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from config.constants import REQUEST_TYPE_KEYWORDS
+from config.job_queue_config import JobQueueConfig
+from services.email_classifier import get_email_classifier
+from services.metrics import registry
+from services.serialization import dumps
+
+# Lane name -> priority; lower runs first
+LANES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFull(Exception):
+    """The queue is at its pending-job limit; the client should retry later"""
+
+
+class PermanentJobError(Exception):
+    """Raised by a job's process function when retrying cannot help; the job fails at once"""
+
+
+def guess_request_type(email_content: str) -> Optional[str]:
+    """Keyword guess at the request type, only used to pick a lane before the model runs"""
+    text = email_content.lower()
+    for request_type, keywords in REQUEST_TYPE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return request_type
+    return None
+
+
+class JobQueue:
+    """
+    Durable queue of emails waiting for the classification pipeline.
+
+    Jobs live in a SQLite file, so every worker process on the host shares
+    one queue and queued work survives a restart. Worker threads claim the
+    highest-priority, oldest job in a single UPDATE ... RETURNING, run it
+    and store the result for polling. Enqueueing is refused once
+    `max_pending` jobs are waiting, and an idempotency key (by default a
+    digest of the email) maps retried submissions to the original job while
+    it is queued, running or done; a failed or dead job gives up its key so
+    the email can be submitted again.
+    Jobs whose worker died are requeued once their lease expires, or marked
+    dead if that was their last attempt.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(
+        self,
+        path: str,
+        process: Callable[[str], Any],
+        workers: int = 2,
+        max_pending: int = 1000,
+        max_attempts: int = 3,
+        lease_seconds: float = 300,
+        result_ttl_seconds: float = 86400,
+        high_priority_types: Optional[List[str]] = None
+    ):
+        self.path = path
+        self.process = process
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.high_priority_types = set(high_priority_types or [])
+        self.stats = {"enqueued": 0, "idempotent_hits": 0, "rejected": 0, "completed": 0, "failed": 0, "retried": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, status TEXT NOT NULL, lane TEXT NOT NULL, '
+            'priority INTEGER NOT NULL, filename TEXT, email_content TEXT, result TEXT, error TEXT, '
+            'attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, available_at REAL NOT NULL, '
+            'started_at REAL, finished_at REAL)'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (status, priority, available_at, created_at)'
+        )
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        # Started on first use so no threads exist before a server forks
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the workers after their current job; queued jobs stay queued"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def lane_for(self, email_content: str, requested: Optional[str] = None) -> str:
+        if requested:
+            if requested not in LANES:
+                raise ValueError(f"Unknown priority {requested}; use one of {', '.join(LANES)}")
+            return requested
+        return "high" if guess_request_type(email_content) in self.high_priority_types else "normal"
+
+    def enqueue(
+        self,
+        email_content: str,
+        filename: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue an email; returns its job with `created` False when the
+        idempotency key matched an existing job. Raises QueueFull at the limit.
+        """
+        key = idempotency_key or hashlib.sha256(email_content.encode('utf-8')).hexdigest()
+        lane = self.lane_for(email_content, priority)
+        now = time.time()
+        job_id = str(uuid.uuid4())
+
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                existing = self._db.execute(
+                    'SELECT id, status FROM jobs WHERE idempotency_key = ?', (key,)
+                ).fetchone()
+                if existing is not None and existing[1] in ('failed', 'dead'):
+                    # Resubmitting a failed email starts a new job; the old one keeps its error
+                    self._db.execute('UPDATE jobs SET idempotency_key = NULL WHERE id = ?', (existing[0],))
+                    existing = None
+                if existing is None:
+                    pending = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                    if pending >= self.max_pending:
+                        self.stats["rejected"] += 1
+                        raise QueueFull(f"{pending} jobs are already queued")
+                    self._db.execute(
+                        "INSERT INTO jobs (id, idempotency_key, status, lane, priority, filename, email_content, "
+                        "created_at, available_at) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+                        (job_id, key, lane, LANES[lane], filename, email_content, now, now)
+                    )
+                    self.stats["enqueued"] += 1
+                else:
+                    job_id = existing[0]
+                    self.stats["idempotent_hits"] += 1
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+        self.start()
+        self._wakeup.set()
+        job = self.get(job_id)
+        job["created"] = existing is None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job; the result is included once it is done"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT id, status, lane, priority, filename, result, error, attempts, created_at, started_at, '
+                'finished_at FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = {
+                "job_id": row[0],
+                "status": row[1],
+                "lane": row[2],
+                "filename": row[4],
+                "attempts": row[7],
+                "created_at": row[8],
+                "started_at": row[9],
+                "finished_at": row[10]
+            }
+            if row[1] == 'queued':
+                job["queue_position"] = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND created_at < ?))",
+                    (row[3], row[3], row[8])
+                ).fetchone()[0] + 1
+        if row[5] is not None:
+            job["result"] = json.loads(row[5])
+        if row[6] is not None:
+            job["error"] = row[6]
+        return job
+
+    def _claim(self) -> Optional[tuple]:
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                # Jobs whose worker died mid-run go back to the queue, unless
+                # they have used up their attempts
+                self._db.execute(
+                    "UPDATE jobs SET status = 'dead', error = ?, finished_at = ?, email_content = NULL "
+                    "WHERE status = 'running' AND started_at < ? AND attempts >= ?",
+                    ('Lease expired on the final attempt', now, now - self.lease_seconds, self.max_attempts)
+                )
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ? WHERE status = 'running' AND started_at < ?",
+                    (now, now - self.lease_seconds)
+                )
+                row = self._db.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                    "ORDER BY priority, created_at LIMIT 1) "
+                    "RETURNING id, email_content, attempts",
+                    (now, now)
+                ).fetchone()
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None,
+                retry_at: Optional[float] = None) -> None:
+        with self._lock:
+            if retry_at is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, error = ? WHERE id = ?",
+                    (retry_at, error, job_id)
+                )
+                self.stats["retried"] += 1
+                return
+            # The email is no longer needed once the job is settled
+            self._db.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, email_content = NULL WHERE id = ?',
+                (status, result, error, time.time(), job_id)
+            )
+            self.stats["completed" if status == 'done' else "failed"] += 1
+            if (self.stats["completed"] + self.stats["failed"]) % self.PURGE_EVERY == 0:
+                self._db.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'failed', 'dead') AND finished_at < ?",
+                    (time.time() - self.result_ttl_seconds,)
+                )
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue claim failed: {str(e)}")
+                claimed = None
+            if claimed is None:
+                # Other processes enqueue too, so poll as well as wait to be woken
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+                continue
+
+            job_id, email_content, attempts = claimed
+            try:
+                result = self.process(email_content)
+                if not result:
+                    raise PermanentJobError('Failed to process email')
+                self._finish(job_id, 'done', result=dumps(result).decode('utf-8'))
+            except PermanentJobError as e:
+                self._finish(job_id, 'failed', error=str(e))
+            except Exception as e:
+                print(f"Job {job_id} attempt {attempts} failed: {str(e)}")
+                if attempts < self.max_attempts:
+                    self._finish(job_id, 'queued', error=str(e),
+                                 retry_at=time.time() + random.uniform(0, min(60, 2 ** attempts)))
+                else:
+                    self._finish(job_id, 'failed', error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            lanes = dict(self._db.execute(
+                "SELECT lane, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY lane"
+            ).fetchall())
+            stats = dict(self.stats)
+        for status in ('queued', 'running', 'done', 'failed', 'dead'):
+            stats[status] = counts.get(status, 0)
+        for lane in LANES:
+            stats[f"queued_{lane}"] = lanes.get(lane, 0)
+        stats["workers"] = len(self._threads)
+        return stats
+
+
+_shared_queue: Optional[JobQueue] = None
+_shared_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue feeding the shared classifier"""
+    global _shared_queue
+    if _shared_queue is None:
+        with _shared_queue_lock:
+            if _shared_queue is None:
+                _shared_queue = JobQueue(
+                    JobQueueConfig.PATH,
+                    process=lambda email_content: get_email_classifier().process_email_content(email_content),
+                    workers=JobQueueConfig.WORKERS,
+                    max_pending=JobQueueConfig.MAX_PENDING,
+                    max_attempts=JobQueueConfig.MAX_ATTEMPTS,
+                    lease_seconds=JobQueueConfig.LEASE_SECONDS,
+                    result_ttl_seconds=JobQueueConfig.RESULT_TTL_SECONDS,
+                    high_priority_types=JobQueueConfig.HIGH_PRIORITY_TYPES
+                )
+                atexit.register(_shared_queue.close)
+                registry.add_collector("job_queue", _shared_queue.get_stats)
+                # Pick up jobs left queued by an earlier run
+                _shared_queue.start()
+    return _shared_queue
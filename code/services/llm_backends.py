@@ -0,0 +1,218 @@
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from config.constants import REQUEST_TYPE_KEYWORDS, SUB_REQUEST_TYPE_KEYWORDS
+from config.llm_config import LLMConfig
+from services.field_rules import (
+    AMOUNT_FIELDS, DATE_FIELDS, DESTINATION_ACCOUNT_FIELDS, RULE_PATTERNS, SOURCE_ACCOUNT_FIELDS
+)
+
+
+class LLMResponse:
+    """Minimal response object exposing `.text`, like the Gemini SDK response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LLMBackend(ABC):
+    """Text-in/text-out model interface used by EmailClassifierService"""
+
+    name = "base"
+
+    def __init__(self, model_name: str, temperature: float):
+        self.model_name = model_name
+        self.temperature = temperature
+
+    @abstractmethod
+    def generate_content(self, prompt: str, timeout: Optional[float] = None) -> LLMResponse:
+        """Answer one prompt; `timeout` bounds the remote call in seconds"""
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+        from config.gemini_config import GeminiConfig
+
+        super().__init__(GeminiConfig.MODEL_NAME, GeminiConfig.TEMPERATURE)
+        genai.configure(api_key=GeminiConfig.API_KEY)
+        self.model = genai.GenerativeModel(
+            model_name=GeminiConfig.MODEL_NAME,
+            generation_config={
+                "temperature": GeminiConfig.TEMPERATURE,
+                "top_p": 1,
+                "top_k": 1,
+                "max_output_tokens": 2048,
+            }
+        )
+
+    def generate_content(self, prompt: str, timeout: Optional[float] = None) -> LLMResponse:
+        # Forwarded to the underlying API client call as its deadline
+        options = {"timeout": timeout} if timeout else {}
+        return LLMResponse(self.model.generate_content(prompt, **options).text)
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self):
+        from config.openai_config import OpenAIConfig
+        try:
+            from openai import OpenAI
+        except ImportError:
+            raise ValueError("The openai package is required for LLM_BACKEND=openai. Install it with: pip install openai")
+
+        OpenAIConfig.validate_config()
+        super().__init__(OpenAIConfig.MODEL_NAME, OpenAIConfig.TEMPERATURE)
+        self.client = OpenAI(api_key=OpenAIConfig.API_KEY)
+
+    def generate_content(self, prompt: str, timeout: Optional[float] = None) -> LLMResponse:
+        completion = self.client.chat.completions.create(
+            model=self.model_name,
+            temperature=self.temperature,
+            max_tokens=2048,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout
+        )
+        return LLMResponse(completion.choices[0].message.content or "")
+
+
+class MockBackendError(RuntimeError):
+    """Injected failure from the mock backend"""
+
+
+class MockBackend(LLMBackend):
+    """
+    Offline, deterministic stand-in for load testing.
+    Recognises the classification, extraction and combined prompts, answers
+    them with keyword rules and regular expressions over the email content,
+    and can simulate model latency and inject errors.
+    """
+
+    name = "mock"
+
+    EMAIL_CONTENT = re.compile(r'Email Content:\s*\n(.*?)\n\s*\n\s*(?:Important Instructions|Required Fields|Instructions):', re.DOTALL)
+    REQUIRED_FIELDS = re.compile(r'Required Fields for [^:\n]*:\s*(\[.*?\])', re.DOTALL)
+    FIELDS_BY_TYPE = re.compile(r'Fields to extract for each request type:\s*(\{.*?\n\s*\})', re.DOTALL)
+
+    # The same value patterns as the rule extractor; the mock takes the first match of each
+    DEAL_ID = re.compile(RULE_PATTERNS["deal"])
+    AMOUNT = re.compile(RULE_PATTERNS["amount"])
+    DATE = re.compile(RULE_PATTERNS["date"])
+    ACCOUNT = re.compile(RULE_PATTERNS["account"])
+    REFERENCE = re.compile(RULE_PATTERNS["reference"])
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        latency_jitter_ms: float = 0,
+        error_rate: float = 0,
+        seed: Optional[int] = None
+    ):
+        super().__init__("mock-rules", 0.0)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, timeout: Optional[float] = None) -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_ms + self._random.uniform(0, self.latency_jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if timeout and delay / 1000 > timeout:
+            # Behave like a client whose request deadline expired
+            time.sleep(timeout)
+            raise TimeoutError(f"Mock LLM call exceeded {timeout}s")
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if fail:
+            raise MockBackendError("Injected mock LLM failure")
+        return LLMResponse(json.dumps(self.respond(prompt)))
+
+    def respond(self, prompt: str) -> Dict[str, Any]:
+        match = self.EMAIL_CONTENT.search(prompt)
+        email_content = match.group(1) if match else prompt
+
+        fields_by_type = self.FIELDS_BY_TYPE.search(prompt)
+        if fields_by_type:
+            result = self.classify(email_content)
+            fields = json.loads(fields_by_type.group(1)).get(result["request_type"], [])
+            result["extracted_fields"] = self.extract(email_content, fields)
+            return result
+
+        required_fields = self.REQUIRED_FIELDS.search(prompt)
+        if required_fields:
+            return self.extract(email_content, json.loads(required_fields.group(1)))
+
+        return self.classify(email_content)
+
+    def classify(self, email_content: str) -> Dict[str, Any]:
+        text = email_content.lower()
+        request_type, hits = "Adjustment", 0
+        for candidate, keywords in REQUEST_TYPE_KEYWORDS:
+            hits = sum(text.count(keyword) for keyword in keywords)
+            if hits:
+                request_type = candidate
+                break
+
+        sub_request_type = None
+        for candidate, keywords in SUB_REQUEST_TYPE_KEYWORDS.get(request_type, []):
+            if any(keyword in text for keyword in keywords):
+                sub_request_type = candidate
+                break
+
+        return {
+            "request_type": request_type,
+            "sub_request_type": sub_request_type,
+            "confidence_score": round(min(0.95, 0.5 + 0.15 * hits), 2),
+            "reason": "Mock backend keyword match"
+        }
+
+    def extract(self, email_content: str, fields: List[str]) -> Dict[str, Any]:
+        amount = self.AMOUNT.search(email_content)
+        date = self.DATE.search(email_content)
+        values = {
+            "deal_id": self._group(self.DEAL_ID.search(email_content), "deal"),
+            "currency": (amount.group("currency") or "USD") if amount else None,
+            "payment_reference": self._group(self.REFERENCE.search(email_content), "reference"),
+        }
+        accounts = [m.group("account") for m in self.ACCOUNT.finditer(email_content)]
+
+        result = {}
+        for field in fields:
+            if field in AMOUNT_FIELDS:
+                result[field] = float(amount.group("amount").replace(',', '')) if amount else None
+            elif field in DATE_FIELDS:
+                result[field] = date.group("date") if date else None
+            elif field in SOURCE_ACCOUNT_FIELDS:
+                result[field] = accounts[0] if accounts else None
+            elif field in DESTINATION_ACCOUNT_FIELDS:
+                result[field] = accounts[-1] if accounts else None
+            else:
+                result[field] = values.get(field)
+        return result
+
+    @staticmethod
+    def _group(match, name: str) -> Optional[str]:
+        return match.group(name) if match else None
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """Build the model backend selected by name (defaults to LLM_BACKEND)"""
+    name = (name or LLMConfig.BACKEND).lower()
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "mock":
+        return MockBackend(**LLMConfig.mock_options())
+    raise ValueError(f"Unknown LLM backend '{name}'. Expected 'gemini', 'openai' or 'mock'")
@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Optional
+from services.llm_backends import MockBackendError
+from services.metrics import count
+
+# HTTP statuses worth retrying: request timeout, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Timeout, rate-limit and transient errors raised by the Gemini and OpenAI clients
+RETRYABLE_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "DeadlineExceeded", "ResourceExhausted", "ServiceUnavailable", "TooManyRequests"
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, rate limits and transient server or connection errors"""
+    if isinstance(error, (TimeoutError, ConnectionError, MockBackendError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in RETRYABLE_STATUS_CODES
+
+
+class RateLimiter:
+    """Token bucket holding a requests-per-minute budget; 0 disables limiting"""
+
+    def __init__(self, requests_per_minute: float = 0):
+        self.requests_per_minute = requests_per_minute
+        self.capacity = max(1.0, requests_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds spent waiting"""
+        if self.requests_per_minute <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.requests_per_minute / 60)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) * 60 / self.requests_per_minute
+            time.sleep(delay)
+            waited += delay
+
+
+class LLMRunner:
+    """
+    Runs model calls on a bounded thread pool with per-call timeouts,
+    retries with full-jitter exponential backoff and a shared
+    requests-per-minute budget.
+
+    The timeout starts when a worker begins the call, not while it waits in
+    the pool, and is also passed to the backend so the client library
+    abandons the request and frees the worker. Only timeouts, rate limits
+    and transient errors are retried; anything else fails at once.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        requests_per_minute: float = 0
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        # Time spent inside the model backend vs in our own code
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "model_seconds": 0.0,
+            "rate_limit_wait_seconds": 0.0
+        }
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _call(self, prompt: str, started: threading.Event) -> Any:
+        try:
+            waited = self.rate_limiter.acquire()
+        finally:
+            started.set()
+        start = time.perf_counter()
+        try:
+            return self.model.generate_content(prompt, timeout=self.timeout)
+        finally:
+            with self._stats_lock:
+                self.stats["calls"] += 1
+                self.stats["model_seconds"] += time.perf_counter() - start
+                self.stats["rate_limit_wait_seconds"] += waited
+
+    def generate(self, prompt: str) -> Any:
+        """Call the model, blocking the caller until a response or the final failure"""
+        attempt = 0
+        while True:
+            started = threading.Event()
+            future = self._executor.submit(self._call, prompt, started)
+            # Time the call from when a worker picks it up, not from queueing
+            started.wait()
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                error = TimeoutError(f"Model call timed out after {self.timeout}s")
+            except Exception as e:
+                error = e
+            count("llm_errors_total", help="Failed model call attempts by error type", error=type(error).__name__)
+            if isinstance(error, TimeoutError):
+                with self._stats_lock:
+                    self.stats["timeouts"] += 1
+
+            if attempt >= self.max_retries or not is_retryable(error):
+                with self._stats_lock:
+                    self.stats["failures"] += 1
+                raise error
+            with self._stats_lock:
+                self.stats["retries"] += 1
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["model_seconds"] = round(stats["model_seconds"], 4)
+        stats["rate_limit_wait_seconds"] = round(stats["rate_limit_wait_seconds"], 4)
+        stats["backend"] = getattr(self.model, "name", type(self.model).__name__)
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
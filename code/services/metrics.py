@@ -0,0 +1,242 @@
+import bisect
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from config.metrics_config import MetricsConfig
+
+# Seconds; covers sub-millisecond parsing up to slow model calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by name and labels, rendered in the
+    Prometheus text format. Collectors registered with `add_collector`
+    are called at scrape time and turn existing get_stats() dicts into
+    gauges, so components keep their own counters.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Optional[Dict[str, Any]]]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, help: str = "", **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", buckets=LATENCY_BUCKETS, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+            if help:
+                self._help.setdefault(name, help)
+
+    def add_collector(self, prefix: str, collect: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """collect() returns a stats dict (or None to skip); numeric values become `<prefix>_<key>` gauges"""
+        with self._lock:
+            self._collectors = [c for c in self._collectors if c[0] != prefix] + [(prefix, collect)]
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            collectors = list(self._collectors)
+
+        for name in sorted(counters):
+            self._header(lines, name, "counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {_number(value)}")
+
+        for name in sorted(histograms):
+            self._header(lines, name, "histogram")
+            for labels, (counts, total, count, buckets) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for prefix, collect in collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                print(f"Metrics collector {prefix} failed: {str(e)}")
+                continue
+            for key, value in sorted((stats or {}).items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+registry = MetricsRegistry()
+
+
+class RequestTrace:
+    """Stage timings of one request, for the slow-request log"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages: List[Tuple[str, float]] = []
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def stage(name: str, **labels) -> Iterator[None]:
+    """Time a pipeline stage into email_pipeline_stage_seconds and the current request trace"""
+    if not MetricsConfig.ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(
+            "email_pipeline_stage_seconds", elapsed, help="Time spent per pipeline stage", stage=name, **labels
+        )
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages.append((f"{name}:{labels['call']}" if 'call' in labels else name, round(elapsed * 1000, 3)))
+
+
+def count(name: str, help: str = "", **labels) -> None:
+    if MetricsConfig.ENABLED:
+        registry.inc(name, help=help, **labels)
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a helper
+    thread, counting identical stacks. The sampled thread runs unmodified;
+    the cost is one sys._current_frames() call per interval.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        total = sum(self.samples.values())
+        return [
+            {"share": round(hits / total, 3), "samples": hits, "stack": list(stack[-12:])}
+            for stack, hits in self.samples.most_common(n)
+        ]
+
+
+@contextmanager
+def trace_request(endpoint: str) -> Iterator[RequestTrace]:
+    """
+    Time a whole request and collect its stage timings; slow requests are
+    logged with the breakdown and, if this request was sampled, its hottest stacks
+    """
+    trace = RequestTrace(endpoint)
+    if not MetricsConfig.ENABLED:
+        yield trace
+        return
+
+    token = _current_trace.set(trace)
+    sampler = None
+    if MetricsConfig.PROFILE_SAMPLE_RATE > 0 and random.random() < MetricsConfig.PROFILE_SAMPLE_RATE:
+        sampler = StackSampler(threading.get_ident(), MetricsConfig.PROFILE_INTERVAL_MS / 1000).start()
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_trace.reset(token)
+        if sampler is not None:
+            sampler.stop()
+        registry.observe("http_request_seconds", elapsed, help="Request latency per endpoint", endpoint=endpoint)
+        if elapsed * 1000 >= MetricsConfig.SLOW_REQUEST_MS:
+            count("slow_requests_total", help="Requests slower than METRICS_SLOW_REQUEST_MS", endpoint=endpoint)
+            entry = {"slow_request": endpoint, "ms": round(elapsed * 1000, 1), "stages_ms": trace.stages}
+            if sampler is not None:
+                entry["profile"] = sampler.top(MetricsConfig.PROFILE_TOP_STACKS)
+            print(json.dumps(entry))
@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from config.preclassifier_config import PreClassifierConfig
+from services.duplicate_detector import EMBEDDING_MODEL_NAME
+from services.embedding_store import EmbeddingStore
+from services.metrics import count, registry
+
+# (request_type, sub_request_type)
+Label = Tuple[str, Optional[str]]
+
+
+class NearestCentroidClassifier:
+    """
+    One L2-normalized mean embedding per (request type, sub-request type).
+    An email gets the label of its most similar centroid; the confidence is
+    the softmax of all centroid similarities at `temperature`, so it is only
+    high when one label is clearly closer than every other.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        labels: List[Label],
+        counts: Sequence[int],
+        temperature: float = 0.05,
+        embedding_model: str = EMBEDDING_MODEL_NAME,
+        trained_at: Optional[float] = None
+    ):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.labels = list(labels)
+        self.counts = [int(n) for n in counts]
+        self.temperature = temperature
+        self.embedding_model = embedding_model
+        self.trained_at = trained_at if trained_at is not None else time.time()
+
+    @classmethod
+    def fit(
+        cls,
+        vectors: np.ndarray,
+        labels: Sequence[Label],
+        temperature: float = 0.05,
+        min_examples: int = 1
+    ) -> "NearestCentroidClassifier":
+        """Average the normalized embeddings of each label; labels with fewer than `min_examples` are left out"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        rows_by_label: Dict[Label, List[int]] = {}
+        for row, label in enumerate(labels):
+            rows_by_label.setdefault(label, []).append(row)
+
+        kept = sorted(
+            (label for label, rows in rows_by_label.items() if len(rows) >= min_examples),
+            key=lambda label: (label[0], label[1] or "")
+        )
+        if not kept:
+            raise ValueError(f"No label has at least {min_examples} examples")
+
+        centroids = np.stack([
+            EmbeddingStore.normalize(vectors[rows_by_label[label]].mean(axis=0)) for label in kept
+        ])
+        return cls(centroids, kept, [len(rows_by_label[label]) for label in kept], temperature)
+
+    def predict_many(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Label index, confidence and centroid similarity of each row"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        similarities = (vectors / norms) @ self.centroids.T
+        best = np.argmax(similarities, axis=1)
+        # Softmax over centroids, shifted by the best similarity for stability
+        top = similarities[np.arange(len(best)), best]
+        weights = np.exp((similarities - top[:, None]) / self.temperature)
+        confidences = 1.0 / weights.sum(axis=1)
+        return best, confidences, top
+
+    def predict(self, vector: np.ndarray) -> Tuple[Label, float, float]:
+        """(label, confidence, centroid similarity) of one embedding"""
+        best, confidences, top = self.predict_many(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        return self.labels[int(best[0])], float(confidences[0]), float(top[0])
+
+    def save(self, path: str) -> None:
+        """Write the model with a rename, so workers never load a partial file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            request_types=np.array([label[0] for label in self.labels]),
+            sub_request_types=np.array([label[1] or "" for label in self.labels]),
+            counts=np.array(self.counts, dtype=np.int64),
+            temperature=np.array(self.temperature),
+            embedding_model=np.array(self.embedding_model),
+            trained_at=np.array(self.trained_at)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearestCentroidClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            labels = [
+                (str(request_type), str(sub_request_type) or None)
+                for request_type, sub_request_type in zip(data["request_types"], data["sub_request_types"])
+            ]
+            return cls(
+                data["centroids"],
+                labels,
+                data["counts"].tolist(),
+                temperature=float(data["temperature"]),
+                embedding_model=str(data["embedding_model"]),
+                trained_at=float(data["trained_at"])
+            )
+
+
+class PreClassifier:
+    """
+    Serves the trained model from disk ahead of the classification model
+    call. The file is re-read when its mtime changes, so retraining takes
+    effect in running workers without a restart.
+    """
+
+    def __init__(self, path: str, threshold: float):
+        self.path = path
+        self.threshold = threshold
+        self.model: Optional[NearestCentroidClassifier] = None
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {"predictions": 0, "confident": 0, "reloads": 0, "load_errors": 0}
+
+    def _current_model(self) -> Optional[NearestCentroidClassifier]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return self.model
+
+        with self._lock:
+            if mtime != self._mtime:
+                model = None
+                if mtime is not None:
+                    try:
+                        model = NearestCentroidClassifier.load(self.path)
+                        if model.embedding_model != EMBEDDING_MODEL_NAME:
+                            print(f"Ignoring pre-classifier trained on {model.embedding_model} embeddings")
+                            model = None
+                        else:
+                            self.stats["reloads"] += 1
+                    except Exception as e:
+                        print(f"Failed to load pre-classifier {self.path}: {str(e)}")
+                        self.stats["load_errors"] += 1
+                self.model = model
+                self._mtime = mtime
+        return self.model
+
+    def classify(self, vector: Optional[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Classification result shaped like the model's, or None when unsure or untrained"""
+        model = self._current_model()
+        if model is None or vector is None:
+            return None
+
+        (request_type, sub_request_type), confidence, similarity = model.predict(vector)
+        self.stats["predictions"] += 1
+        confident = confidence >= self.threshold
+        count("preclassifier_predictions_total", help="Pre-classifier predictions by outcome",
+              result="confident" if confident else "deferred")
+        if not confident:
+            return None
+        self.stats["confident"] += 1
+        return {
+            "request_type": request_type,
+            "sub_request_type": sub_request_type,
+            "confidence_score": round(confidence, 4),
+            "classified_by": "preclassifier",
+            "reason": f"Closest to the stored {request_type} examples (local pre-classifier, "
+                      f"centroid similarity {similarity:.3f})"
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["hit_rate"] = round(stats["confident"] / stats["predictions"], 4) if stats["predictions"] else 0.0
+        stats["labels"] = len(self.model.labels) if self.model is not None else 0
+        return stats
+
+
+_shared_pre_classifier: Optional[PreClassifier] = None
+_shared_pre_classifier_lock = threading.Lock()
+
+def get_pre_classifier() -> PreClassifier:
+    """Process-wide pre-classifier reading PRECLASSIFIER_MODEL_PATH"""
+    global _shared_pre_classifier
+    if _shared_pre_classifier is None:
+        with _shared_pre_classifier_lock:
+            if _shared_pre_classifier is None:
+                _shared_pre_classifier = PreClassifier(
+                    PreClassifierConfig.MODEL_PATH, PreClassifierConfig.CONFIDENCE_THRESHOLD
+                )
+                registry.add_collector("preclassifier", _shared_pre_classifier.get_stats)
+    return _shared_pre_classifier
@@ -0,0 +1,93 @@
+import hashlib
+import re
+from typing import Callable, List
+
+# Marks where the email goes while a template is compiled
+_EMAIL_SLOT = "\x00EMAIL\x00"
+
+# Rough size of a token in English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+class PromptTemplate:
+    """
+    A prompt compiled once: the text before and after the email content plus
+    a version id derived from that text, so editing a template invalidates
+    cached model responses without a manual version bump
+    """
+
+    def __init__(self, name: str, build: Callable[[str], str]):
+        self.name = name
+        self.prefix, self.suffix = build(_EMAIL_SLOT).split(_EMAIL_SLOT)
+        digest = hashlib.sha256(f"{self.prefix}{_EMAIL_SLOT}{self.suffix}".encode('utf-8')).hexdigest()
+        self.version = f"{name}:{digest[:12]}"
+
+    def render(self, email_content: str) -> str:
+        return f"{self.prefix}{email_content}{self.suffix}"
+
+
+class EmailTrimmer:
+    """
+    Cuts the email text sent to the model down to what matters: quoted reply
+    chains and the sign-off/signature/disclaimer block are dropped from the
+    body, and the whole text is capped at `max_tokens` (estimated), keeping
+    the beginning. Attachment text appended by DocumentExtractor is kept
+    as is, within the budget.
+    """
+
+    ATTACHMENT_SECTION = re.compile(r'\n\nAttachment [^\n]*:\n')
+    REPLY_HEADER = re.compile(r'^(?:On\b.*\bwrote:|-{2,}\s*Original Message\s*-{2,})$', re.IGNORECASE)
+    OUTLOOK_HEADER = re.compile(r'^\*?From:\*?\s')
+    OUTLOOK_SENT = re.compile(r'^\*?(?:Sent|Date):\*?\s')
+    SIGN_OFF = re.compile(
+        r'^(?:--|(?:(?:best|kind|warm|many)\s+)?(?:regards|thanks(?:\s*(?:&|and)\s*regards)?|thank you|sincerely|cheers)[,.!]?'
+        r'|sent from my\b.*)$',
+        re.IGNORECASE
+    )
+    # Longer tails after a sign-off are more likely content than a signature
+    MAX_SIGNATURE_LINES = 25
+
+    def __init__(self, max_tokens: int = 3000, strip_replies: bool = True, strip_signatures: bool = True):
+        self.max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+        self.strip_replies = strip_replies
+        self.strip_signatures = strip_signatures
+
+    def trim(self, email_content: str) -> str:
+        attachments = self.ATTACHMENT_SECTION.search(email_content)
+        if attachments:
+            body, rest = email_content[:attachments.start()], email_content[attachments.start():]
+        else:
+            body, rest = email_content, ""
+
+        lines = body.split('\n')
+        if self.strip_replies:
+            lines = self._strip_replies(lines)
+        if self.strip_signatures:
+            lines = self._strip_signature(lines)
+        text = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).rstrip() + rest
+
+        if self.max_chars and len(text) > self.max_chars:
+            cut = text.rfind('\n', 0, self.max_chars)
+            text = text[:cut if cut > self.max_chars // 2 else self.max_chars].rstrip() + "\n[...]"
+        return text
+
+    def _strip_replies(self, lines: List[str]) -> List[str]:
+        kept = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if self.REPLY_HEADER.match(stripped) or (
+                self.OUTLOOK_HEADER.match(stripped)
+                and any(self.OUTLOOK_SENT.match(following.strip()) for following in lines[i + 1:i + 4])
+            ):
+                # Everything below the first reply header is the quoted thread
+                break
+            if not stripped.startswith('>'):
+                kept.append(line)
+        return kept
+
+    def _strip_signature(self, lines: List[str]) -> List[str]:
+        # Skip the "Subject:" line and the start of the body
+        for i in range(2, len(lines)):
+            if self.SIGN_OFF.match(lines[i].strip()) and len(lines) - i <= self.MAX_SIGNATURE_LINES:
+                return lines[:i]
+        return lines
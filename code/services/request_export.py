@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+# Export format -> response content type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+CSV_FIELDS = [
+    "id", "request_type", "sub_request_type", "deal_id", "extracted_fields",
+    "confidence_score", "team_assigned", "status", "created_at", "updated_at"
+]
+
+# Lines are grouped into chunks of about this many characters before being written out
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """One JSON object per line"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Header plus one CSV line per row; extracted_fields is embedded as JSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(CSV_FIELDS)
+    for row in rows:
+        values = [row.get(field) for field in CSV_FIELDS]
+        values[CSV_FIELDS.index("extracted_fields")] = json.dumps(row.get("extracted_fields"), ensure_ascii=False)
+        yield line(values)
+
+
+def iter_export(rows: Iterable[Dict[str, Any]], export_format: str = "ndjson") -> Iterator[str]:
+    """Serialize rows lazily, yielding chunks of roughly CHUNK_SIZE characters"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}'. Expected one of: {', '.join(EXPORT_FORMATS)}")
+    lines = iter_ndjson(rows) if export_format == "ndjson" else iter_csv(rows)
+
+    chunk, size = [], 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
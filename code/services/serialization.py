@@ -0,0 +1,33 @@
+import json
+from datetime import date, datetime
+from typing import Any
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    # ServiceRequest and anything else exposing to_dict
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize to UTF-8 JSON, using orjson when it is installed
+    Datetimes are written in ISO 8601 and objects with to_dict() are expanded
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """Flask response with the body produced by dumps()"""
+    return Response(dumps(obj), status=status, mimetype='application/json')
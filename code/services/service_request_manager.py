@@ -1,13 +1,43 @@
-from typing import Dict, Any, Optional, List
-from sqlalchemy.orm import Session
+import atexit
+import base64
+import json
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, Iterator, Optional, List, Tuple
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models.service_request import ServiceRequest
 from models.db_models import ServiceRequestDB
-from services.duplicate_detector import DuplicateDetectorService
-from config.database import SessionLocal
+from services.duplicate_detector import DuplicateDetectorService, EmailEmbedding, get_duplicate_detector
+from services.write_behind import WriteBehindQueue
+from services.metrics import registry, stage
+from config.database import IS_SQLITE, db_session
+from config.persistence_config import PersistenceConfig
 
 class ServiceRequestManager:
-    def __init__(self):
-        self.duplicate_detector = DuplicateDetectorService()
+    def __init__(
+        self,
+        duplicate_detector: Optional[DuplicateDetectorService] = None,
+        writer: Optional[WriteBehindQueue] = None
+    ):
+        # Resolved on first use so read-only callers (exports, queue pages) never load the model
+        self._duplicate_detector = duplicate_detector
+        self.durability = PersistenceConfig.DURABILITY
+
+        # Inserts go through a write-behind queue so concurrent requests share
+        # one INSERT ... RETURNING and one commit
+        self.writer = writer
+        if self.writer is None and PersistenceConfig.WRITE_BEHIND_ENABLED:
+            self.writer = WriteBehindQueue(
+                self._insert_rows,
+                max_batch_size=PersistenceConfig.BATCH_SIZE,
+                max_wait_ms=PersistenceConfig.FLUSH_MS
+            )
+            # Write out anything still queued when the process exits
+            atexit.register(self.writer.close)
         
         # Team assignment mapping based on request types
         self.team_mapping = {
@@ -20,9 +50,15 @@ class ServiceRequestManager:
             "Money Movement - Outbound": "OUTBOUND_TEAM"
         }
 
-    def _get_db(self) -> Session:
-        """Get database session"""
-        return SessionLocal()
+    @property
+    def duplicate_detector(self) -> DuplicateDetectorService:
+        if self._duplicate_detector is None:
+            self._duplicate_detector = get_duplicate_detector()
+        return self._duplicate_detector
+
+    def _get_db(self):
+        """Get database session (request-scoped inside a Flask request)"""
+        return db_session()
 
     def create_service_request(
         self,
@@ -31,72 +67,317 @@ class ServiceRequestManager:
         deal_id: str,
         extracted_fields: Dict[str, Any],
         confidence_score: float,
-        email_content: str
+        email_content: str,
+        embedding: Optional[EmailEmbedding] = None,
+        durability: Optional[str] = None,
+        classified_by: Optional[str] = None
     ) -> Optional[ServiceRequest]:
         """
         Create a new service request if it's not a duplicate
+        Pass the request's embedding handle to reuse an earlier duplicate check
+        With "sync" durability this returns after the row is committed; with
+        "async" it returns once the row is queued for the next flush
         Returns None if it's a duplicate, otherwise returns the created ServiceRequest
         """
         # Check for duplicates using the email content
-        is_duplicate, duplicate_confidence = self.duplicate_detector.check_duplicate(email_content)
+        is_duplicate, duplicate_confidence = self.duplicate_detector.check_duplicate(email_content, embedding)
         
         if is_duplicate:
             return None
             
-        # Create new service request
+        service_request = self._build_service_request(
+            request_type=request_type,
+            sub_request_type=sub_request_type,
+            deal_id=deal_id,
+            extracted_fields=extracted_fields,
+            confidence_score=confidence_score,
+            embedding_row=embedding.row if embedding is not None else None,
+            classified_by=classified_by
+        )
+        
+        # Store in database
+        with stage("db_persist"):
+            future = self._persist([service_request])[0]
+            if (durability or self.durability) == 'sync':
+                return future.result()
+        return service_request
+
+    def create_service_requests(self, requests: List[Dict[str, Any]]) -> List[ServiceRequest]:
+        """
+        Create several service requests and wait until they are committed
+        Each entry holds create_service_request arguments; callers are expected
+        to have run duplicate detection already
+        """
+        return [future.result() for future in self.submit_service_requests(requests)]
+
+    def submit_service_requests(self, requests: List[Dict[str, Any]]) -> List[Future]:
+        """
+        Queue several service requests without waiting for the commit
+        Returns one Future per entry, resolving to its ServiceRequest, or to
+        None when a request with the same source_digest is already stored
+        """
+        return self._persist([
+            self._build_service_request(
+                request_type=fields['request_type'],
+                sub_request_type=fields.get('sub_request_type'),
+                deal_id=fields['deal_id'],
+                extracted_fields=fields['extracted_fields'],
+                confidence_score=fields['confidence_score'],
+                embedding_row=fields.get('embedding_row'),
+                source_digest=fields.get('source_digest'),
+                classified_by=fields.get('classified_by')
+            )
+            for fields in requests
+        ])
+
+    def flush(self) -> None:
+        """Wait for queued service requests to be committed"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def _persist(self, service_requests: List[ServiceRequest]) -> List[Future]:
+        rows = [service_request.to_row() for service_request in service_requests]
+        if self.writer is not None:
+            row_futures = self.writer.submit_many(rows)
+        else:
+            row_futures = []
+            for row, created_at in zip(rows, self._insert_rows(rows)):
+                row_future = Future()
+                row_future.set_result(created_at)
+                row_futures.append(row_future)
+
+        futures = []
+        for service_request, row_future in zip(service_requests, row_futures):
+            future = Future()
+            row_future.add_done_callback(partial(self._resolve, service_request, future))
+            futures.append(future)
+        return futures
+
+    @staticmethod
+    def _resolve(service_request: ServiceRequest, future: Future, row_future: Future) -> None:
+        error = row_future.exception()
+        if error is not None:
+            future.set_exception(error)
+            return
+        created_at = row_future.result()
+        if created_at is None and service_request.source_digest is not None:
+            # The message was stored by an earlier run
+            future.set_result(None)
+            return
+        if created_at is not None:
+            service_request.created_at = created_at
+        future.set_result(service_request)
+
+    def _insert_rows(self, rows: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Insert rows with one multi-row INSERT ... RETURNING in one transaction
+        Returns the database created_at of each row, in order, or None for a
+        row skipped because its source_digest is already stored
+        """
+        table = ServiceRequestDB.__table__
+        insert = sqlite_insert if IS_SQLITE else postgresql_insert
+        statement = (
+            insert(table).values(rows)
+            .on_conflict_do_nothing(index_elements=[table.c.source_digest])
+            .returning(table.c.id, table.c.created_at)
+        )
+        with stage("db_insert_batch"), self._get_db() as db:
+            result = db.execute(statement)
+            created = {row.id: row.created_at for row in result}
+            db.commit()
+        return [created.get(row["id"]) for row in rows]
+
+    def _build_service_request(
+        self,
+        request_type: str,
+        sub_request_type: Optional[str],
+        deal_id: str,
+        extracted_fields: Dict[str, Any],
+        confidence_score: float,
+        embedding_row: Optional[int] = None,
+        source_digest: Optional[str] = None,
+        classified_by: Optional[str] = None
+    ) -> ServiceRequest:
+        """Create a new service request and assign its team"""
         service_request = ServiceRequest(
             request_type=request_type,
             sub_request_type=sub_request_type,
             deal_id=deal_id,
             extracted_fields=extracted_fields,
-            confidence_score=confidence_score
+            confidence_score=confidence_score,
+            embedding_row=embedding_row,
+            source_digest=source_digest,
+            classified_by=classified_by
         )
         
         # Assign team based on request type
         team = self.team_mapping.get(request_type, "DEFAULT_TEAM")
         service_request.assign_team(team)
-        
-        # Store in database
-        db = self._get_db()
-        try:
-            db_request = ServiceRequestDB.from_dict(service_request.to_dict())
-            db.add(db_request)
-            db.commit()
-            db.refresh(db_request)
-            return ServiceRequest.from_dict(db_request.to_dict())
-        finally:
-            db.close()
+        return service_request
 
     def get_service_request(self, request_id: str) -> Optional[ServiceRequest]:
         """Get a service request by ID"""
-        db = self._get_db()
-        try:
-            db_request = db.query(ServiceRequestDB).filter(ServiceRequestDB.id == request_id).first()
-            if not db_request:
-                return None
-            return ServiceRequest.from_dict(db_request.to_dict())
-        finally:
-            db.close()
+        with self._get_db() as db:
+            row = db.execute(
+                select(*ServiceRequestDB.columns()).where(ServiceRequestDB.id == request_id)
+            ).first()
+            return ServiceRequest.from_row(row) if row else None
 
     def get_service_requests_by_team(self, team: str) -> List[ServiceRequest]:
         """Get all service requests assigned to a specific team"""
-        db = self._get_db()
+        with self._get_db() as db:
+            rows = db.execute(
+                select(*ServiceRequestDB.columns()).where(ServiceRequestDB.team_assigned == team)
+            ).all()
+            return [ServiceRequest.from_row(row) for row in rows]
+
+    def get_team_queue(
+        self,
+        team: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a team's service requests, oldest first
+        Uses keyset pagination on (created_at, id) so every page is an index
+        range scan, and selects plain columns instead of ORM objects
+        Returns (service request dicts, cursor for the next page or None)
+        """
+        query = self._filtered_query(
+            teams=[team], statuses=statuses, created_after=created_after, created_before=created_before
+        )
+        if cursor:
+            last_created_at, last_id = self.decode_cursor(cursor)
+            query = query.where(
+                tuple_(ServiceRequestDB.created_at, ServiceRequestDB.id) > tuple_(last_created_at, last_id)
+            )
+        # One extra row tells us whether another page exists
+        query = query.order_by(ServiceRequestDB.created_at, ServiceRequestDB.id).limit(limit + 1)
+
+        with self._get_db() as db:
+            rows = db.execute(query).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1].created_at, rows[-1].id)
+        return [ServiceRequestDB.row_to_dict(row) for row in rows], next_cursor
+
+    def iter_service_requests(
+        self,
+        teams: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        request_types: Optional[List[str]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching service request dicts, oldest first, from a server-side
+        cursor so memory use does not grow with the size of the result
+        """
+        query = self._filtered_query(
+            teams=teams, statuses=statuses, request_types=request_types,
+            created_after=created_after, created_before=created_before
+        ).order_by(ServiceRequestDB.created_at, ServiceRequestDB.id)
+
+        with self._get_db() as db:
+            result = db.execute(query.execution_options(stream_results=True)).yield_per(batch_size)
+            try:
+                for row in result:
+                    yield ServiceRequestDB.row_to_dict(row)
+            finally:
+                result.close()
+
+    def iter_labeled_embeddings(
+        self,
+        min_confidence: float = 0.0,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        Yield (embedding_row, request_type, sub_request_type) of requests whose
+        embedding is in the persistent corpus, for training the pre-classifier
+        Only model-classified requests are used: the pre-classifier's own
+        answers would feed back into its training set
+        """
+        query = select(
+            ServiceRequestDB.embedding_row, ServiceRequestDB.request_type, ServiceRequestDB.sub_request_type
+        ).where(
+            ServiceRequestDB.embedding_row.is_not(None),
+            ServiceRequestDB.classified_by == 'model',
+            ServiceRequestDB.confidence_score >= min_confidence
+        ).order_by(ServiceRequestDB.embedding_row)
+
+        with self._get_db() as db:
+            result = db.execute(query.execution_options(stream_results=True)).yield_per(batch_size)
+            try:
+                for row in result:
+                    yield row.embedding_row, row.request_type, row.sub_request_type
+            finally:
+                result.close()
+
+    @staticmethod
+    def _filtered_query(
+        teams: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        request_types: Optional[List[str]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ):
+        """Column-projected select with the optional filters applied"""
+        query = select(*ServiceRequestDB.columns())
+        if teams:
+            query = query.where(ServiceRequestDB.team_assigned.in_(teams))
+        if statuses:
+            query = query.where(ServiceRequestDB.status.in_(statuses))
+        if request_types:
+            query = query.where(ServiceRequestDB.request_type.in_(request_types))
+        if created_after is not None:
+            query = query.where(ServiceRequestDB.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(ServiceRequestDB.created_at < created_before)
+        return query
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, request_id: str) -> str:
+        raw = json.dumps([created_at.isoformat(), request_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
         try:
-            db_requests = db.query(ServiceRequestDB).filter(ServiceRequestDB.team_assigned == team).all()
-            return [ServiceRequest.from_dict(request.to_dict()) for request in db_requests]
-        finally:
-            db.close()
+            created_at, request_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return datetime.fromisoformat(created_at), request_id
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
 
     def update_service_request_status(self, request_id: str, new_status: str) -> Optional[ServiceRequest]:
         """Update the status of a service request"""
-        db = self._get_db()
-        try:
-            db_request = db.query(ServiceRequestDB).filter(ServiceRequestDB.id == request_id).first()
-            if not db_request:
-                return None
-            db_request.status = new_status
+        # One UPDATE ... RETURNING instead of select, update and refresh
+        table = ServiceRequestDB.__table__
+        with self._get_db() as db:
+            row = db.execute(
+                update(table).where(table.c.id == request_id).values(status=new_status)
+                .returning(*[table.c[field] for field in ServiceRequest.__slots__])
+            ).first()
             db.commit()
-            db.refresh(db_request)
-            return ServiceRequest.from_dict(db_request.to_dict())
-        finally:
-            db.close() 
\ No newline at end of file
+            return ServiceRequest.from_row(row) if row else None
+ 
+
+
+_shared_manager: Optional[ServiceRequestManager] = None
+_shared_manager_lock = threading.Lock()
+
+def get_service_request_manager() -> ServiceRequestManager:
+    """Process-wide manager, so every caller shares one write-behind queue"""
+    global _shared_manager
+    if _shared_manager is None:
+        with _shared_manager_lock:
+            if _shared_manager is None:
+                _shared_manager = ServiceRequestManager()
+                if _shared_manager.writer is not None:
+                    registry.add_collector("db_writer", _shared_manager.writer.get_stats)
+    return _shared_manager
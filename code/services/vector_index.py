@@ -0,0 +1,177 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from services.embedding_store import EmbeddingStore
+
+
+class VectorIndex(ABC):
+    """
+    Nearest-neighbour index over the rows of an EmbeddingStore.
+    The store owns the vectors; an index only keeps whatever auxiliary
+    structure it needs to answer queries faster than a full scan.
+    """
+
+    def __init__(self, store: EmbeddingStore):
+        self.store = store
+
+    def add(self, row: int) -> None:
+        """Register a row that has just been appended to the store"""
+
+    def add_many(self, rows: range) -> None:
+        """Register a contiguous range of rows appended to the store"""
+        for row in rows:
+            self.add(row)
+
+    @abstractmethod
+    def search(self, embedding: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row ids, cosine similarities) of the k best matches, best first"""
+
+    def exact_search(self, embedding: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force scan of every stored row"""
+        if len(self.store) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self._top_k(np.arange(len(self.store)), self.store.cosine_similarities(embedding), k)
+
+    @staticmethod
+    def _top_k(ids: np.ndarray, sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if k >= sims.shape[0]:
+            order = np.argsort(-sims)
+        else:
+            top = np.argpartition(-sims, k)[:k]
+            order = top[np.argsort(-sims[top])]
+        return ids[order], sims[order]
+
+
+class ExactIndex(VectorIndex):
+    """Exact scan; the right choice for small stores"""
+
+    def search(self, embedding: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        return self.exact_search(embedding, k)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: rows are bucketed by their nearest k-means centroid
+    and a query only scans the `n_probe` closest buckets.
+    Raising `n_probe` trades latency for recall; `n_probe == n_lists` is exact.
+    Stores smaller than `min_index_size` are always scanned exactly.
+    """
+
+    def __init__(
+        self,
+        store: EmbeddingStore,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        min_index_size: int = 10000,
+        retrain_factor: float = 4.0,
+        train_iterations: int = 10,
+        train_sample_per_list: int = 64,
+        seed: int = 0
+    ):
+        super().__init__(store)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_index_size = min_index_size
+        self.retrain_factor = retrain_factor
+        self.train_iterations = train_iterations
+        self.train_sample_per_list = train_sample_per_list
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._list_ids: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _needs_training(self) -> bool:
+        size = len(self.store)
+        if size < self.min_index_size:
+            return False
+        return not self.is_trained or size >= self._trained_size * self.retrain_factor
+
+    def train(self) -> None:
+        """Fit spherical k-means centroids and rebuild the inverted lists"""
+        vectors = self.store.vectors
+        size = vectors.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(size)))
+        n_lists = min(n_lists, size)
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(size, n_lists * self.train_sample_per_list)
+        sample = vectors[np.sort(rng.choice(size, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for lists that received no samples
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self._list_ids = [[] for _ in range(n_lists)]
+        self._list_arrays = [None] * n_lists
+
+        # Assign in chunks so the score matrix stays small
+        chunk = 65536
+        for start in range(0, size, chunk):
+            assignments = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for offset, list_id in enumerate(assignments.tolist()):
+                self._list_ids[list_id].append(start + offset)
+
+        self._trained_size = size
+
+    def add(self, row: int) -> None:
+        self.add_many(range(row, row + 1))
+
+    def add_many(self, rows: range) -> None:
+        # Training covers every row already in the store, including these
+        if self._needs_training():
+            self.train()
+            return
+        if not self.is_trained or len(rows) == 0:
+            return
+
+        assignments = np.argmax(self.store.vectors[rows.start:rows.stop] @ self.centroids.T, axis=1)
+        for row, list_id in zip(rows, assignments.tolist()):
+            self._list_ids[list_id].append(row)
+            self._list_arrays[list_id] = None
+
+    def _list_array(self, list_id: int) -> np.ndarray:
+        array = self._list_arrays[list_id]
+        if array is None:
+            array = np.asarray(self._list_ids[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = array
+        return array
+
+    def search(self, embedding: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_trained or len(self.store) < self.min_index_size:
+            return self.exact_search(embedding, k)
+
+        query = self.store.normalize(embedding)
+        n_probe = min(self.n_probe, self.centroids.shape[0])
+        centroid_sims = self.centroids @ query
+        probes = np.argpartition(-centroid_sims, n_probe - 1)[:n_probe]
+
+        candidates = np.concatenate([self._list_array(int(list_id)) for list_id in probes])
+        if candidates.shape[0] == 0:
+            return self.exact_search(embedding, k)
+
+        sims = self.store.vectors[candidates] @ query
+        return self._top_k(candidates, sims, k)
+
+
+def create_index(store: EmbeddingStore, backend: str = "exact", **options) -> VectorIndex:
+    """Build the index backend selected by name"""
+    if backend == "exact":
+        return ExactIndex(store)
+    if backend == "ivf":
+        return IVFIndex(store, **options)
+    raise ValueError(f"Unknown index backend '{backend}'. Expected 'exact' or 'ivf'")
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+from config.job_queue_config import JobQueueConfig
+from config.warmup_config import WarmupConfig
+from services.duplicate_detector import get_duplicate_detector, load_embedding_model
+from services.email_classifier import get_email_classifier
+from services.service_request_manager import get_service_request_manager
+
+# idle -> warming -> ready, or failed; start_warmup() retries a failure after a
+# growing delay, up to WarmupConfig.MAX_ATTEMPTS attempts
+_state: Dict[str, Any] = {"status": "idle", "seconds": {}, "error": None, "attempts": 0}
+_lock = threading.Lock()
+_thread = None
+# time.monotonic() before which a failed warm-up is not retried
+_retry_at = 0.0
+
+
+def _timed(name: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    _state["seconds"][name] = round(time.perf_counter() - start, 3)
+
+
+def warm_up() -> None:
+    """Load the embedding model and build the shared services, timing each step"""
+    global _retry_at
+    with _lock:
+        # The last error stays visible on /readyz until an attempt succeeds
+        _state.update(status="warming", seconds={})
+        _state["attempts"] += 1
+    try:
+        _timed("embedding_model", load_embedding_model)
+        _timed("duplicate_detector", get_duplicate_detector)
+        _timed("service_request_manager", get_service_request_manager)
+        _timed("email_classifier", get_email_classifier)
+        if os.path.exists(JobQueueConfig.PATH):
+            # Resume jobs queued before a restart
+            from services.job_queue import get_job_queue
+            _timed("job_queue", get_job_queue)
+        # The first encode allocates torch's buffers; pay for it here, not on a request
+        _timed("first_encode", lambda: load_embedding_model().encode(["warm-up"]))
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+        with _lock:
+            delay = WarmupConfig.RETRY_SECONDS * 2 ** (_state["attempts"] - 1)
+            _retry_at = time.monotonic() + min(delay, WarmupConfig.MAX_RETRY_SECONDS)
+            _state.update(status="failed", error=str(e))
+        return
+    with _lock:
+        _state.update(status="ready", error=None)
+
+
+def start_warmup() -> None:
+    """
+    Warm up in a background thread; no-op while warming, once ready, and
+    after a failure until its retry delay has passed or attempts run out
+    """
+    global _thread
+    with _lock:
+        if _state["status"] in ("warming", "ready"):
+            return
+        if _state["status"] == "failed" and not _can_retry():
+            return
+        _state["status"] = "warming"
+        _thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+        _thread.start()
+
+
+def _can_retry() -> bool:
+    return _state["attempts"] < WarmupConfig.MAX_ATTEMPTS and time.monotonic() >= _retry_at
+
+
+def is_ready() -> bool:
+    return _state["status"] == "ready"
+
+
+def readiness() -> Dict[str, Any]:
+    with _lock:
+        state = {**_state, "seconds": dict(_state["seconds"])}
+        if _state["status"] == "failed":
+            # None once no attempts are left
+            state["retry_in_seconds"] = (
+                round(max(0.0, _retry_at - time.monotonic()), 1)
+                if _state["attempts"] < WarmupConfig.MAX_ATTEMPTS else None
+            )
+        return state
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+
+class WriteBehindQueue:
+    """
+    Buffers rows and hands them to `flush_fn` in groups, so concurrent
+    writers share one statement and one transaction.
+    The worker takes whatever is queued and flushes as soon as the queue is
+    empty, so rows that arrive during a flush share the next one. A group
+    stops growing at `max_batch_size` rows or after collecting for
+    `max_wait_ms`. Each row's Future resolves to its entry of the
+    flush result once the transaction has committed, or to the flush error.
+    The worker thread starts on first use, so the queue can be created before
+    a pre-forking server forks.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Dict[str, Any]]], List[Any]],
+        max_batch_size: int = 100,
+        max_wait_ms: float = 20.0
+    ):
+        self.flush_fn = flush_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.stats = {
+            "rows_queued": 0,
+            "rows_written": 0,
+            "rows_failed": 0,
+            "flushes": 0,
+            "flush_seconds": 0.0
+        }
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                    self._worker.start()
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        self._ensure_worker()
+        future = Future()
+        with self._lock:
+            self.stats["rows_queued"] += 1
+        self._queue.put((row, future))
+        return future
+
+    def submit_many(self, rows: Sequence[Dict[str, Any]]) -> List[Future]:
+        return [self.submit(row) for row in rows]
+
+    def flush(self, timeout: float = None) -> None:
+        """Block until every row queued before this call has been written"""
+        if self._worker is None:
+            return
+        marker = Future()
+        self._queue.put(marker)
+        marker.result(timeout=timeout)
+
+    def close(self) -> None:
+        """Write pending rows and stop the worker thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["flush_seconds"] = round(stats["flush_seconds"], 4)
+        stats["pending"] = self.pending()
+        stats["avg_batch_size"] = round(stats["rows_written"] / stats["flushes"], 2) if stats["flushes"] else 0.0
+        return stats
+
+    def _collect(self, first) -> tuple:
+        """Gather a batch; returns (rows, flush markers, stop requested)"""
+        batch, markers = [first], []
+        deadline = time.monotonic() + self.max_wait
+        # Never wait for more rows: an empty queue means flush now
+        while len(batch) < self.max_batch_size and time.monotonic() < deadline:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, markers, True
+            if isinstance(item, Future):
+                # Flush requested: write what we have now
+                markers.append(item)
+                break
+            batch.append(item)
+        return batch, markers, False
+
+    def _write(self, batch: list) -> None:
+        rows = [row for row, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = self.flush_fn(rows)
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad row must not fail the rest of its batch: retry row by row
+                for item in batch:
+                    self._write([item])
+                return
+            print(f"Write-behind flush of {len(rows)} rows failed: {str(e)}")
+            with self._lock:
+                self.stats["rows_failed"] += len(rows)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(rows)
+            self.stats["flush_seconds"] += time.perf_counter() - start
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if isinstance(first, Future):
+                first.set_result(None)
+                continue
+
+            batch, markers, stop = self._collect(first)
+            self._write(batch)
+            for marker in markers:
+                marker.set_result(None)
+            if stop:
+                # Rows that raced with close() still get written
+                rest = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, Future):
+                        item.set_result(None)
+                    elif item is not None:
+                        rest.append(item)
+                for i in range(0, len(rest), self.max_batch_size):
+                    self._write(rest[i:i + self.max_batch_size])
+                return
@@ -0,0 +1,41 @@
+from services.document_extractor import DocumentExtractor
+from services.email_parser import EmailParser
+
+MESSAGE = b"""Subject: Payment advice
+MIME-Version: 1.0
+Content-Type: multipart/mixed; boundary="b1"
+
+--b1
+Content-Type: text/plain; charset=utf-8
+
+Please see the attached advice.
+--b1
+Content-Type: text/plain; charset=utf-8
+Content-Disposition: attachment; filename="advice.txt"
+
+Deal ID: DEAL-1234
+Amount: USD 5,000.00
+--b1
+Content-Type: application/octet-stream
+Content-Disposition: attachment; filename="logo.bin"
+
+AAAA
+--b1--
+"""
+
+
+def test_plain_text_attachment_is_kept_in_body():
+    parsed = EmailParser().parse_bytes(MESSAGE)
+
+    assert "Please see the attached advice." in parsed.body
+    assert "Deal ID: DEAL-1234" in parsed.body
+    assert [part["filename"] for part in parsed.skipped_parts] == ["logo.bin"]
+
+
+def test_plain_text_attachment_goes_to_document_extraction():
+    extractor = DocumentExtractor()
+    parsed = EmailParser(keep_document=extractor.keep_document).parse_bytes(MESSAGE)
+
+    assert "Deal ID" not in parsed.body
+    assert [document["filename"] for document in parsed.documents] == ["advice.txt"]
+    assert "Deal ID: DEAL-1234" in extractor.extract(parsed.documents[0])